@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark: three-pass text manifest parser vs the single-pass streaming parse_text_manifest
+Usage: python3 benchmarks/manifest_parser.py [--files 200] [--legs 4] [--passengers 300] [--repeat 3]
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import date, timedelta
+from collections import defaultdict
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routes.manifest import parse_text_manifest
+from src.services.network import HUB_CODE
+
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+ROUTES = ['PZU', 'NBO', 'JED', 'BOM', 'LOS', 'ACC', 'DAR', 'EBB', 'JNB', 'KRT']
+NAMES = ['ABDALLA', 'SMITH', 'MOHAMMED', 'TESFAYE', 'ALEMU', 'HASSAN', 'KEBEDE', 'AHMED']
+
+def legacy_parse_text_manifest(content):
+    """The three-pass parser parse_text_manifest replaced, kept as the accuracy and speed reference"""
+    lines = content.split('\n')
+    
+    flight_info = {
+        'flight_number': None,
+        'date': None,
+        'origin': None,
+        'destination': None,
+        'passengers': [],
+        'route_breakdown': defaultdict(int),
+        'totals': {
+            'male': 0,
+            'female': 0,
+            'child': 0,
+            'infant': 0,
+            'bags': 0,
+            'weight': 0,
+            'total': 0
+        }
+    }
+    
+    # Parse header info
+    for line in lines[:10]:
+        # Flight number and date
+        if 'FLIGHT:' in line and 'DATE:' in line:
+            # Extract flight number (e.g., "ET  621" -> "ET621")
+            flight_match = re.search(r'FLIGHT:\s*(\w+)\s*(\d+)', line)
+            if flight_match:
+                flight_info['flight_number'] = f"{flight_match.group(1)}{flight_match.group(2)}"
+            
+            # Extract date (e.g., "03JAN26" -> 2026-01-03)
+            date_match = re.search(r'DATE:\s*(\d{2})([A-Z]{3})(\d{2})', line)
+            if date_match:
+                day = date_match.group(1)
+                month_str = date_match.group(2)
+                year = date_match.group(3)
+                
+                months = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 
+                          'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08',
+                          'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
+                month = months.get(month_str, '01')
+                
+                # Assume 20xx for year
+                full_year = f"20{year}"
+                flight_info['date'] = f"{full_year}-{month}-{day}"
+        
+        # Origin and destination
+        if 'PT.OF EMBARKATION:' in line:
+            emb_match = re.search(r'PT\.OF EMBARKATION:\s*(\w+)', line)
+            if emb_match:
+                flight_info['origin'] = emb_match.group(1)
+            
+            dest_match = re.search(r'PT\.OF DEST:\s*(\w+)', line)
+            if dest_match:
+                flight_info['destination'] = dest_match.group(1)
+    
+    # Parse passenger lines
+    # Format: 001 ABDALLA/ABDEL/M./31A/..0/....../....../0712157554673/......./.../ET00348/PZU/....
+    passenger_pattern = re.compile(r'^(\d{3})\s+([A-Z]+)/([A-Z\s]+)/([MF])\.?/(\d+[A-Z])?/')
+    
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('.') or line.startswith('-') or line.startswith('TOTALS'):
+            continue
+        
+        match = passenger_pattern.match(line)
+        if match:
+            pax_num = match.group(1)
+            last_name = match.group(2)
+            first_name = match.group(3).strip()
+            gender = match.group(4)
+            seat = match.group(5) if match.group(5) else ''
+            
+            # Extract route code from the line
+            # For ET620 (inbound ADD->KWI): /ET00348/PZU/ means passenger came FROM PZU (origin)
+            # For ET621 (outbound KWI->ADD): /ET00348/PZU/ means passenger going TO PZU (destination)
+            route_match = re.search(r'/ET\d+/([A-Z]{3})/', line)
+            if route_match:
+                route_code = route_match.group(1)
+            else:
+                # If no connecting flight the passenger's other end is the hub:
+                # - Inbound (e.g. ET620 ADD->KWI): came from the origin
+                # - Outbound (e.g. ET621 KWI->ADD): going to the destination
+                if flight_info['origin'] == HUB_CODE or not flight_info['destination']:
+                    route_code = flight_info['origin'] or HUB_CODE
+                else:
+                    route_code = flight_info['destination']
+            
+            passenger = {
+                'number': pax_num,
+                'name': f"{last_name}/{first_name}",
+                'gender': gender,
+                'seat': seat,
+                'route_code': route_code
+            }
+            flight_info['passengers'].append(passenger)
+            flight_info['route_breakdown'][route_code] += 1
+            
+            # Count by gender
+            if gender == 'M':
+                flight_info['totals']['male'] += 1
+            else:
+                flight_info['totals']['female'] += 1
+    
+    # Parse totals from the file
+    for i, line in enumerate(lines):
+        if 'TOTALS PASSENGERS:' in line or (line.strip().startswith('.') and 'TOTALS:' in lines[i-2] if i >= 2 else False):
+            # Look for the totals line
+            totals_match = re.search(r'\.\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)', line)
+            if totals_match:
+                flight_info['totals']['male'] = int(totals_match.group(1))
+                flight_info['totals']['female'] = int(totals_match.group(2))
+                flight_info['totals']['child'] = int(totals_match.group(3))
+                flight_info['totals']['infant'] = int(totals_match.group(4))
+                flight_info['totals']['bags'] = int(totals_match.group(5))
+                flight_info['totals']['weight'] = int(totals_match.group(6))
+    
+    flight_info['totals']['total'] = len(flight_info['passengers'])
+    
+    return flight_info
+
+def make_manifest(flight_date, legs, passengers, rng):
+    """
+    Synthetic multi-leg manifest: per leg a header, passenger lines (with and
+    without connecting flights), separators and a dotted totals line
+    """
+    lines = []
+    number = 0
+    for leg in range(legs):
+        flight, origin, destination = ('620', HUB_CODE, 'KWI') if leg % 2 == 0 else ('621', 'KWI', HUB_CODE)
+        lines.append(f"   FLIGHT: ET  {flight}   DATE: {flight_date.day:02d}{MONTHS[flight_date.month - 1]}{flight_date.year % 100:02d}   PAGE {leg + 1}")
+        lines.append(f" PT.OF EMBARKATION: {origin}   PT.OF DEST: {destination}")
+        lines.append('-' * 80)
+        male = female = 0
+        for _ in range(passengers):
+            number = number % 999 + 1
+            gender = rng.choice('MF')
+            male += gender == 'M'
+            female += gender == 'F'
+            seat = f"{rng.randint(1, 40)}{rng.choice('ABCDEFGHJK')}/" if rng.random() < 0.9 else '/'
+            connection = f"ET{rng.randint(300, 999):05d}/{rng.choice(ROUTES)}/" if rng.random() < 0.7 else '......./'
+            lines.append(f"{number:03d} {rng.choice(NAMES)}/{rng.choice(NAMES)} {rng.choice(NAMES)}/{gender}./{seat}"
+                         f"..0/....../....../07121575{rng.randint(0, 99999):05d}/......./.../{connection}....")
+        lines.append('-' * 80)
+        lines.append(' TOTALS:      MALE FEMALE CHILD INFANT BAGS WEIGHT')
+        lines.append('')
+        lines.append(f" .   {male}  {female}  {rng.randint(0, 5)}  {rng.randint(0, 3)}  {rng.randint(100, 400)}  {rng.randint(2000, 9000)}")
+    newline = '\r\n' if rng.random() < 0.3 else '\n'
+    return newline.join(lines).encode('utf-8') + 'É'.encode('utf-8')
+
+def comparable(manifest):
+    """Parser output with the route breakdown as an ordered list, so key order counts too"""
+    result = dict(manifest)
+    result['route_breakdown'] = list(manifest['route_breakdown'].items())
+    return result
+
+def timed(func, repeat):
+    """Best wall time of repeat runs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def peak_memory(func):
+    """Peak Python allocations of one call, in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--legs', type=int, default=4, help='Flight legs per manifest')
+    parser.add_argument('--passengers', type=int, default=300, help='Passengers per leg')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    files = [make_manifest(date(2026, 1, 1) + timedelta(days=i), args.legs, args.passengers, rng) for i in range(args.files)]
+    size = sum(len(content) for content in files)
+    print(f"📄 {args.files:,} manifests x {args.legs} legs x {args.passengers} passengers ({size / 1024 / 1024:.1f} MB)")
+    
+    for content in files:
+        expected = comparable(legacy_parse_text_manifest(content.decode('utf-8', errors='ignore')))
+        actual = comparable(parse_text_manifest(io.BytesIO(content)))
+        counts = comparable(parse_text_manifest(io.BytesIO(content), counts_only=True))
+        if actual != expected:
+            print(f"❌ Results differ for a manifest of {expected['flight_number']} on {expected['date']}")
+            sys.exit(1)
+        expected['passengers'] = None
+        if counts != expected:
+            print(f"❌ Counts-only results differ for a manifest of {expected['flight_number']} on {expected['date']}")
+            sys.exit(1)
+    print("✓ Same flight, date, passengers, route breakdown and totals for every manifest")
+    
+    cases = [
+        ('three-pass (decode + split)', lambda content: legacy_parse_text_manifest(content.decode('utf-8', errors='ignore'))),
+        ('single-pass stream', lambda content: parse_text_manifest(io.BytesIO(content))),
+        ('single-pass counts only', lambda content: parse_text_manifest(io.BytesIO(content), counts_only=True))
+    ]
+    print(f"\n{'parser':<28} {'total (ms)':>11} {'per file (ms)':>14} {'MB/s':>7} {'speedup':>8} {'peak KB/file':>13}")
+    baseline = None
+    for name, parse in cases:
+        elapsed = timed(lambda: [parse(content) for content in files], args.repeat)
+        baseline = baseline or elapsed
+        peak = peak_memory(lambda: parse(files[0]))
+        print(f"{name:<28} {elapsed * 1000:>11.1f} {elapsed * 1000 / len(files):>14.2f} {size / 1024 / 1024 / elapsed:>7.1f} "
+              f"{baseline / elapsed:>7.1f}x {peak / 1024:>13.0f}")
+
+if __name__ == '__main__':
+    main()
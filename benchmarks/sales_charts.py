@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: row-by-row process_chart_data vs the NumPy SalesFrame (rollup cube) backend
+Usage: python3 benchmarks/sales_charts.py [--rows 500000] [--days 1095] [--repeat 3]
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routes.charts_redesigned import process_chart_data
+from src.services.sales_schema import resolve_sales_schema, normalize_sales_record
+from src.services.sales_vectorized import SalesFrame
+
+# Every UNDATED_EVERY-th row carries a date the sheet stored as text, not YYYY-MM-DD
+UNDATED_EVERY = 250
+UNDATED_TEXTS = ['15/03/2025', 'N/A', 'TBC']
+
+HEADERS = ['Tickets', 'DATE', 'Ticket Number', 'Amount', 'Issuing agent', 'FOP', 'Time', 'INCOME', 'Day', 'TIME 24HRS']
+CHARTS = ['by_report', 'by_agent', 'by_days', 'by_hours']
+
+def make_dataset(row_count, days=3 * 365, seed=42):
+    """Synthetic CA FOP sheet in the same shape process_excel_file stores, a few rows with non-ISO dates"""
+    random.seed(seed)
+    agents = [f'AGENT{i:02d}' for i in range(40)]
+    base = datetime(2023, 1, 1)
+    rows = []
+    for i in range(row_count):
+        sale_date = base + timedelta(days=random.randint(0, days))
+        rows.append({
+            'Tickets': 1,
+            'DATE': (UNDATED_TEXTS[i // UNDATED_EVERY % len(UNDATED_TEXTS)] if i % UNDATED_EVERY == 0
+                     else sale_date.strftime('%Y-%m-%d %H:%M:%S')),
+            'Ticket Number': f'071{i:010d}',
+            'Amount': round(random.uniform(20, 400), 3),
+            'Issuing agent': random.choice(agents),
+            'FOP': random.choice(['CA', 'CC', 'INV']),
+            'Time': random.randint(0, 2359),
+            'INCOME': round(random.uniform(20, 400), 3),
+            'Day': sale_date.strftime('%A'),
+            'TIME 24HRS': None
+        })
+    return {'CA FOP': {'headers': HEADERS, 'data': rows, 'row_count': len(rows)}}
+
+def dated_only(data):
+    """The dataset without the rows whose date isn't YYYY-MM-DD"""
+    rows = [row for row in data['CA FOP']['data'] if iso_date(row['DATE'])]
+    return {'CA FOP': dict(data['CA FOP'], data=rows, row_count=len(rows))}
+
+def iso_date(value):
+    try:
+        datetime.strptime(str(value).split(' ')[0], '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
+def expected_chart_data(data, dated, chart, data_mode, start_date, end_date, schema):
+    """
+    process_chart_data with the documented SalesFrame difference: rows without an
+    ISO date are left out of by_report and of date ranges, kept everywhere else
+    """
+    if chart == 'by_report' or start_date or end_date:
+        expected = process_chart_data(dated, chart, data_mode, 'daily', start_date, end_date, schema)
+        if chart == 'by_report' and not (start_date or end_date):
+            # The only labels dropped are the raw texts of the undated rows
+            full = process_chart_data(data, chart, data_mode, 'daily', start_date, end_date, schema)
+            if not same_chart_data({key: value for key, value in full.items() if iso_date(key)}, expected):
+                print(f"❌ process_chart_data trend differs beyond the undated labels for {data_mode}")
+                sys.exit(1)
+        return expected
+    return process_chart_data(data, chart, data_mode, 'daily', start_date, end_date, schema)
+
+def same_chart_data(expected, actual):
+    """Same labels in the same order; revenue sums may differ in the last bits (summation order)"""
+    return (list(expected.keys()) == list(actual.keys())
+            and all(math.isclose(expected[key], actual[key], rel_tol=1e-9) for key in expected))
+
+def timed(func, repeat):
+    """Best wall time of repeat runs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--days', type=int, default=3 * 365, help='Days of history the rows are spread over')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"📊 Building {args.rows:,} synthetic sales rows")
+    data = make_dataset(args.rows, args.days)
+    sheet = data['CA FOP']
+    schema = resolve_sales_schema(sheet['headers'])
+    dated = dated_only(data)
+    
+    start = time.perf_counter()
+    frame = SalesFrame.from_records([normalize_sales_record(row, schema) for row in sheet['data']])
+    build_time = time.perf_counter() - start
+    print(f"✓ SalesFrame built once in {build_time:.2f}s: {len(frame):,} cube cells ({frame.size / 1024 / 1024:.1f} MB)")
+    
+    cases = []
+    for chart in CHARTS:
+        for data_mode in ('revenue', 'tickets'):
+            cases.append((chart, data_mode, None, None))
+    cases.append(('by_report', 'revenue', '2025-06-01', '2025-06-30'))
+    cases.append(('by_agent', 'tickets', '2025-01-01', '2025-12-31'))
+    # Typical analyst windows: the last 7 and 30 days of a multi-year history
+    latest = frame.latest_date()
+    for days in (7, 30):
+        window_start = (latest - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        cases.append(('by_agent', 'revenue', window_start, latest.strftime('%Y-%m-%d')))
+        cases.append(('by_hours', 'tickets', window_start, latest.strftime('%Y-%m-%d')))
+    
+    print(f"\n{'chart':<10} {'mode':<8} {'range':<23} {'rows (ms)':>10} {'numpy (ms)':>11} {'speedup':>8}")
+    total_rows = 0.0
+    total_numpy = 0.0
+    for chart, data_mode, start_date, end_date in cases:
+        expected = expected_chart_data(data, dated, chart, data_mode, start_date, end_date, schema)
+        actual = frame.chart_data(chart, data_mode, 'daily', start_date, end_date)
+        if not same_chart_data(expected, actual):
+            print(f"❌ Results differ for {chart} / {data_mode}")
+            sys.exit(1)
+        
+        rows_time = timed(lambda: process_chart_data(data, chart, data_mode, 'daily', start_date, end_date, schema), args.repeat)
+        numpy_time = timed(lambda: frame.chart_data(chart, data_mode, 'daily', start_date, end_date), args.repeat)
+        total_rows += rows_time
+        total_numpy += numpy_time
+        date_range = f"{start_date} - {end_date}" if start_date else 'all'
+        print(f"{chart:<10} {data_mode:<8} {date_range:<23} {rows_time * 1000:>10.1f} {numpy_time * 1000:>11.2f} {rows_time / numpy_time:>7.1f}x")
+    
+    print(f"\nTotal: {total_rows * 1000:.1f} ms row-by-row vs {total_numpy * 1000:.2f} ms vectorized ({total_rows / total_numpy:.1f}x)")
+
+if __name__ == '__main__':
+    main()
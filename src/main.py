@@ -13,11 +13,20 @@ from src.routes.charts_redesigned import charts_bp
 from src.routes.flight_load import flight_load_bp
 from src.routes.manifest import manifest_bp
 from src.routes.route_analysis import route_analysis_bp
+from src.routes.jobs import jobs_bp
+from src.services.network import ensure_default_network
+from src.services.flight_load_view import sync_flight_view
+from src.services.flight_load_rollups import sync_rollups
+from src.services.flight_load_accuracy import sync_accuracy
+from src.services.manifest_route_counts import sync_route_counts
 from werkzeug.security import generate_password_hash, check_password_hash
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['SALES_CACHE_MAX_MB'] = int(os.environ.get('SALES_CACHE_MAX_MB', 256))  # Per-worker decoded dataset cache
+app.config['CHART_CACHE_MAX_MB'] = int(os.environ.get('CHART_CACHE_MAX_MB', 32))  # Per-worker rendered chart response cache
+app.config['UPLOAD_JOB_PROCESSES'] = int(os.environ.get('UPLOAD_JOB_PROCESSES', 2))  # Parser processes per worker for ?async=1 uploads (0 parses on a thread)
 
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(admin_bp, url_prefix='/api')
@@ -26,6 +35,7 @@ app.register_blueprint(charts_bp, url_prefix='/api')
 app.register_blueprint(flight_load_bp, url_prefix='/api/flight-load')
 app.register_blueprint(manifest_bp, url_prefix='/api')
 app.register_blueprint(route_analysis_bp, url_prefix='/api/route-analysis')
+app.register_blueprint(jobs_bp, url_prefix='/api')
 
 # Database configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
@@ -33,6 +43,14 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
     db.create_all()
+    ensure_default_network()
+    # One-off backfill of derived tables for data stored before they existed
+    # (a no-op once complete; uploads keep them current from then on)
+    sync_flight_view([])
+    sync_rollups([])
+    sync_accuracy([])
+    sync_route_counts([])
+    db.session.commit()
 
 # Public view password (can be changed by admin)
 PUBLIC_VIEW_PASSWORD = os.environ.get('PUBLIC_VIEW_PASSWORD', 'ethiopian2024')
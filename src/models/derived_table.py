@@ -0,0 +1,17 @@
+from src.models.user import db
+from datetime import datetime
+
+class DerivedTable(db.Model):
+    """
+    Marks a derived table (flight_load_view, rollups, ...) as complete: rebuilt
+    from every stored record at built_at and kept up to date by the upload
+    paths since. A derived table without a row here is rebuilt, not refreshed.
+    """
+    __tablename__ = 'derived_tables'
+    
+    name = db.Column(db.String(50), primary_key=True)  # Table name, e.g. 'flight_load_view'
+    rows = db.Column(db.Integer, nullable=True)  # Rows written by that rebuild
+    built_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DerivedTable {self.name} {self.built_at}>'
@@ -74,3 +74,258 @@ class FlightLoadRecord(db.Model):
         
     def __repr__(self):
         return f'<FlightLoadRecord {self.flight_no} {self.travel_date} ({self.data_source})>'
+
+class FlightLoadView(db.Model):
+    """
+    Best-known load of one flight-day: the manifest (actual) when there is one,
+    else the forecast, with both passenger counts side by side. Materialized from
+    flight_load_records and daily_manifests by every forecast or manifest upload,
+    in the upload's own transaction, so readers never merge the two.
+    """
+    __tablename__ = 'flight_load_view'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Key identifiers
+    station = db.Column(db.String(10), nullable=True)  # From the flight pair config, None for unconfigured flights
+    travel_date = db.Column(db.Date, nullable=False)
+    flight_no = db.Column(db.String(10), nullable=False)  # e.g., "620" or "621"
+    
+    # Where the best-known numbers below come from: 'forecast' or 'manifest'
+    data_source = db.Column(db.String(10), nullable=False, default='forecast')
+    
+    # Best-known data fields (same meaning as FlightLoadRecord)
+    day = db.Column(db.String(10))
+    c_cap = db.Column(db.Integer, default=0)
+    y_cap = db.Column(db.Integer, default=0)
+    tot_cap = db.Column(db.Integer, default=0)
+    pax_c = db.Column(db.Integer, default=0)
+    pax_y = db.Column(db.Integer, default=0)
+    pax = db.Column(db.Integer, default=0)
+    lf_c = db.Column(db.Float, default=0.0)
+    lf_y = db.Column(db.Float, default=0.0)
+    lf = db.Column(db.Float, default=0.0)
+    
+    forecast_pax = db.Column(db.Integer, nullable=True)  # None when no forecast was uploaded
+    actual_pax = db.Column(db.Integer, nullable=True)  # None until the manifest arrives
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Reads filter and page on (travel_date, flight_no), per station on (station, travel_date)
+    __table_args__ = (
+        db.UniqueConstraint('travel_date', 'flight_no', name='unique_flight_load_view'),
+        db.Index('ix_flight_load_view_station_date', 'station', 'travel_date'),
+    )
+    
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'station': self.station,
+            'travel_date': self.travel_date.isoformat(),
+            'flight_no': self.flight_no,
+            'data_source': self.data_source,
+            'day': self.day,
+            'c_cap': self.c_cap,
+            'y_cap': self.y_cap,
+            'tot_cap': self.tot_cap,
+            'pax_c': self.pax_c,
+            'pax_y': self.pax_y,
+            'pax': self.pax,
+            'lf_c': self.lf_c,
+            'lf_y': self.lf_y,
+            'lf': self.lf,
+            'forecast_pax': self.forecast_pax,
+            'actual_pax': self.actual_pax
+        }
+    
+    def __repr__(self):
+        return f'<FlightLoadView {self.flight_no} {self.travel_date} ({self.data_source})>'
+
+class FlightLoadRollup(db.Model):
+    """
+    Weekly or monthly load totals of one flight, maintained whenever a forecast
+    or manifest upload touches a day of the period. Each flight-day counts once:
+    its manifest (actual) when there is one, else its forecast.
+    """
+    __tablename__ = 'flight_load_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Key identifiers
+    station = db.Column(db.String(10), nullable=True)  # From the flight pair config, None for unconfigured flights
+    flight_no = db.Column(db.String(10), nullable=False)  # e.g., "620" or "621"
+    period_type = db.Column(db.String(10), nullable=False)  # 'weekly' (ISO weeks) or 'monthly'
+    period_start = db.Column(db.Date, nullable=False)  # Monday of the week / first of the month
+    
+    # Totals over the period's flight-days
+    flights = db.Column(db.Integer, default=0)
+    actual_flights = db.Column(db.Integer, default=0)  # Flight-days taken from a manifest
+    c_cap = db.Column(db.Integer, default=0)
+    y_cap = db.Column(db.Integer, default=0)
+    tot_cap = db.Column(db.Integer, default=0)
+    pax_c = db.Column(db.Integer, default=0)
+    pax_y = db.Column(db.Integer, default=0)
+    pax = db.Column(db.Integer, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('flight_no', 'period_type', 'period_start', name='unique_flight_load_rollup'),
+        db.Index('ix_flight_load_rollups_period', 'period_type', 'period_start'),
+        db.Index('ix_flight_load_rollups_station_period', 'station', 'period_type', 'period_start'),
+    )
+    
+    def to_dict(self):
+        """Convert to dictionary for API responses, with load factors derived from the totals"""
+        return {
+            'station': self.station,
+            'flight_no': self.flight_no,
+            'period_type': self.period_type,
+            'period_start': self.period_start.isoformat(),
+            'flights': self.flights,
+            'actual_flights': self.actual_flights,
+            'c_cap': self.c_cap,
+            'y_cap': self.y_cap,
+            'tot_cap': self.tot_cap,
+            'pax_c': self.pax_c,
+            'pax_y': self.pax_y,
+            'pax': self.pax,
+            'lf_c': round(self.pax_c / self.c_cap * 100, 2) if self.c_cap else 0.0,
+            'lf_y': round(self.pax_y / self.y_cap * 100, 2) if self.y_cap else 0.0,
+            'lf': round(self.pax / self.tot_cap * 100, 2) if self.tot_cap else 0.0
+        }
+    
+    def __repr__(self):
+        return f'<FlightLoadRollup {self.flight_no} {self.period_type} {self.period_start}>'
+
+class FlightLoadAccuracy(db.Model):
+    """
+    Forecast and actual passengers of one flown flight-day, kept side by side so
+    later forecast uploads can't erase what was predicted. The error terms are
+    stored with the row, so accuracy metrics are plain sums over a date range.
+    """
+    __tablename__ = 'flight_load_accuracy'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Key identifiers
+    station = db.Column(db.String(10), nullable=True)  # From the flight pair config, None for unconfigured flights
+    travel_date = db.Column(db.Date, nullable=False, index=True)
+    flight_no = db.Column(db.String(10), nullable=False)  # e.g., "620" or "621"
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    
+    forecast_pax = db.Column(db.Integer, nullable=False)  # Forecast in force when the actual was recorded
+    actual_pax = db.Column(db.Integer, nullable=False)  # From the manifest
+    error = db.Column(db.Integer, nullable=False)  # forecast_pax - actual_pax (positive = over-forecast)
+    abs_pct_error = db.Column(db.Float, nullable=True)  # |error| / actual_pax * 100, None when nobody flew
+    
+    # Metadata
+    forecast_captured_at = db.Column(db.DateTime, default=datetime.utcnow)
+    actual_updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('travel_date', 'flight_no', name='unique_flight_load_accuracy'),
+        db.Index('ix_flight_load_accuracy_station_date', 'station', 'travel_date'),
+    )
+    
+    def set_actual(self, actual_pax):
+        """Record (or correct) the actual passengers and recompute the error terms"""
+        self.actual_pax = actual_pax
+        self.error = self.forecast_pax - actual_pax
+        self.abs_pct_error = abs(self.error) / actual_pax * 100 if actual_pax else None
+        self.actual_updated_at = datetime.utcnow()
+    
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'station': self.station,
+            'travel_date': self.travel_date.isoformat(),
+            'flight_no': self.flight_no,
+            'forecast_pax': self.forecast_pax,
+            'actual_pax': self.actual_pax,
+            'error': self.error,
+            'abs_pct_error': round(self.abs_pct_error, 2) if self.abs_pct_error is not None else None
+        }
+    
+    def __repr__(self):
+        return f'<FlightLoadAccuracy {self.flight_no} {self.travel_date} {self.forecast_pax}/{self.actual_pax}>'
+
+class FlightLoadSnapshot(db.Model):
+    """
+    One forecast workbook upload. Its cells (FlightLoadSnapshotCell) are only the
+    (date, flight) forecasts that changed against the previous snapshot, so the
+    forecast as of snapshot N is, per cell, the latest version with id <= N.
+    """
+    __tablename__ = 'flight_load_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Increases with every upload: the version number
+    filename = db.Column(db.String(255), nullable=True)
+    uploaded_by = db.Column(db.String(100), nullable=True)
+    uploaded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    cells_changed = db.Column(db.Integer, nullable=False, default=0)  # Rows in flight_load_snapshot_cells
+    cells_uploaded = db.Column(db.Integer, nullable=False, default=0)  # Forecast records in the workbook
+    baseline = db.Column(db.Boolean, nullable=False, default=False)  # Forecasts stored before versioning
+    
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'snapshot_id': self.id,
+            'filename': self.filename,
+            'uploaded_by': self.uploaded_by,
+            'uploaded_at': self.uploaded_at.isoformat() if self.uploaded_at else None,
+            'cells_changed': self.cells_changed,
+            'cells_uploaded': self.cells_uploaded,
+            'baseline': self.baseline
+        }
+    
+    def __repr__(self):
+        return f'<FlightLoadSnapshot {self.id} {self.filename}>'
+
+class FlightLoadSnapshotCell(db.Model):
+    """A forecast cell as written by one snapshot (only stored when it changed)"""
+    __tablename__ = 'flight_load_snapshot_cells'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('flight_load_snapshots.id'), nullable=False)
+    travel_date = db.Column(db.Date, nullable=False)
+    flight_no = db.Column(db.String(10), nullable=False)
+    
+    # Same data fields as FlightLoadRecord
+    day = db.Column(db.String(10))
+    c_cap = db.Column(db.Integer, default=0)
+    y_cap = db.Column(db.Integer, default=0)
+    tot_cap = db.Column(db.Integer, default=0)
+    pax_c = db.Column(db.Integer, default=0)
+    pax_y = db.Column(db.Integer, default=0)
+    pax = db.Column(db.Integer, default=0)
+    lf_c = db.Column(db.Float, default=0.0)
+    lf_y = db.Column(db.Float, default=0.0)
+    lf = db.Column(db.Float, default=0.0)
+    
+    # (cell, version) B-tree: "cell as of snapshot N" is one descending index probe
+    __table_args__ = (
+        db.UniqueConstraint('travel_date', 'flight_no', 'snapshot_id', name='unique_flight_load_snapshot_cell'),
+        db.Index('ix_flight_load_snapshot_cells_snapshot', 'snapshot_id'),
+    )
+    
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'snapshot_id': self.snapshot_id,
+            'travel_date': self.travel_date.isoformat(),
+            'flight_no': self.flight_no,
+            'day': self.day,
+            'c_cap': self.c_cap,
+            'y_cap': self.y_cap,
+            'tot_cap': self.tot_cap,
+            'pax_c': self.pax_c,
+            'pax_y': self.pax_y,
+            'pax': self.pax,
+            'lf_c': self.lf_c,
+            'lf_y': self.lf_y,
+            'lf': self.lf
+        }
+    
+    def __repr__(self):
+        return f'<FlightLoadSnapshotCell {self.flight_no} {self.travel_date} @{self.snapshot_id}>'
@@ -63,6 +63,55 @@ class DailyManifest(db.Model):
             'source': self.source
         }
 
+class ManifestRouteCount(db.Model):
+    """
+    Passengers per airport of a manifest's route breakdown, one row per
+    (flight date, flight, airport), so forecast grids sum actuals in SQL
+    instead of decoding route_breakdown JSON. Rewritten with each manifest upload.
+    """
+    __tablename__ = 'manifest_route_counts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    flight_date = db.Column(db.Date, nullable=False)
+    flight_no = db.Column(db.String(10), nullable=False)  # without the 'ET' prefix
+    direction = db.Column(db.String(20), nullable=False)  # 'inbound' or 'outbound', as on the manifest
+    airport_code = db.Column(db.String(10), nullable=False)
+    passengers = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('flight_date', 'flight_no', 'airport_code', name='unique_manifest_route_count'),
+        # Covers the forecast grid query: direction + date range (+ flights) -> airport, passengers
+        db.Index('ix_manifest_route_counts_direction_date', 'direction', 'flight_date', 'airport_code', 'flight_no', 'passengers'),
+    )
+    
+    def to_dict(self):
+        return {
+            'flight_date': self.flight_date.strftime('%Y-%m-%d'),
+            'flight_no': f"ET{self.flight_no}",
+            'direction': self.direction,
+            'airport_code': self.airport_code,
+            'passengers': self.passengers
+        }
+
+class ManifestRouteMonth(db.Model):
+    """
+    Monthly totals of manifest_route_counts per flight, direction and airport:
+    the pre-aggregated layer origin-destination matrices read whole months from
+    """
+    __tablename__ = 'manifest_route_months'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    month_start = db.Column(db.Date, nullable=False)  # first day of the month
+    flight_no = db.Column(db.String(10), nullable=False)
+    direction = db.Column(db.String(20), nullable=False)
+    airport_code = db.Column(db.String(10), nullable=False)
+    passengers = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('month_start', 'flight_no', 'direction', 'airport_code', name='unique_manifest_route_month'),
+        db.Index('ix_manifest_route_months_direction_month', 'direction', 'month_start', 'airport_code', 'flight_no', 'passengers'),
+    )
+
 class RouteForecast(db.Model):
     """
     Manual route forecast data entered by admin
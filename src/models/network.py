@@ -0,0 +1,82 @@
+from src.models.user import db
+from datetime import datetime
+
+class Station(db.Model):
+    """
+    An outstation of the network, served from the hub by one or more flight pairs
+    """
+    __tablename__ = 'stations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(10), nullable=False, unique=True)  # 'KWI', 'DXB', etc.
+    name = db.Column(db.String(200), nullable=True)  # 'Kuwait', 'Dubai', etc.
+    country = db.Column(db.String(100), nullable=True)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'code': self.code,
+            'name': self.name,
+            'country': self.country,
+            'active': self.active
+        }
+    
+    def __repr__(self):
+        return f'<Station {self.code}>'
+
+class FlightPair(db.Model):
+    """
+    A station's rotation: the inbound flight (hub to station) and the outbound
+    flight (station to hub), with the seat configuration of each leg
+    """
+    __tablename__ = 'flight_pairs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    station_code = db.Column(db.String(10), db.ForeignKey('stations.code'), nullable=False, index=True)
+    hub_code = db.Column(db.String(10), nullable=False, default='ADD')
+    
+    # Flight numbers as FlightLoadRecord stores them, without the 'ET' prefix
+    inbound_flight_no = db.Column(db.String(10), nullable=False, unique=True)  # e.g., "620" (ADD -> KWI)
+    outbound_flight_no = db.Column(db.String(10), nullable=False, unique=True)  # e.g., "621" (KWI -> ADD)
+    
+    # Seat configuration per leg (usually the same aircraft both ways)
+    inbound_business_capacity = db.Column(db.Integer, nullable=False, default=24)
+    inbound_economy_capacity = db.Column(db.Integer, nullable=False, default=246)
+    outbound_business_capacity = db.Column(db.Integer, nullable=False, default=24)
+    outbound_economy_capacity = db.Column(db.Integer, nullable=False, default=246)
+    
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def legs(self):
+        """(flight_no, direction, business_capacity, economy_capacity) of both legs"""
+        return (
+            (self.inbound_flight_no, 'inbound', self.inbound_business_capacity, self.inbound_economy_capacity),
+            (self.outbound_flight_no, 'outbound', self.outbound_business_capacity, self.outbound_economy_capacity)
+        )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'station_code': self.station_code,
+            'hub_code': self.hub_code,
+            'inbound_flight': f"ET{self.inbound_flight_no}",
+            'outbound_flight': f"ET{self.outbound_flight_no}",
+            'inbound_capacity': {
+                'business': self.inbound_business_capacity,
+                'economy': self.inbound_economy_capacity,
+                'total': self.inbound_business_capacity + self.inbound_economy_capacity
+            },
+            'outbound_capacity': {
+                'business': self.outbound_business_capacity,
+                'economy': self.outbound_economy_capacity,
+                'total': self.outbound_business_capacity + self.outbound_economy_capacity
+            },
+            'active': self.active
+        }
+    
+    def __repr__(self):
+        return f'<FlightPair {self.station_code} {self.inbound_flight_no}/{self.outbound_flight_no}>'
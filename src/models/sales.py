@@ -6,7 +6,7 @@ class SalesData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
-    data_json = db.Column(db.Text, nullable=False)  # Store the processed data as JSON
+    data_json = db.deferred(db.Column(db.Text, nullable=False))  # Store the processed data as JSON (loaded on first access)
     is_active = db.Column(db.Boolean, default=True)  # Only one dataset should be active at a time
     
     def __repr__(self):
@@ -28,6 +28,90 @@ class SalesData(db.Model):
         """Store data as JSON string"""
         self.data_json = json.dumps(data, default=str)
 
+class SalesTransaction(db.Model):
+    """
+    One typed sales row extracted from an uploaded workbook.
+    Filled at upload time so chart queries can filter and group in SQL
+    instead of decoding SalesData.data_json.
+    """
+    __tablename__ = 'sales_transactions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey('sales_data.id'), nullable=False)
+    
+    # Resolved fields (None when the source cell was missing or unparseable)
+    sale_date = db.Column(db.Date, nullable=True)
+    hour = db.Column(db.Integer, nullable=True)  # 0-23
+    day_name = db.Column(db.String(20), nullable=True)  # 'Monday', 'Tuesday', ...
+    agent = db.Column(db.String(100), nullable=True)
+    fop = db.Column(db.String(50), nullable=True)
+    income = db.Column(db.Float, nullable=False, default=0.0)
+    ticket_number = db.Column(db.String(50), nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_sales_transactions_dataset_date', 'dataset_id', 'sale_date'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'dataset_id': self.dataset_id,
+            'sale_date': self.sale_date.isoformat() if self.sale_date else None,
+            'hour': self.hour,
+            'day_name': self.day_name,
+            'agent': self.agent,
+            'fop': self.fop,
+            'income': self.income,
+            'ticket_number': self.ticket_number
+        }
+    
+    def __repr__(self):
+        return f'<SalesTransaction {self.dataset_id} {self.sale_date} {self.income}>'
+
+class SalesRollupCell(db.Model):
+    """
+    One cell of a dataset's rollup cube: revenue and ticket totals per
+    (sale_date, hour, day_name, agent, fop). Built at upload time so charts
+    scale with the number of cells instead of the number of tickets.
+    """
+    __tablename__ = 'sales_rollup_cells'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey('sales_data.id'), nullable=False)
+    
+    # Cube dimensions (None when the source cell was missing or unparseable)
+    sale_date = db.Column(db.Date, nullable=True)
+    hour = db.Column(db.Integer, nullable=True)
+    day_name = db.Column(db.String(20), nullable=True)
+    agent = db.Column(db.String(100), nullable=True)
+    fop = db.Column(db.String(50), nullable=True)
+    
+    # Measures
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    tickets = db.Column(db.Integer, nullable=False, default=0)
+    first_row = db.Column(db.Integer, nullable=False, default=0)  # Upload position of the cell's first ticket
+    
+    __table_args__ = (
+        db.Index('ix_sales_rollup_cells_dataset_date', 'dataset_id', 'sale_date'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'dataset_id': self.dataset_id,
+            'sale_date': self.sale_date.isoformat() if self.sale_date else None,
+            'hour': self.hour,
+            'day_name': self.day_name,
+            'agent': self.agent,
+            'fop': self.fop,
+            'revenue': self.revenue,
+            'tickets': self.tickets,
+            'first_row': self.first_row
+        }
+    
+    def __repr__(self):
+        return f'<SalesRollupCell {self.dataset_id} {self.sale_date} {self.agent} {self.tickets}>'
+
 class AdminUser(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
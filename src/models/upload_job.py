@@ -0,0 +1,65 @@
+from src.models.user import db
+from datetime import datetime
+import json
+
+class UploadJob(db.Model):
+    """
+    Progress record of an upload parsed and saved in the background.
+    Lives in the application database so any worker can answer /api/jobs/<id>.
+    """
+    __tablename__ = 'upload_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, handed to the client
+    kind = db.Column(db.String(30), nullable=False)  # 'sales', 'flight_load', 'route_analysis', 'manifest'
+    filename = db.Column(db.String(255), nullable=False)
+    
+    # 'queued' -> 'running' -> 'succeeded' or 'failed'
+    state = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    stage = db.Column(db.String(20), nullable=True)  # 'parsing' or 'saving' while running
+    percent = db.Column(db.Float, nullable=False, default=0.0)
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    rows_expected = db.Column(db.Integer, nullable=True)  # From the workbook's stored dimensions, an estimate
+    error = db.Column(db.Text, nullable=True)
+    result_json = db.Column(db.Text, nullable=True)  # The response body a synchronous upload returns
+    
+    # Metadata
+    submitted_by = db.Column(db.String(80), nullable=True)
+    worker_pid = db.Column(db.Integer, nullable=True)  # Process running the job, to detect orphaned jobs
+    worker_token = db.Column(db.String(64), nullable=True)  # Boot id + start time of that process, so a reused pid doesn't count
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    @property
+    def finished(self):
+        return self.state in ('succeeded', 'failed')
+    
+    def get_result(self):
+        """Return the stored upload result as a Python object"""
+        return json.loads(self.result_json) if self.result_json else None
+    
+    def set_result(self, result):
+        """Store the upload result as JSON string"""
+        self.result_json = json.dumps(result, default=str)
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'filename': self.filename,
+            'state': self.state,
+            'stage': self.stage,
+            'percent': round(self.percent or 0, 1),
+            'rows_processed': self.rows_processed,
+            'rows_expected': self.rows_expected,
+            'error': self.error,
+            'result': self.get_result(),
+            'submitted_by': self.submitted_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'status_url': f'/api/jobs/{self.id}'
+        }
+    
+    def __repr__(self):
+        return f'<UploadJob {self.id} {self.kind} {self.state}>'
@@ -1,14 +1,43 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from src.models.user import db
-from src.models.sales import SalesData
+from src.models.sales import SalesData, SalesTransaction, SalesRollupCell
+from src.services.sales_cache import sales_cache, chart_response_cache, CachedResponse, get_cached_dataset
+from src.services.sales_schema import DAYS_ORDER, get_sheet_schema, safe_float, get_date_string, get_hour, normalize_sales_row
+from src.services.sales_aggregation import CHART_GROUPINGS, TIME_MODES, aggregate_sales, chart_grouping, format_grouping, period_label
+from src.services.sales_vectorized import SalesFrame
 import base64
 import json
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import func
 from collections import defaultdict, Counter
 import math
 
 charts_bp = Blueprint('charts', __name__)
 
+DEFAULT_BATCH_CHARTS = ['by_report', 'by_agent', 'by_days', 'by_hours']
+
+# Approximate SalesFrame bytes per row, used to decide whether a frame fits in the cache
+FRAME_ROW_BYTES = 36
+
+# Relative window such as 7d = the last 7 days up to the latest sale
+RELATIVE_WINDOW = re.compile(r'^(\d+)d$')
+
+def get_chart_title(chart_id, time_mode='daily'):
+    """Display title of a chart"""
+    titles = {
+        'by_report': f'Sales Report - {time_mode.capitalize() if time_mode in TIME_MODES else "Daily"} Trend',
+        'by_agent': 'Sales by Agent',
+        'by_days': 'Sales by Day of Week',
+        'by_hours': 'Sales by Hour of Day',
+        'by_fop': 'Sales by Form of Payment'
+    }
+    return titles.get(chart_id, 'Chart')
+
+def get_chart_type(chart_id):
+    """SVG chart type used for a chart"""
+    return 'line' if chart_id == 'by_report' else 'bar'
+
 def get_column_value(row, possible_names):
     """Get value from row using multiple possible column names"""
     for name in possible_names:
@@ -175,19 +204,20 @@ def create_line_chart_svg(title, data, colors, width, height, data_mode):
     svg += "</svg>"
     return svg
 
-def safe_float(value):
-    """Safely convert value to float"""
-    if value is None:
-        return 0.0
-    try:
-        if isinstance(value, str):
-            value = value.replace(',', '').replace('$', '').strip()
-        return float(value)
-    except (ValueError, TypeError):
-        return 0.0
+def extract_sales_transactions(data):
+    """Build SalesTransaction rows (as dicts) from the best sheet of a processed workbook"""
+    best_sheet = find_best_data_sheet(data)
+    if not best_sheet:
+        return []
+    schema = get_sheet_schema(data[best_sheet])
+    return [normalize_sales_row(row, schema) for row in data[best_sheet]['data']]
 
-def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily', start_date=None, end_date=None):
-    """Process sales data for specific chart type"""
+def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily', start_date=None, end_date=None, schema=None):
+    """
+    Process sales data for specific chart type.
+    schema maps logical fields to the sheet's headers (see resolve_sales_schema);
+    it is resolved once per dataset so rows are read by direct key.
+    """
     try:
         # Find the best sheet with actual data
         best_sheet = find_best_data_sheet(data)
@@ -199,21 +229,20 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
         if not sheet_data:
             return {}
         
-        # Define possible column names for each field (based on actual Excel structure)
-        # Actual columns: Tickets, DATE, Ticket Number, Amount, Issuing agent, FOP, Time, INCOME, Day, TIME 24HRS
-        date_columns = ['DATE', 'Date', 'date', 'Issue Date']
-        income_columns = ['INCOME', 'Income', 'income', 'Amount', 'amount', 'Revenue', 'revenue']
-        agent_columns = ['Issuing agent', 'Issuing Agent', 'Agent', 'agent', 'AGENT', 'Agent Name']
-        time_columns = ['Time', 'TIME', 'time']
-        time_24_columns = ['TIME 24HRS', 'Time 24hrs', 'TIME24HRS', 'time_24hrs', 'TIME24', 'Time24']
-        day_columns = ['Day', 'DAY', 'day', 'DayOfWeek', 'Weekday']
+        if schema is None:
+            schema = get_sheet_schema(data[best_sheet])
+        date_key = schema['date']
+        income_key = schema['income']
+        agent_key = schema['agent']
+        day_key = schema['day']
+        fop_key = schema['fop']
         
         # Filter by date range if provided
         filtered_data = sheet_data
         if start_date or end_date:
             filtered_data = []
             for row in sheet_data:
-                date_val = get_column_value(row, date_columns)
+                date_val = row.get(date_key)
                 if date_val:
                     try:
                         if isinstance(date_val, str):
@@ -236,7 +265,7 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
         if chart_type == 'by_report':
             time_data = defaultdict(float)
             for row in filtered_data:
-                date_val = get_column_value(row, date_columns)
+                date_val = row.get(date_key)
                 if date_val:
                     try:
                         if isinstance(date_val, str):
@@ -244,15 +273,17 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
                         else:
                             date_str = str(date_val).split(' ')[0]
                         
-                        # Group by daily or monthly
+                        # Group by daily, weekly, monthly or quarterly
                         if time_mode == 'monthly':
                             # Extract YYYY-MM
                             key = date_str[:7] if len(date_str) >= 7 else date_str
+                        elif time_mode in ('weekly', 'quarterly'):
+                            key = period_label(datetime.strptime(date_str, '%Y-%m-%d').date(), time_mode)
                         else:  # daily
                             key = date_str
                         
                         if data_mode == 'revenue':
-                            value = safe_float(get_column_value(row, income_columns))
+                            value = safe_float(row.get(income_key))
                         else:  # tickets
                             value = 1
                         time_data[key] += value
@@ -266,11 +297,11 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
         elif chart_type == 'by_agent':
             agent_data = defaultdict(float)
             for row in filtered_data:
-                agent = get_column_value(row, agent_columns)
+                agent = row.get(agent_key)
                 if agent is None:
                     agent = 'Unknown'
                 if data_mode == 'revenue':
-                    value = safe_float(get_column_value(row, income_columns))
+                    value = safe_float(row.get(income_key))
                 else:  # tickets
                     value = 1
                 agent_data[agent] += value
@@ -281,16 +312,16 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
         
         # Chart 3: By Days of Week
         elif chart_type == 'by_days':
-            days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+            days_order = DAYS_ORDER
             days_data = defaultdict(float)
             
             for row in filtered_data:
                 # First try to get day from Day column
-                day_name = get_column_value(row, day_columns)
+                day_name = row.get(day_key)
                 
                 # If no Day column, try to parse from DATE
                 if not day_name:
-                    date_val = get_column_value(row, date_columns)
+                    date_val = row.get(date_key)
                     if date_val:
                         try:
                             if isinstance(date_val, str):
@@ -306,7 +337,7 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
                 
                 if day_name:
                     if data_mode == 'revenue':
-                        value = safe_float(get_column_value(row, income_columns))
+                        value = safe_float(row.get(income_key))
                     else:  # tickets
                         value = 1
                     days_data[day_name] += value
@@ -319,42 +350,12 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
         elif chart_type == 'by_hours':
             hourly_data = defaultdict(float)
             for row in filtered_data:
-                hour_int = None
-                
-                # Try column G 'Time' first (integer format like 1422, 23, 1513)
-                time_val = get_column_value(row, time_columns)
-                if time_val is not None:
-                    try:
-                        time_int = int(time_val)
-                        # Extract hour: 1422 -> 14, 23 -> 0, 148 -> 1, 1513 -> 15
-                        if time_int >= 100:
-                            hour_int = time_int // 100
-                        else:
-                            hour_int = 0  # Values like 23, 33 are in the first hour (00:xx)
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Fallback to TIME 24HRS column if Time column failed
-                if hour_int is None:
-                    time_24 = get_column_value(row, time_24_columns)
-                    if time_24:
-                        try:
-                            # Handle datetime strings like '1900-01-01 14:22:00'
-                            time_str = str(time_24)
-                            if ' ' in time_str:
-                                time_str = time_str.split(' ')[1]
-                            
-                            # Extract hour from time string
-                            if ':' in time_str:
-                                hour = time_str.split(':')[0]
-                                hour_int = int(hour)
-                        except (ValueError, AttributeError, IndexError):
-                            pass
+                hour_int = get_hour(row, schema)
                 
                 # Add to hourly data if we successfully extracted an hour
                 if hour_int is not None and 0 <= hour_int <= 23:
                     if data_mode == 'revenue':
-                        value = safe_float(get_column_value(row, income_columns))
+                        value = safe_float(row.get(income_key))
                     else:  # tickets
                         value = 1
                     hourly_data[f"{hour_int:02d}:00"] += value
@@ -363,76 +364,344 @@ def process_chart_data(data, chart_type, data_mode='revenue', time_mode='daily',
             sorted_hours = sorted(hourly_data.items(), key=lambda x: x[0])
             return dict(sorted_hours)
         
-        return {}
+        # Chart 5: By Form of Payment
+        elif chart_type == 'by_fop':
+            fop_data = defaultdict(float)
+            for row in filtered_data:
+                fop = row.get(fop_key)
+                if fop is None:
+                    fop = 'Unknown'
+                if data_mode == 'revenue':
+                    value = safe_float(row.get(income_key))
+                else:  # tickets
+                    value = 1
+                fop_data[str(fop)] += value
+            
+            return dict(sorted(fop_data.items(), key=lambda x: x[1], reverse=True))
         
+        return {}
+    
     except Exception as e:
         print(f"Error processing chart data: {e}")
         import traceback
         traceback.print_exc()
         return {}
 
-@charts_bp.route('/charts/generate/<chart_id>')
-def generate_single_chart(chart_id):
-    """Generate a single chart with specific configuration"""
+def has_sales_transactions(dataset_id):
+    """Check whether a dataset was ingested into the sales_transactions table"""
+    return db.session.query(SalesTransaction.id).filter_by(dataset_id=dataset_id).first() is not None
+
+def query_chart_data(dataset_id, chart_type, data_mode='revenue', time_mode='daily', start_date=None, end_date=None):
+    """
+    Same output as process_chart_data, but filtered and grouped in the database
+    from the SalesTransaction rows of a dataset. Rows stored without a sale date
+    (not YYYY-MM-DD in the sheet) are left out of by_report and of date ranges,
+    like SalesFrame.chart_data.
+    """
     try:
-        # Get parameters
-        data_mode = request.args.get('data_mode', 'revenue')  # 'revenue' or 'tickets'
-        time_mode = request.args.get('time_mode', 'daily')  # 'daily' or 'monthly' (for by_report only)
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+        if data_mode == 'revenue':
+            measure = db.func.sum(SalesTransaction.income)
+        else:  # tickets
+            measure = db.func.count(SalesTransaction.id)
+        
+        group_columns = {
+            'by_report': SalesTransaction.sale_date,
+            'by_agent': SalesTransaction.agent,
+            'by_days': SalesTransaction.day_name,
+            'by_hours': SalesTransaction.hour,
+            'by_fop': SalesTransaction.fop
+        }
+        group_column = group_columns.get(chart_type)
+        if group_column is None:
+            return {}
         
-        # Get active sales data
-        active_data = SalesData.query.filter_by(is_active=True).first()
-        if not active_data:
-            return jsonify({'error': 'No active sales data found'}), 404
+        query = db.session.query(group_column, measure).filter(SalesTransaction.dataset_id == dataset_id)
+        if start_date:
+            query = query.filter(SalesTransaction.sale_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        if end_date:
+            query = query.filter(SalesTransaction.sale_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+        if chart_type not in ('by_agent', 'by_fop'):
+            query = query.filter(group_column.isnot(None))
+        rows = query.group_by(group_column).all()
         
-        data = active_data.get_data()
-        if not data:
-            return jsonify({'error': 'No data available for chart generation'}), 404
+        if chart_type == 'by_report':
+            time_data = defaultdict(float)
+            for sale_date, value in rows:
+                time_data[period_label(sale_date, time_mode)] += float(value or 0)
+            return dict(sorted(time_data.items(), key=lambda x: x[0]))
         
-        # Process data for the specific chart
-        chart_data = process_chart_data(data, chart_id, data_mode, time_mode, start_date, end_date)
+        elif chart_type == 'by_agent':
+            agent_data = defaultdict(float)
+            for agent, value in rows:
+                agent_data[agent if agent is not None else 'Unknown'] += float(value or 0)
+            sorted_agents = sorted(agent_data.items(), key=lambda x: x[1], reverse=True)[:10]
+            return dict(sorted_agents)
         
-        if not chart_data:
-            return jsonify({'error': 'Unable to process data for chart'}), 500
+        elif chart_type == 'by_days':
+            days_data = {day_name: float(value or 0) for day_name, value in rows}
+            return {day: days_data.get(day, 0) for day in DAYS_ORDER}
         
-        # Determine chart title and type
-        titles = {
-            'by_report': f'Sales Report - {"Monthly" if time_mode == "monthly" else "Daily"} Trend',
-            'by_agent': 'Sales by Agent',
-            'by_days': 'Sales by Day of Week',
-            'by_hours': 'Sales by Hour of Day'
-        }
+        elif chart_type == 'by_hours':
+            hourly_data = {f"{hour:02d}:00": float(value or 0) for hour, value in rows}
+            return dict(sorted(hourly_data.items(), key=lambda x: x[0]))
         
-        chart_types = {
-            'by_report': 'line',
-            'by_agent': 'bar',
-            'by_days': 'bar',
-            'by_hours': 'bar'
-        }
+        elif chart_type == 'by_fop':
+            fop_data = defaultdict(float)
+            for fop, value in rows:
+                fop_data[fop if fop is not None else 'Unknown'] += float(value or 0)
+            return dict(sorted(fop_data.items(), key=lambda x: x[1], reverse=True))
         
-        title = titles.get(chart_id, 'Chart')
-        chart_type = chart_types.get(chart_id, 'bar')
-        
-        # Generate SVG chart
-        svg_content = create_chart_svg(title, chart_data, chart_type, data_mode=data_mode)
-        
-        # Convert SVG to base64
-        svg_bytes = svg_content.encode('utf-8')
-        svg_base64 = base64.b64encode(svg_bytes).decode('utf-8')
-        
-        return jsonify({
-            'success': True,
-            'chart': {
-                'id': chart_id,
-                'title': title,
-                'image': svg_base64,
-                'type': 'svg',
-                'data_mode': data_mode,
-                'time_mode': time_mode if chart_id == 'by_report' else None
-            }
-        })
+        return {}
+    
+    except Exception as e:
+        print(f"Error querying chart data: {e}")
+        import traceback
+        traceback.print_exc()
+        return {}
+
+def get_active_chart_data(chart_id, data_mode, time_mode, start_date, end_date):
+    """
+    Chart data for the active dataset. Returns None when there is no active dataset.
+    Normally served from the worker's cached SalesFrame. If the frame would not fit
+    in the cache, datasets ingested into sales_transactions are aggregated in SQL and
+    older uploads fall back to the decoded JSON blob.
+    """
+    results = get_active_chart_windows(chart_id, data_mode, time_mode, [(start_date, end_date)])
+    return results[0][2] if results is not None else None
+
+def get_active_chart_windows(chart_id, data_mode, time_mode, windows):
+    """
+    Chart data of the active dataset for several date windows in one request.
+    windows: list of (start_date, end_date) YYYY-MM-DD strings (either may be None)
+    or ('last', days) entries from parse_date_windows, resolved against the latest sale.
+    Returns [(start_date, end_date, chart_data)], or None when there is no active dataset.
+    """
+    active_data = SalesData.query.filter_by(is_active=True).first()
+    if not active_data:
+        return None
+    
+    frame = get_sales_frame(active_data)
+    if any(window[0] == 'last' for window in windows):
+        latest = frame.latest_date() if frame is not None else get_latest_sale_date(active_data)
+        windows = [resolve_relative_window(window, latest) for window in windows]
+    
+    if frame is not None:
+        # One bisect slice per window over the date-sorted frame
+        chart_windows = frame.chart_windows(chart_id, data_mode, time_mode, windows)
+    elif has_sales_transactions(active_data.id):
+        chart_windows = [query_chart_data(active_data.id, chart_id, data_mode, time_mode, start_date, end_date)
+                         for start_date, end_date in windows]
+    else:
+        dataset = get_cached_dataset(active_data)
+        chart_windows = [process_chart_data(dataset.data, chart_id, data_mode, time_mode, start_date, end_date, dataset.schema)
+                         if dataset.data else {} for start_date, end_date in windows]
+    
+    return [(start_date, end_date, chart_data) for (start_date, end_date), chart_data in zip(windows, chart_windows)]
+
+def parse_date_windows(spec):
+    """
+    Parse windows=START:END,START:END,7d,30d into a list of windows.
+    Either side of START:END may be empty; Nd means the last N days up to the
+    latest sale in the dataset. Raises ValueError on anything else.
+    """
+    windows = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        relative = RELATIVE_WINDOW.match(part)
+        if relative:
+            days = int(relative.group(1))
+            if days < 1:
+                raise ValueError(f'Invalid window: {part}')
+            windows.append(('last', days))
+            continue
+        if ':' not in part:
+            raise ValueError(f'Invalid window: {part}')
+        start_date, end_date = [bound.strip() or None for bound in part.split(':', 1)]
+        for bound in (start_date, end_date):
+            if bound:
+                datetime.strptime(bound, '%Y-%m-%d')
+        windows.append((start_date, end_date))
+    if not windows:
+        raise ValueError('No windows given')
+    return windows
+
+def resolve_relative_window(window, latest_date):
+    """Turn ('last', days) into (start_date, end_date) strings ending at latest_date"""
+    if window[0] != 'last':
+        return window
+    if latest_date is None:
+        return (None, None)
+    start = latest_date - timedelta(days=window[1] - 1)
+    return (start.strftime('%Y-%m-%d'), latest_date.strftime('%Y-%m-%d'))
+
+def get_latest_sale_date(active_data):
+    """Latest sale date of a dataset when no SalesFrame is available"""
+    if has_sales_transactions(active_data.id):
+        return db.session.query(func.max(SalesTransaction.sale_date)).filter(
+            SalesTransaction.dataset_id == active_data.id
+        ).scalar()
+    dates = [record[0] for record in get_cached_dataset(active_data).records if record[0]]
+    return max(dates) if dates else None
+
+def load_sales_records(active_data, start_date=None, end_date=None):
+    """
+    Normalized (sale_date, hour, day_name, agent, fop, income) records of a
+    SalesData row. Date bounds are datetime.date values; for indexed datasets
+    they are applied in SQL.
+    """
+    if has_sales_transactions(active_data.id):
+        query = db.session.query(
+            SalesTransaction.sale_date,
+            SalesTransaction.hour,
+            SalesTransaction.day_name,
+            SalesTransaction.agent,
+            SalesTransaction.fop,
+            SalesTransaction.income
+        ).filter(SalesTransaction.dataset_id == active_data.id)
+        if start_date:
+            query = query.filter(SalesTransaction.sale_date >= start_date)
+        if end_date:
+            query = query.filter(SalesTransaction.sale_date <= end_date)
+        return query.all()
+    
+    return get_cached_dataset(active_data).records
+
+def has_rollup_cells(dataset_id):
+    """Check whether a rollup cube was stored for a dataset at upload time"""
+    return db.session.query(SalesRollupCell.id).filter_by(dataset_id=dataset_id).first() is not None
+
+def load_rollup_cells(dataset_id):
+    """Stored rollup cube of a dataset as tuples laid out as ROLLUP_FIELDS"""
+    return db.session.query(
+        SalesRollupCell.sale_date,
+        SalesRollupCell.hour,
+        SalesRollupCell.day_name,
+        SalesRollupCell.agent,
+        SalesRollupCell.fop,
+        SalesRollupCell.revenue,
+        SalesRollupCell.tickets,
+        SalesRollupCell.first_row
+    ).filter(SalesRollupCell.dataset_id == dataset_id).order_by(SalesRollupCell.first_row).all()
+
+def get_sales_frame(active_data):
+    """
+    NumPy frame of a dataset's rollup cube, built at most once per worker per
+    dataset version. Uses the cube stored at upload time; datasets uploaded
+    before cubes existed are rolled up from their records in memory.
+    Returns None if the frame would exceed the cache's memory cap.
+    """
+    key = ('cube', active_data.id, active_data.upload_date)
+    stored = has_rollup_cells(active_data.id)
+    if not sales_cache.contains(key):
+        if stored:
+            row_count = SalesRollupCell.query.filter_by(dataset_id=active_data.id).count()
+        elif has_sales_transactions(active_data.id):
+            row_count = SalesTransaction.query.filter_by(dataset_id=active_data.id).count()
+        else:
+            row_count = len(get_cached_dataset(active_data).records)
+        if row_count * FRAME_ROW_BYTES > sales_cache.max_bytes():
+            return None
+    
+    def load():
+        if stored:
+            return SalesFrame.from_cells(load_rollup_cells(active_data.id))
+        return SalesFrame.from_records(load_sales_records(active_data))
+    return sales_cache.get(key, load)
+
+def cached_chart_response(params, build):
+    """
+    Serve a chart endpoint's JSON from chart_response_cache.
+    params are the request parameters the response depends on; the key also
+    includes the active dataset version. build() returns (payload, status) and
+    only runs on a miss; error responses are not cached. Responses carry a
+    strong ETag so a reload with If-None-Match gets 304 Not Modified.
+    """
+    active_data = SalesData.query.filter_by(is_active=True).first()
+    if not active_data:
+        return jsonify({'error': 'No active sales data found'}), 404
+    
+    key = params + (active_data.id, active_data.upload_date)
+    entry = chart_response_cache.lookup(key)
+    if entry is None:
+        payload, status = build()
+        if status != 200:
+            return jsonify(payload), status
+        entry = chart_response_cache.store(key, CachedResponse(current_app.json.dumps(payload)))
+    
+    response = current_app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.cache_control.no_cache = True  # Always revalidate, cheap thanks to the ETag
+    return response.make_conditional(request)
+
+def build_chart_data_payload(chart_id, chart_data, data_mode, time_mode):
+    """Labels, values and statistics of a chart for frontend rendering"""
+    values = list(chart_data.values()) if chart_data else []
+    total = sum(values)
+    avg = total / len(values) if values else 0
+    
+    return {
+        'chart_id': chart_id,
+        'data_mode': data_mode,
+        'time_mode': time_mode if chart_id == 'by_report' else None,
+        'labels': list(chart_data.keys()),
+        'data': values,
+        'values': values,
+        'statistics': {
+            'total': total,
+            'average': avg,
+            'max': max(values) if values else 0,
+            'min': min(values) if values else 0,
+            'count': len(values)
+        }
+    }
+
+def render_chart_image(title, chart_data, chart_type, data_mode):
+    """Render a chart as a base64-encoded SVG"""
+    svg_content = create_chart_svg(title, chart_data, chart_type, data_mode=data_mode)
+    return base64.b64encode(svg_content.encode('utf-8')).decode('utf-8')
+
+@charts_bp.route('/charts/generate/<chart_id>')
+def generate_single_chart(chart_id):
+    """Generate a single chart with specific configuration"""
+    try:
+        # Get parameters
+        data_mode = request.args.get('data_mode', 'revenue')  # 'revenue' or 'tickets'
+        time_mode = request.args.get('time_mode', 'daily')  # 'daily', 'weekly', 'monthly' or 'quarterly' (for by_report only)
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
         
+        def build():
+            # Process data for the specific chart from the active sales data
+            chart_data = get_active_chart_data(chart_id, data_mode, time_mode, start_date, end_date)
+            if chart_data is None:
+                return {'error': 'No active sales data found'}, 404
+            
+            if not chart_data:
+                return {'error': 'Unable to process data for chart'}, 500
+            
+            # Determine chart title and type
+            title = get_chart_title(chart_id, time_mode)
+            chart_type = get_chart_type(chart_id)
+            
+            # Generate SVG chart and convert it to base64
+            svg_base64 = render_chart_image(title, chart_data, chart_type, data_mode)
+            
+            return {
+                'success': True,
+                'chart': {
+                    'id': chart_id,
+                    'title': title,
+                    'image': svg_base64,
+                    'type': 'svg',
+                    'data_mode': data_mode,
+                    'time_mode': time_mode if chart_id == 'by_report' else None
+                }
+            }, 200
+        
+        return cached_chart_response(('generate', chart_id, data_mode, time_mode, start_date, end_date), build)
+    
     except Exception as e:
         print(f"Error generating chart: {e}")
         import traceback
@@ -447,7 +716,7 @@ def get_chart_options():
             {
                 'id': 'by_report',
                 'title': 'Sales by Report Period',
-                'description': 'Daily or monthly sales trends',
+                'description': 'Daily, weekly, monthly or quarterly sales trends',
                 'supports_time_mode': True
             },
             {
@@ -464,56 +733,140 @@ def get_chart_options():
                 'id': 'by_hours',
                 'title': 'Sales by Hour',
                 'description': 'Hourly sales patterns'
+            },
+            {
+                'id': 'by_fop',
+                'title': 'Sales by Form of Payment',
+                'description': 'Payment mix (cash, card, invoice, ...)'
             }
         ],
         'data_modes': ['revenue', 'tickets'],
-        'time_modes': ['daily', 'monthly']
+        'time_modes': list(TIME_MODES)
     })
 
 @charts_bp.route('/charts/data/<chart_id>')
 def get_chart_data(chart_id):
-    """Get raw chart data for frontend rendering"""
+    """
+    Get raw chart data for frontend rendering.
+    windows=START:END,...,7d,30d returns one payload per date window instead,
+    e.g. for period-over-period comparisons.
+    """
     try:
         # Get parameters
         data_mode = request.args.get('data_mode', 'revenue')
         time_mode = request.args.get('time_mode', 'daily')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        windows_spec = request.args.get('windows')
+        
+        windows = None
+        if windows_spec:
+            try:
+                windows = parse_date_windows(windows_spec)
+            except ValueError as e:
+                return jsonify({'error': f'{e}. Use START:END (YYYY-MM-DD) or Nd, comma separated'}), 400
+        
+        def build():
+            if windows:
+                results = get_active_chart_windows(chart_id, data_mode, time_mode, windows)
+                if results is None:
+                    return {'error': 'No active sales data found'}, 404
+                
+                payloads = []
+                for window_start, window_end, chart_data in results:
+                    payload = build_chart_data_payload(chart_id, chart_data, data_mode, time_mode)
+                    payload['start_date'] = window_start
+                    payload['end_date'] = window_end
+                    payloads.append(payload)
+                
+                return {
+                    'success': True,
+                    'chart_id': chart_id,
+                    'data_mode': data_mode,
+                    'time_mode': time_mode if chart_id == 'by_report' else None,
+                    'windows': payloads
+                }, 200
+            
+            # Process data for the specific chart from the active sales data
+            chart_data = get_active_chart_data(chart_id, data_mode, time_mode, start_date, end_date)
+            if chart_data is None:
+                return {'error': 'No active sales data found'}, 404
+            
+            payload = build_chart_data_payload(chart_id, chart_data, data_mode, time_mode)
+            payload['success'] = True
+            return payload, 200
         
-        # Get active sales data
-        active_data = SalesData.query.filter_by(is_active=True).first()
-        if not active_data:
-            return jsonify({'error': 'No active sales data found'}), 404
-        
-        data = active_data.get_data()
-        if not data:
-            return jsonify({'error': 'No data available'}), 404
-        
-        # Process data for the specific chart
-        chart_data = process_chart_data(data, chart_id, data_mode, time_mode, start_date, end_date)
-        
-        # Calculate statistics
-        values = list(chart_data.values()) if chart_data else []
-        total = sum(values)
-        avg = total / len(values) if values else 0
-        
-        return jsonify({
-            'success': True,
-            'chart_id': chart_id,
-            'data_mode': data_mode,
-            'time_mode': time_mode if chart_id == 'by_report' else None,
-            'labels': list(chart_data.keys()),
-            'data': values,
-            'values': values,
-            'statistics': {
-                'total': total,
-                'average': avg,
-                'max': max(values) if values else 0,
-                'min': min(values) if values else 0,
-                'count': len(values)
-            }
-        })
-        
+        return cached_chart_response(('data', chart_id, data_mode, time_mode, start_date, end_date, windows_spec), build)
+    
     except Exception as e:
         print(f"Error getting chart data: {e}")
         return jsonify({'error': str(e)}), 500
+
+@charts_bp.route('/charts/batch')
+def get_chart_batch():
+    """
+    Get several charts in one request, in both revenue and tickets modes.
+    Answered from the active dataset's rollup cube, or from a single pass
+    over its records when the cube does not fit in the cache.
+    Query: charts=by_report,by_agent,... time_mode, start_date, end_date,
+    images=1 to also include the SVG image for each mode.
+    """
+    try:
+        chart_ids = [c.strip() for c in request.args.get('charts', ','.join(DEFAULT_BATCH_CHARTS)).split(',') if c.strip()]
+        unknown = [c for c in chart_ids if c not in CHART_GROUPINGS]
+        if unknown:
+            return jsonify({'error': f'Unknown chart id(s): {", ".join(unknown)}'}), 400
+        
+        time_mode = request.args.get('time_mode', 'daily')
+        include_images = request.args.get('images', '').lower() in ('1', 'true', 'yes')
+        try:
+            start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+            end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+        
+        def build():
+            active_data = SalesData.query.filter_by(is_active=True).first()
+            if not active_data:
+                return {'error': 'No active sales data found'}, 404
+            
+            frame = get_sales_frame(active_data)
+            totals = None
+            if frame is None:
+                # Cube too large for the cache: single pass over the records instead
+                records = load_sales_records(active_data, start_date, end_date)
+                groupings = set(chart_grouping(chart_id, time_mode) for chart_id in chart_ids)
+                totals = aggregate_sales(records, groupings, start_date, end_date)
+            
+            charts = {}
+            for chart_id in chart_ids:
+                grouping = chart_grouping(chart_id, time_mode)
+                title = get_chart_title(chart_id, time_mode)
+                chart = {
+                    'id': chart_id,
+                    'title': title,
+                    'type': get_chart_type(chart_id),
+                    'time_mode': time_mode if chart_id == 'by_report' else None
+                }
+                for data_mode in ('revenue', 'tickets'):
+                    if frame is not None:
+                        chart_data = frame.chart_data(chart_id, data_mode, time_mode, start_date, end_date)
+                    else:
+                        chart_data = format_grouping(grouping, totals[grouping], data_mode)
+                    chart[data_mode] = build_chart_data_payload(chart_id, chart_data, data_mode, time_mode)
+                    if include_images:
+                        chart[data_mode]['image'] = render_chart_image(title, chart_data, chart['type'], data_mode)
+                charts[chart_id] = chart
+            
+            return {
+                'success': True,
+                'charts': charts
+            }, 200
+        
+        return cached_chart_response(('batch', tuple(chart_ids), time_mode, start_date, end_date, include_images), build)
+    
+    except Exception as e:
+        print(f"Error getting chart batch: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
@@ -1,8 +1,21 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db
-from src.models.flight_load import FlightLoadRecord
+from src.models.flight_load import FlightLoadView, FlightLoadRollup, FlightLoadSnapshot
+from src.services.excel_ingest import open_workbook, iter_table
+from src.services.upload_jobs import upload_jobs, wants_async_upload, UploadError
+from src.services.flight_load_store import upsert_forecast_records, filter_flight_loads, flight_totals, flight_load_stats
+from src.services.flight_load_view import sync_flight_view
+from src.services.network import station_flights
+from src.services.flight_load_rollups import ROLLUP_PERIODS, sync_rollups, period_start
+from src.services.flight_load_accuracy import sync_accuracy, accuracy_metrics
+from src.services.flight_load_snapshots import ensure_baseline_snapshot, record_snapshot, resolve_snapshot, forecast_as_of, snapshot_changes, cell_history
+from src.services.flight_load_simulation import AIRCRAFT_CONFIGS, load_history, simulate_scenarios
+from src.services.sales_aggregation import period_label
+import numpy as np
 import pandas as pd
-from io import BytesIO
+import base64
+import time
+from sqlalchemy import tuple_
 from datetime import datetime
 from collections import defaultdict
 
@@ -64,70 +77,123 @@ def parse_date(value):
     
     return None
 
+# Fields of one flight block, in sheet column order: FLT, DATE, DAY, C CAP, Y CAP, TOT CAP, PAX C, PAX Y, PAX, LF C, LF Y, LF
+BLOCK_FIELDS = ('flight_no', 'travel_date', 'day', 'c_cap', 'y_cap', 'tot_cap', 'pax_c', 'pax_y', 'pax', 'lf_c', 'lf_y', 'lf')
+INT_FIELDS = ('c_cap', 'y_cap', 'tot_cap', 'pax_c', 'pax_y', 'pax')
+LF_FIELDS = ('lf_c', 'lf_y', 'lf')
+
+# A block starts at a flight number header directly followed by a date header
+FLIGHT_HEADERS = ('FLT', 'FLT NO', 'FLIGHT', 'FLIGHT NO', 'FLIGHT NUMBER')
+DATE_HEADERS = ('DATE', 'TRAVEL DATE', 'FLIGHT DATE')
+
+# Inbound (ET620) in columns 0-11 and outbound (ET621) in columns 14-25 of the standard sheet
+DEFAULT_BLOCK_STARTS = (0, 14)
+
+# infer_dtype kinds of columns without text cells
+NUMERIC_KINDS = ('empty', 'integer', 'floating', 'mixed-integer-float', 'boolean', 'decimal')
+
+# String date formats parse_date accepts, in order of preference (the time part is split off first)
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y')
+
+def find_flight_blocks(headers):
+    """
+    Start column of the inbound and outbound blocks, found from the header names so
+    a shifted sheet still parses. Falls back to DEFAULT_BLOCK_STARTS when fewer
+    than two blocks are found.
+    """
+    names = [str(header).strip().upper() if header is not None else '' for header in headers]
+    starts = [
+        i for i in range(len(names) - 1)
+        if names[i] in FLIGHT_HEADERS and names[i + 1] in DATE_HEADERS
+    ]
+    if len(starts) < 2:
+        print(f"Flight blocks not found in headers {names}, using columns {DEFAULT_BLOCK_STARTS}")
+        return DEFAULT_BLOCK_STARTS
+    return tuple(starts[:2])
+
+def parse_date_column(values):
+    """Column-wise parse_date: YYYY-MM-DD strings, None where a value isn't a date"""
+    is_datetime = values.map(lambda value: isinstance(value, (datetime, pd.Timestamp)))
+    dates = pd.to_datetime(values.where(is_datetime), errors='coerce')
+    
+    is_text = values.map(type) == str
+    if is_text.any():
+        text = values.where(is_text).str.strip().str.split(' ').str[0]
+        for fmt in DATE_FORMATS:
+            dates = dates.fillna(pd.to_datetime(text, format=fmt, errors='coerce'))
+    
+    return dates.dt.strftime('%Y-%m-%d').where(dates.notna(), None)
+
+def numeric_column(values):
+    """Column-wise safe_float: non-numeric cells ('X', 'N/A', blanks, ...) become 0"""
+    if pd.api.types.infer_dtype(values, skipna=True) in NUMERIC_KINDS:
+        numbers = pd.to_numeric(values, errors='coerce')
+        return numbers.where(np.isfinite(numbers), 0.0)
+    
+    is_text = values.map(type) == str
+    numbers = pd.to_numeric(values.where(~is_text), errors='coerce')
+    if is_text.any():
+        # Numbers typed as text: float() rounds exactly, pandas' string parser may differ in the last bit
+        numbers[is_text] = values[is_text].map(safe_float)
+    return numbers.where(np.isfinite(numbers), 0.0)
+
+def format_flight_no(value):
+    return str(int(value)) if isinstance(value, (int, float)) else str(value)
+
+def parse_flight_block(frame, start):
+    """Records of one flight block (12 columns from start) of the sheet frame"""
+    block = frame.iloc[:, start:start + len(BLOCK_FIELDS)]
+    block.columns = BLOCK_FIELDS
+    
+    travel_dates = parse_date_column(block['travel_date'])
+    valid = block['flight_no'].notna() & block['travel_date'].notna() & travel_dates.notna()
+    block = block[valid]
+    
+    records = pd.DataFrame({
+        'flight_no': block['flight_no'].map(format_flight_no),
+        'travel_date': travel_dates[valid],
+        'day': block['day'].map(str).where(block['day'].notna(), '')
+    })
+    for field in INT_FIELDS:
+        records[field] = numeric_column(block[field]).astype('int64')
+    for field in LF_FIELDS:
+        # Load factors stored as fractions (0.85) are scaled to percent (85.0)
+        values = numeric_column(block[field])
+        records[field] = values.where(values > 1, values * 100)
+    
+    # Column lists hold plain Python ints / floats, much cheaper than to_dict('records')
+    columns = [records[field].tolist() for field in BLOCK_FIELDS]
+    return [dict(zip(BLOCK_FIELDS, values)) for values in zip(*columns)]
+
 def process_flight_load_excel(file_content, filename):
-    """Process Flight Load Excel file using pandas"""
+    """Process Flight Load Excel file column-wise: each flight block is parsed as a whole frame"""
     try:
-        # Read Excel file with pandas
-        xlsx = pd.ExcelFile(BytesIO(file_content))
-        
-        if not xlsx.sheet_names:
-            raise ValueError("No sheets found in Excel file")
+        workbook = open_workbook(file_content)
         
-        # Use first sheet
-        sheet_name = xlsx.sheet_names[0]
-        df = pd.read_excel(xlsx, sheet_name=sheet_name)
+        try:
+            if not workbook.sheetnames:
+                raise ValueError("No sheets found in Excel file")
+            
+            # Use first sheet; object dtype keeps cells exactly as openpyxl read them
+            sheet_name = workbook.sheetnames[0]
+            headers, rows = iter_table(workbook[sheet_name])
+            frame = pd.DataFrame(list(rows), dtype=object)
+        finally:
+            workbook.close()
         
         print(f"Processing sheet: {sheet_name}")
-        print(f"Columns: {list(df.columns)}")
-        print(f"Total rows: {len(df)}")
+        print(f"Columns: {list(headers)}")
+        
+        # Pad with empty columns so both blocks are complete even on a short sheet
+        block_starts = find_flight_blocks(headers)
+        frame = frame.reindex(columns=range(max(frame.shape[1], max(block_starts) + len(BLOCK_FIELDS))))
         
         processed_data = {
-            'inbound': [],   # Flight 620: ADD to KWI
-            'outbound': []   # Flight 621: KWI to ADD
+            'inbound': parse_flight_block(frame, block_starts[0]),   # Flight 620: ADD to KWI
+            'outbound': parse_flight_block(frame, block_starts[1])   # Flight 621: KWI to ADD
         }
         
-        # Process each row
-        for idx, row in df.iterrows():
-            # Process inbound flight (ET620) - columns 0-11
-            if pd.notna(row.iloc[0]) and pd.notna(row.iloc[1]):
-                travel_date = parse_date(row.iloc[1])
-                if travel_date:
-                    inbound_record = {
-                        'flight_no': str(int(row.iloc[0])) if isinstance(row.iloc[0], (int, float)) else str(row.iloc[0]),
-                        'travel_date': travel_date,
-                        'day': str(row.iloc[2]) if pd.notna(row.iloc[2]) else '',
-                        'c_cap': safe_int(row.iloc[3]),
-                        'y_cap': safe_int(row.iloc[4]),
-                        'tot_cap': safe_int(row.iloc[5]),
-                        'pax_c': safe_int(row.iloc[6]),
-                        'pax_y': safe_int(row.iloc[7]),
-                        'pax': safe_int(row.iloc[8]),
-                        'lf_c': safe_float(row.iloc[9]) * 100 if safe_float(row.iloc[9]) <= 1 else safe_float(row.iloc[9]),
-                        'lf_y': safe_float(row.iloc[10]) * 100 if safe_float(row.iloc[10]) <= 1 else safe_float(row.iloc[10]),
-                        'lf': safe_float(row.iloc[11]) * 100 if safe_float(row.iloc[11]) <= 1 else safe_float(row.iloc[11])
-                    }
-                    processed_data['inbound'].append(inbound_record)
-            
-            # Process outbound flight (ET621) - columns 14-25
-            if len(row) > 14 and pd.notna(row.iloc[14]) and pd.notna(row.iloc[15]):
-                travel_date = parse_date(row.iloc[15])
-                if travel_date:
-                    outbound_record = {
-                        'flight_no': str(int(row.iloc[14])) if isinstance(row.iloc[14], (int, float)) else str(row.iloc[14]),
-                        'travel_date': travel_date,
-                        'day': str(row.iloc[16]) if pd.notna(row.iloc[16]) else '',
-                        'c_cap': safe_int(row.iloc[17]),
-                        'y_cap': safe_int(row.iloc[18]),
-                        'tot_cap': safe_int(row.iloc[19]),
-                        'pax_c': safe_int(row.iloc[20]),
-                        'pax_y': safe_int(row.iloc[21]),
-                        'pax': safe_int(row.iloc[22]),
-                        'lf_c': safe_float(row.iloc[23]) * 100 if safe_float(row.iloc[23]) <= 1 else safe_float(row.iloc[23]),
-                        'lf_y': safe_float(row.iloc[24]) * 100 if safe_float(row.iloc[24]) <= 1 else safe_float(row.iloc[24]),
-                        'lf': safe_float(row.iloc[25]) * 100 if safe_float(row.iloc[25]) <= 1 else safe_float(row.iloc[25])
-                    }
-                    processed_data['outbound'].append(outbound_record)
-        
+        print(f"Total rows: {len(frame)}")
         print(f"Processed {len(processed_data['inbound'])} inbound records")
         print(f"Processed {len(processed_data['outbound'])} outbound records")
         
@@ -139,9 +205,43 @@ def process_flight_load_excel(file_content, filename):
         traceback.print_exc()
         raise e
 
+def save_flight_load_upload(processed_data, filename=None, uploaded_by=None):
+    """
+    Upsert parsed forecast records (manifest actuals are kept), store the cells
+    that changed as a new forecast snapshot and return the upload summary
+    """
+    if not processed_data['inbound'] and not processed_data['outbound']:
+        raise UploadError('No valid flight load data found in Excel file')
+    
+    start = time.perf_counter()
+    records = processed_data['inbound'] + processed_data['outbound']
+    ensure_baseline_snapshot()
+    counts = upsert_forecast_records(records)
+    snapshot = record_snapshot(counts['changed'], len(records), filename, uploaded_by)
+    sync_flight_view(counts['dates'])
+    sync_rollups(counts['dates'])
+    sync_accuracy(counts['dates'])
+    db.session.commit()
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    
+    return {
+        'success': True,
+        'message': f'Load Factor data uploaded successfully',
+        'records_saved': counts['inserted'],
+        'records_updated': counts['updated'],
+        'records_inserted': counts['inserted'],
+        'records_skipped': counts['skipped'],
+        'skipped_manifest': counts['skipped_manifest'],
+        'records_unchanged': counts['unchanged'],
+        'snapshot_id': snapshot.id,
+        'total_inbound': len(processed_data['inbound']),
+        'total_outbound': len(processed_data['outbound']),
+        'elapsed_ms': elapsed_ms
+    }
+
 @flight_load_bp.route('/upload', methods=['POST'])
 def upload_flight_load():
-    """Handle Load Factor Excel file upload - Forecast Data"""
+    """Handle Load Factor Excel file upload - Forecast Data. With ?async=1 returns a job id to poll at /api/jobs/<id>"""
     
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -156,58 +256,23 @@ def upload_flight_load():
     try:
         # Read file content
         file_content = file.read()
+        uploaded_by = session.get('admin_username', 'admin')
+        
+        if wants_async_upload():
+            job = upload_jobs.submit('flight_load', file.filename, process_flight_load_excel,
+                                     (file_content, file.filename), save_flight_load_upload,
+                                     {'filename': file.filename, 'uploaded_by': uploaded_by},
+                                     submitted_by=session.get('admin_username'))
+            return jsonify(job.to_dict()), 202
         
         # Process Excel file
         processed_data = process_flight_load_excel(file_content, file.filename)
         
-        if not processed_data['inbound'] and not processed_data['outbound']:
-            return jsonify({'error': 'No valid flight load data found in Excel file'}), 400
-        
-        all_records = processed_data['inbound'] + processed_data['outbound']
-        records_saved = 0
-        records_updated = 0
-        
-        for record in all_records:
-            try:
-                travel_date = datetime.strptime(record['travel_date'], '%Y-%m-%d').date()
-                flight_no = record['flight_no']
-                
-                # Check if record exists
-                existing_record = FlightLoadRecord.query.filter_by(
-                    travel_date=travel_date,
-                    flight_no=flight_no
-                ).first()
-                
-                if existing_record:
-                    # Update existing record (unless it's from manifest)
-                    if existing_record.data_source != 'manifest':
-                        existing_record.update_from_dict(record)
-                        existing_record.data_source = 'forecast'
-                        records_updated += 1
-                else:
-                    # Create new record
-                    new_record = FlightLoadRecord(
-                        travel_date=travel_date,
-                        flight_no=flight_no,
-                        data_source='forecast'
-                    )
-                    new_record.update_from_dict(record)
-                    db.session.add(new_record)
-                    records_saved += 1
-            except Exception as e:
-                print(f"Error saving record: {e}")
-                continue
-        
-        db.session.commit()
+        return jsonify(save_flight_load_upload(processed_data, file.filename, uploaded_by))
         
-        return jsonify({
-            'success': True,
-            'message': f'Load Factor data uploaded successfully',
-            'records_saved': records_saved,
-            'records_updated': records_updated,
-            'total_inbound': len(processed_data['inbound']),
-            'total_outbound': len(processed_data['outbound'])
-        })
+    except UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
         
     except Exception as e:
         db.session.rollback()
@@ -220,55 +285,130 @@ def upload_excel():
     """Alias for upload endpoint"""
     return upload_flight_load()
 
+def date_arg(name):
+    """Optional YYYY-MM-DD query parameter as a date (ValueError if malformed)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Invalid {name}: {value} (expected YYYY-MM-DD)')
+
+# Fields of a /data record -> (FlightLoadView columns they are built from, builder)
+DATA_FIELDS = {
+    'date': (('travel_date',), lambda row: row.travel_date.strftime('%Y-%m-%d')),
+    'flight': (('flight_no',), lambda row: f"ET{row.flight_no}"),
+    'capacity': (('tot_cap',), lambda row: row.tot_cap),
+    'forecast': (('forecast_pax',), lambda row: row.forecast_pax or 0),
+    'actual': (('actual_pax',), lambda row: row.actual_pax or 0),
+    'load_factor': (('lf',), lambda row: row.lf),
+    'data_source': (('data_source',), lambda row: row.data_source)
+}
+
+MAX_PAGE_SIZE = 5000
+
+def encode_cursor(travel_date, flight_no):
+    """Opaque keyset cursor: the (travel_date, flight_no) of the last row of a page"""
+    key = f"{travel_date.isoformat()}|{flight_no}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(travel_date, flight_no) of a cursor made by encode_cursor (ValueError if invalid)"""
+    try:
+        key = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date_str, flight_no = key.split('|', 1)
+        return datetime.strptime(date_str, '%Y-%m-%d').date(), flight_no
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def station_arg():
+    """Optional station=KWI query parameter (None for all stations)"""
+    station = request.args.get('station', '').strip().upper()
+    return station if station and station != 'ALL' else None
+
 @flight_load_bp.route('/data')
 def get_flight_load_data():
-    """Get flight load data with optional filters"""
+    """
+    Best-known flight load data (manifest actuals over forecasts) with optional
+    filters, newest first, read from the flight_load_view table. Totals are aggregated in SQL.
+    
+    limit=N returns one page and a next_cursor; pass cursor=... to get the
+    following (older) page. fields=date,flight,... picks the record fields and
+    format=columns returns parallel arrays instead of one dict per record.
+    station=KWI restricts the data to one station's flights.
+    """
     try:
         # Get filter parameters
-        start_date_str = request.args.get('start_date')
-        end_date_str = request.args.get('end_date')
+        start_date = date_arg('start_date')
+        end_date = date_arg('end_date')
+        station = station_arg()
         flight = request.args.get('flight', 'all')
         
-        query = FlightLoadRecord.query
+        # Handle ET620/ET621 format
+        flight_no = flight.replace('ET', '') if flight and flight != 'all' else None
         
-        if start_date_str:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(FlightLoadRecord.travel_date >= start_date)
+        fields = request.args.get('fields')
+        fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else list(DATA_FIELDS)
+        unknown = [f for f in fields if f not in DATA_FIELDS]
+        if unknown:
+            return jsonify({'error': f'Unknown fields: {", ".join(unknown)}', 'available_fields': list(DATA_FIELDS)}), 400
         
-        if end_date_str:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(FlightLoadRecord.travel_date <= end_date)
+        columnar = request.args.get('format') == 'columns'
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', type=int)
+        paged = limit is not None or cursor is not None
+        if paged:
+            limit = max(1, min(limit if limit is not None else MAX_PAGE_SIZE, MAX_PAGE_SIZE))
         
-        if flight and flight != 'all':
-            # Handle ET620/ET621 format
-            flight_no = flight.replace('ET', '')
-            query = query.filter(FlightLoadRecord.flight_no == flight_no)
-            
-        all_records = query.order_by(FlightLoadRecord.travel_date.desc()).all()
-        
-        records = []
-        for record in all_records:
-            records.append({
-                'date': record.travel_date.strftime('%Y-%m-%d'),
-                'flight': f"ET{record.flight_no}",
-                'capacity': record.tot_cap,
-                'forecast': record.pax if record.data_source == 'forecast' else 0,
-                'actual': record.pax if record.data_source == 'manifest' else 0,
-                'load_factor': record.lf,
-                'data_source': record.data_source
-            })
+        # Only the columns the requested fields need (plus the keyset), without building ORM objects
+        names = ['travel_date', 'flight_no']
+        for field in fields:
+            names += [name for name in DATA_FIELDS[field][0] if name not in names]
+        query = db.session.query(*[getattr(FlightLoadView, name) for name in names])
+        query = filter_flight_loads(query, start_date, end_date, flight_no, station=station)
+        
+        if cursor:
+            # Keyset: rows strictly after the cursor in (travel_date, flight_no) descending order
+            after_date, after_flight = decode_cursor(cursor)
+            query = query.filter(tuple_(FlightLoadView.travel_date, FlightLoadView.flight_no) < (after_date, after_flight))
+        
+        query = query.order_by(FlightLoadView.travel_date.desc(), FlightLoadView.flight_no.desc())
+        if paged:
+            rows = query.limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            rows = query.all()
+            has_more = False
+        
+        builders = [(field, DATA_FIELDS[field][1]) for field in fields]
         
         # Calculate stats
-        total_passengers = sum(r['actual'] or r['forecast'] for r in records)
-        avg_load_factor = sum(r['load_factor'] for r in records) / len(records) if records else 0
+        stats = flight_load_stats(start_date, end_date, flight_no, station)
         
-        return jsonify({
+        result = {
             'success': True,
-            'records': records,
-            'record_count': len(records),
-            'total_passengers': total_passengers,
-            'avg_load_factor': avg_load_factor
-        })
+            'record_count': stats['record_count'],
+            'total_passengers': stats['total_passengers'],
+            'avg_load_factor': stats['avg_load_factor']
+        }
+        
+        if columnar:
+            result['fields'] = fields
+            result['columns'] = {field: [build(row) for row in rows] for field, build in builders}
+        else:
+            result['records'] = [{field: build(row) for field, build in builders} for row in rows]
+        
+        if paged:
+            result['page_size'] = len(rows)
+            result['has_more'] = has_more
+            result['next_cursor'] = encode_cursor(rows[-1].travel_date, rows[-1].flight_no) if has_more else None
+        
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
         
     except Exception as e:
         import traceback
@@ -277,15 +417,20 @@ def get_flight_load_data():
 
 @flight_load_bp.route('/summary')
 def get_flight_load_summary():
-    """Get summary statistics for flight load data"""
+    """
+    Get summary statistics for flight load data, from a GROUP BY flight_no query
+    on the merged view. Inbound / outbound are the legs of the configured flight
+    pairs of one station (station=KWI) or of the whole network (default).
+    """
     try:
-        all_records = FlightLoadRecord.query.all()
-        
-        inbound = [r for r in all_records if r.flight_no == '620']
-        outbound = [r for r in all_records if r.flight_no == '621']
+        station = station_arg()
+        totals = flight_totals(date_arg('start_date'), date_arg('end_date'), station)
         
-        def calc_stats(records):
-            if not records:
+        def calc_stats(flight_numbers):
+            total_pax = sum(totals[f]['total_pax'] for f in flight_numbers if f in totals)
+            total_capacity = sum(totals[f]['total_capacity'] for f in flight_numbers if f in totals)
+            flights_count = sum(totals[f]['flights_count'] for f in flight_numbers if f in totals)
+            if not flights_count:
                 return {
                     'avg_lf': 0.0,
                     'total_pax': 0,
@@ -293,25 +438,268 @@ def get_flight_load_summary():
                     'flights_count': 0
                 }
             
-            total_pax = sum(r.pax for r in records)
-            total_capacity = sum(r.tot_cap for r in records)
             avg_lf = (total_pax / total_capacity) * 100 if total_capacity > 0 else 0.0
             
             return {
                 'avg_lf': round(avg_lf, 2),
                 'total_pax': total_pax,
                 'total_capacity': total_capacity,
-                'flights_count': len(records)
+                'flights_count': flights_count
             }
         
         return jsonify({
             'success': True,
+            'station': station or 'all',
             'summary': {
-                'inbound': calc_stats(inbound),
-                'outbound': calc_stats(outbound),
-                'combined': calc_stats(inbound + outbound)
+                'inbound': calc_stats(station_flights(station, 'inbound')),
+                'outbound': calc_stats(station_flights(station, 'outbound')),
+                'combined': calc_stats(station_flights(station))
             }
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@flight_load_bp.route('/rollups')
+def get_flight_load_rollups():
+    """
+    Weekly or monthly load totals per flight, read from the rollup table that
+    uploads keep up to date (one row per flight and period instead of per day).
+    
+    Query params: period=weekly|monthly (default monthly), station=KWI|all,
+    flight=ET620|ET621|all, start_date / end_date (YYYY-MM-DD; periods
+    overlapping the range are returned)
+    """
+    try:
+        period_type = request.args.get('period', 'monthly')
+        if period_type not in ROLLUP_PERIODS:
+            return jsonify({'error': f'Invalid period: {period_type} (expected weekly or monthly)'}), 400
+        
+        flight = request.args.get('flight', 'all')
+        flight_no = flight.replace('ET', '') if flight and flight != 'all' else None
+        start_date = date_arg('start_date')
+        end_date = date_arg('end_date')
+        
+        query = FlightLoadRollup.query.filter(FlightLoadRollup.period_type == period_type)
+        if start_date:
+            query = query.filter(FlightLoadRollup.period_start >= period_start(start_date, period_type))
+        if end_date:
+            query = query.filter(FlightLoadRollup.period_start <= end_date)
+        if flight_no:
+            query = query.filter(FlightLoadRollup.flight_no == flight_no)
+        station = station_arg()
+        if station:
+            query = query.filter(FlightLoadRollup.station == station)
+        
+        rollups = []
+        for rollup in query.order_by(FlightLoadRollup.period_start, FlightLoadRollup.flight_no):
+            data = rollup.to_dict()
+            data['period'] = period_label(rollup.period_start, period_type)
+            data['flight'] = f"ET{rollup.flight_no}"
+            rollups.append(data)
+        
+        return jsonify({
+            'success': True,
+            'period_type': period_type,
+            'rollups': rollups,
+            'count': len(rollups)
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@flight_load_bp.route('/accuracy')
+def get_flight_load_accuracy():
+    """
+    Forecast-vs-actual accuracy (MAPE, WAPE, MAE, bias) overall, per weekday and
+    per flight, from the error terms stored as manifests come in.
+    
+    Query params: start_date / end_date (YYYY-MM-DD), station=KWI|all, flight=ET620|ET621|all
+    """
+    try:
+        flight = request.args.get('flight', 'all')
+        flight_no = flight.replace('ET', '') if flight and flight != 'all' else None
+        start_date = date_arg('start_date')
+        end_date = date_arg('end_date')
+        
+        station = station_arg()
+        metrics = accuracy_metrics(start_date, end_date, flight_no, station)
+        
+        return jsonify({
+            'success': True,
+            'filters': {
+                'start_date': start_date.isoformat() if start_date else None,
+                'end_date': end_date.isoformat() if end_date else None,
+                'station': station or 'all',
+                'flight': flight
+            },
+            **metrics
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@flight_load_bp.route('/simulate', methods=['POST'])
+def simulate_flight_load():
+    """
+    What-if capacity scenarios over the best-known load history: LF, C/Y LF,
+    spill and the seat factor distribution each scenario's seats would have
+    produced, all scenarios evaluated in one vectorized pass.
+    
+    JSON body: {start_date, end_date, station, flight, scenarios: [{name,
+    aircraft: '787-9' | c_cap, y_cap, flights: ['ET620'], weekdays: ['Tuesday'],
+    start_date, end_date}]}. A scenario without flights/weekdays/dates applies to every flight-day.
+    """
+    try:
+        started = time.perf_counter()
+        payload = request.get_json(silent=True) or {}
+        
+        def body_date(name):
+            value = payload.get(name)
+            if not value:
+                return None
+            try:
+                return datetime.strptime(value, '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid {name}: {value} (expected YYYY-MM-DD)')
+        
+        flight = payload.get('flight') or 'all'
+        flight_no = flight.replace('ET', '') if flight != 'all' else None
+        station = str(payload.get('station') or '').strip().upper()
+        station = station if station and station != 'ALL' else None
+        start_date = body_date('start_date')
+        end_date = body_date('end_date')
+        scenarios = payload.get('scenarios')
+        if not isinstance(scenarios, list):
+            raise ValueError('scenarios must be a list')
+        
+        history = load_history(start_date, end_date, flight_no, station)
+        results = simulate_scenarios(history, scenarios)
+        
+        return jsonify({
+            'success': True,
+            'filters': {
+                'start_date': start_date.isoformat() if start_date else None,
+                'end_date': end_date.isoformat() if end_date else None,
+                'station': station or 'all',
+                'flight': flight
+            },
+            'flight_days': int(len(history['days'])),
+            'aircraft': {name: {'c_cap': c_cap, 'y_cap': y_cap} for name, (c_cap, y_cap) in AIRCRAFT_CONFIGS.items()},
+            'scenarios': results,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@flight_load_bp.route('/snapshots')
+def list_flight_load_snapshots():
+    """Forecast uploads (snapshots), newest first"""
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        snapshots = FlightLoadSnapshot.query.order_by(FlightLoadSnapshot.id.desc()).limit(limit).all()
+        
+        return jsonify({
+            'success': True,
+            'snapshots': [snapshot.to_dict() for snapshot in snapshots],
+            'count': len(snapshots)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@flight_load_bp.route('/snapshots/<int:snapshot_id>')
+def get_flight_load_snapshot(snapshot_id):
+    """The forecast cells one upload changed, with the pax each one replaced"""
+    try:
+        snapshot = db.session.get(FlightLoadSnapshot, snapshot_id)
+        if not snapshot:
+            return jsonify({'error': 'Snapshot not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'snapshot': snapshot.to_dict(),
+            'changes': snapshot_changes(snapshot)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@flight_load_bp.route('/as-of')
+def get_flight_load_as_of():
+    """
+    The forecast as it stood after an upload.
+    
+    Query params: snapshot=<id> or as_of=YYYY-MM-DD (last upload on or before
+    that day; default: latest), start_date / end_date, station=KWI|all,
+    flight=ET620|ET621|all
+    """
+    try:
+        snapshot_id = request.args.get('snapshot', type=int)
+        snapshot = resolve_snapshot(snapshot_id, date_arg('as_of'))
+        if not snapshot:
+            return jsonify({'error': 'No forecast snapshot found'}), 404
+        
+        flight = request.args.get('flight', 'all')
+        flight_no = flight.replace('ET', '') if flight and flight != 'all' else None
+        station = station_arg()
+        flight_nos = station_flights(station) if station else None
+        cells = forecast_as_of(snapshot.id, date_arg('start_date'), date_arg('end_date'), flight_no, flight_nos)
+        
+        return jsonify({
+            'success': True,
+            'snapshot': snapshot.to_dict(),
+            'records': [cell.to_dict() for cell in cells],
+            'count': len(cells)
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@flight_load_bp.route('/history')
+def get_flight_load_history():
+    """Every forecast version of one flight-day: ?date=YYYY-MM-DD&flight=ET620"""
+    try:
+        travel_date = date_arg('date')
+        flight = request.args.get('flight', '')
+        if not travel_date or not flight:
+            return jsonify({'error': 'date and flight are required'}), 400
+        
+        versions = []
+        for cell, uploaded_at in cell_history(travel_date, flight.replace('ET', '')):
+            version = cell.to_dict()
+            version['uploaded_at'] = uploaded_at.isoformat()
+            versions.append(version)
+        
+        return jsonify({
+            'success': True,
+            'travel_date': travel_date.isoformat(),
+            'flight': f"ET{flight.replace('ET', '')}",
+            'versions': versions,
+            'count': len(versions)
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,60 @@
+from flask import Blueprint, jsonify, request, session
+from src.models.user import db
+from src.models.upload_job import UploadJob
+from src.services.upload_jobs import check_orphaned
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# Jobs of uploads that are admin only; their status is too
+ADMIN_JOB_KINDS = ('sales', 'route_analysis')
+
+def job_view(job):
+    """Job as returned to the caller; who submitted it is only shown to admins"""
+    data = job.to_dict()
+    if not session.get('admin_logged_in'):
+        data.pop('submitted_by', None)
+    return data
+
+@jobs_bp.route('/jobs/<job_id>')
+def get_job(job_id):
+    """State, progress and (once finished) result or error of a background upload"""
+    try:
+        job = db.session.get(UploadJob, job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.kind in ADMIN_JOB_KINDS and not session.get('admin_logged_in'):
+            return jsonify({'error': 'Admin authentication required'}), 401
+        
+        job = check_orphaned(job)
+        return jsonify(job_view(job))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@jobs_bp.route('/jobs')
+def list_jobs():
+    """Most recent upload jobs, optionally filtered by kind and state (admin only)"""
+    if not session.get('admin_logged_in'):
+        return jsonify({'error': 'Admin authentication required'}), 401
+    
+    try:
+        query = UploadJob.query
+        
+        kind = request.args.get('kind')
+        if kind:
+            query = query.filter(UploadJob.kind == kind)
+        
+        state = request.args.get('state')
+        if state:
+            query = query.filter(UploadJob.state == state)
+        
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        jobs = query.order_by(UploadJob.created_at.desc()).limit(limit).all()
+        
+        return jsonify({
+            'jobs': [job_view(check_orphaned(job)) for job in jobs],
+            'count': len(jobs)
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
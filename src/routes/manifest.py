@@ -1,14 +1,32 @@
 from flask import Blueprint, render_template, request, jsonify, session
 from src.models.user import db
-from src.models.manifest import DailyManifest, RouteForecast, AirportMaster
+from src.models.manifest import DailyManifest, RouteForecast, AirportMaster, ManifestRouteCount
+from src.models.network import Station, FlightPair
+from src.services.excel_ingest import iter_sheet_rows, as_int, as_text, as_date
+from src.services.upload_jobs import upload_jobs, wants_async_upload, UploadError
+from src.services.network import HUB_CODE, normalize_flight_no, flight_capacity, flight_direction, station_flights, assign_station, forget_flight_directory
+from src.services.flight_load_view import sync_flight_view
+from src.services.manifest_route_counts import (sync_route_counts, rebuild_route_counts, route_counts_ready, route_actuals,
+                                                od_matrix, od_period_count, OD_PERIODS, OD_DIRECTIONS, MAX_OD_PERIODS)
+from src.services.derived_tables import mark_built
+from src.services.flight_load_rollups import sync_rollups
+from src.services.flight_load_accuracy import sync_accuracy
+from src.services.flight_load_store import UPSERT_BATCH_SIZE
 from datetime import datetime, timedelta
-import openpyxl
-from io import BytesIO
 from collections import defaultdict
 import re
+import io
+import time
+import zipfile
 
 manifest_bp = Blueprint('manifest', __name__)
 
+# Batch uploads at least this large are parsed in the upload process pool
+BATCH_PARALLEL_BYTES = 4 * 1024 * 1024
+
+# Members (files) accepted in one ZIP manifest archive
+MAX_ARCHIVE_MEMBERS = 5000
+
 def admin_required(f):
     """Decorator to require admin authentication"""
     from functools import wraps
@@ -19,20 +37,52 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def parse_text_manifest(content):
+# Header lines searched for the flight, date and route
+MANIFEST_HEADER_LINES = 10
+
+MANIFEST_MONTHS = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04',
+                   'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08',
+                   'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
+
+FLIGHT_RE = re.compile(r'FLIGHT:\s*(\w+)\s*(\d+)')
+DATE_RE = re.compile(r'DATE:\s*(\d{2})([A-Z]{3})(\d{2})')
+EMBARKATION_RE = re.compile(r'PT\.OF EMBARKATION:\s*(\w+)')
+DEST_RE = re.compile(r'PT\.OF DEST:\s*(\w+)')
+TOTALS_RE = re.compile(r'\.\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)')
+
+# Passenger line and, in the same match, the route of its connecting flight (if any):
+# 001 ABDALLA/ABDEL/M./31A/..0/....../....../0712157554673/......./.../ET00348/PZU/....
+# The lookahead leaves the slash after the seat for the connection search, as /ET00348/ may start there
+PASSENGER_RE = re.compile(r'^(\d{3})\s+([A-Z]+)/([A-Z\s]+)/([MF])\.?/(\d+[A-Z])?(?=/)(?:.*?/ET\d+/([A-Z]{3})/)?')
+
+def manifest_lines(content):
+    """
+    Line iterator over a manifest given as text, bytes or a binary stream, decoded
+    incrementally. Lines keep their trailing newline (only '\n' ends a line)
+    """
+    if isinstance(content, str):
+        return io.StringIO(content, newline='\n')
+    if isinstance(content, (bytes, bytearray)):
+        content = io.BytesIO(content)
+    return io.TextIOWrapper(content, encoding='utf-8', errors='ignore', newline='\n')
+
+def parse_text_manifest(content, counts_only=False):
     """
     Parse text-based manifest file (Ethiopian Airlines format)
     Returns flight info and passenger breakdown by destination
-    """
-    lines = content.split('\n')
     
+    Single pass over the lines (content: text, bytes or a binary stream) through
+    header -> passengers -> totals states; multi-leg manifests go back to
+    passengers after each leg's totals. counts_only skips the per-passenger
+    list (passengers is None) and keeps only the totals and route breakdown.
+    """
     flight_info = {
         'flight_number': None,
         'date': None,
         'origin': None,
         'destination': None,
-        'passengers': [],
-        'route_breakdown': defaultdict(int),
+        'passengers': None if counts_only else [],
+        'route_breakdown': {},
         'totals': {
             'male': 0,
             'female': 0,
@@ -43,104 +93,113 @@ def parse_text_manifest(content):
             'total': 0
         }
     }
-    
-    # Parse header info
-    for line in lines[:10]:
-        # Flight number and date
-        if 'FLIGHT:' in line and 'DATE:' in line:
-            # Extract flight number (e.g., "ET  621" -> "ET621")
-            flight_match = re.search(r'FLIGHT:\s*(\w+)\s*(\d+)', line)
-            if flight_match:
-                flight_info['flight_number'] = f"{flight_match.group(1)}{flight_match.group(2)}"
-            
-            # Extract date (e.g., "03JAN26" -> 2026-01-03)
-            date_match = re.search(r'DATE:\s*(\d{2})([A-Z]{3})(\d{2})', line)
-            if date_match:
-                day = date_match.group(1)
-                month_str = date_match.group(2)
-                year = date_match.group(3)
-                
-                months = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 
-                          'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08',
-                          'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
-                month = months.get(month_str, '01')
+    route_breakdown = flight_info['route_breakdown']
+    passengers = flight_info['passengers']
+    
+    # Passengers without a connecting flight count under the key None until the
+    # header is complete; their route is the hub end of the flight
+    local_passengers = []
+    pax_count = male = female = 0
+    totals_found = None
+    
+    state = 'header'
+    previous = before_previous = None
+    for index, line in enumerate(manifest_lines(content)):
+        if state == 'header':
+            if index >= MANIFEST_HEADER_LINES:
+                state = 'passengers'
+            else:
+                # Flight number and date
+                if 'FLIGHT:' in line and 'DATE:' in line:
+                    # Extract flight number (e.g., "ET  621" -> "ET621")
+                    flight_match = FLIGHT_RE.search(line)
+                    if flight_match:
+                        flight_info['flight_number'] = f"{flight_match.group(1)}{flight_match.group(2)}"
+                    
+                    # Extract date (e.g., "03JAN26" -> 2026-01-03), assume 20xx for year
+                    date_match = DATE_RE.search(line)
+                    if date_match:
+                        month = MANIFEST_MONTHS.get(date_match.group(2), '01')
+                        flight_info['date'] = f"20{date_match.group(3)}-{month}-{date_match.group(1)}"
                 
-                # Assume 20xx for year
-                full_year = f"20{year}"
-                flight_info['date'] = f"{full_year}-{month}-{day}"
-        
-        # Origin and destination
-        if 'PT.OF EMBARKATION:' in line:
-            emb_match = re.search(r'PT\.OF EMBARKATION:\s*(\w+)', line)
-            if emb_match:
-                flight_info['origin'] = emb_match.group(1)
-            
-            dest_match = re.search(r'PT\.OF DEST:\s*(\w+)', line)
-            if dest_match:
-                flight_info['destination'] = dest_match.group(1)
-    
-    # Parse passenger lines
-    # Format: 001 ABDALLA/ABDEL/M./31A/..0/....../....../0712157554673/......./.../ET00348/PZU/....
-    passenger_pattern = re.compile(r'^(\d{3})\s+([A-Z]+)/([A-Z\s]+)/([MF])\.?/(\d+[A-Z])?/')
-    
-    for line in lines:
-        line = line.strip()
-        if not line or line.startswith('.') or line.startswith('-') or line.startswith('TOTALS'):
-            continue
+                # Origin and destination
+                if 'PT.OF EMBARKATION:' in line:
+                    emb_match = EMBARKATION_RE.search(line)
+                    if emb_match:
+                        flight_info['origin'] = emb_match.group(1)
+                    
+                    dest_match = DEST_RE.search(line)
+                    if dest_match:
+                        flight_info['destination'] = dest_match.group(1)
         
-        match = passenger_pattern.match(line)
-        if match:
-            pax_num = match.group(1)
-            last_name = match.group(2)
-            first_name = match.group(3).strip()
-            gender = match.group(4)
-            seat = match.group(5) if match.group(5) else ''
-            
-            # Extract route code from the line
-            # For ET620 (inbound ADD->KWI): /ET00348/PZU/ means passenger came FROM PZU (origin)
-            # For ET621 (outbound KWI->ADD): /ET00348/PZU/ means passenger going TO PZU (destination)
-            route_match = re.search(r'/ET\d+/([A-Z]{3})/', line)
-            if route_match:
-                route_code = route_match.group(1)
-            else:
-                # If no connecting flight:
-                # - For ET620 (inbound): passenger came from origin (ADD)
-                # - For ET621 (outbound): passenger going to destination
-                if flight_info['flight_number'] and '620' in flight_info['flight_number']:
-                    route_code = flight_info['origin'] or 'ADD'
+        stripped = line.strip()
+        first = stripped[:1]
+        
+        # Passenger lines start with their 3-digit number
+        if first.isdigit():
+            match = PASSENGER_RE.match(stripped)
+            if match:
+                if state == 'totals':
+                    state = 'passengers'  # next leg
+                pax_count += 1
+                gender, route_code = match.group(4, 6)
+                if gender == 'M':
+                    male += 1
                 else:
-                    route_code = flight_info['destination'] or 'KWI'
-            
-            passenger = {
-                'number': pax_num,
-                'name': f"{last_name}/{first_name}",
-                'gender': gender,
-                'seat': seat,
-                'route_code': route_code
-            }
-            flight_info['passengers'].append(passenger)
-            flight_info['route_breakdown'][route_code] += 1
-            
-            # Count by gender
-            if gender == 'M':
-                flight_info['totals']['male'] += 1
-            else:
-                flight_info['totals']['female'] += 1
-    
-    # Parse totals from the file
-    for i, line in enumerate(lines):
-        if 'TOTALS PASSENGERS:' in line or (line.strip().startswith('.') and 'TOTALS:' in lines[i-2] if i >= 2 else False):
-            # Look for the totals line
-            totals_match = re.search(r'\.\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)', line)
+                    female += 1
+                
+                # For ET620 (inbound ADD->KWI): /ET00348/PZU/ means passenger came FROM PZU (origin)
+                # For ET621 (outbound KWI->ADD): /ET00348/PZU/ means passenger going TO PZU (destination)
+                route_breakdown[route_code] = route_breakdown.get(route_code, 0) + 1
+                
+                if passengers is not None:
+                    number, last_name, first_name, seat = match.group(1, 2, 3, 5)
+                    passenger = {
+                        'number': number,
+                        'name': f"{last_name}/{first_name.strip()}",
+                        'gender': gender,
+                        'seat': seat or '',
+                        'route_code': route_code
+                    }
+                    passengers.append(passenger)
+                    if route_code is None:
+                        local_passengers.append(passenger)
+        
+        # Totals line: after 'TOTALS PASSENGERS:', or a '.' line two lines below 'TOTALS:'
+        if 'TOTALS PASSENGERS:' in line or (first == '.' and before_previous is not None and 'TOTALS:' in before_previous):
+            if state != 'header':
+                state = 'totals'
+            totals_match = TOTALS_RE.search(line)
             if totals_match:
-                flight_info['totals']['male'] = int(totals_match.group(1))
-                flight_info['totals']['female'] = int(totals_match.group(2))
-                flight_info['totals']['child'] = int(totals_match.group(3))
-                flight_info['totals']['infant'] = int(totals_match.group(4))
-                flight_info['totals']['bags'] = int(totals_match.group(5))
-                flight_info['totals']['weight'] = int(totals_match.group(6))
-    
-    flight_info['totals']['total'] = len(flight_info['passengers'])
+                totals_found = totals_match.groups()
+        
+        before_previous, previous = previous, line
+    
+    # If no connecting flight the passenger's other end is the hub:
+    # - Inbound (e.g. ET620 ADD->KWI): came from the origin
+    # - Outbound (e.g. ET621 KWI->ADD): going to the destination
+    if flight_info['origin'] == HUB_CODE or not flight_info['destination']:
+        local_route = flight_info['origin'] or HUB_CODE
+    else:
+        local_route = flight_info['destination']
+    if None in route_breakdown:
+        merged = {}
+        for route_code, count in route_breakdown.items():
+            route_code = local_route if route_code is None else route_code
+            merged[route_code] = merged.get(route_code, 0) + count
+        flight_info['route_breakdown'] = merged
+    for passenger in local_passengers:
+        passenger['route_code'] = local_route
+    
+    # The manifest's own totals line wins over the gender count of the passenger lines
+    totals = flight_info['totals']
+    if totals_found:
+        for name, value in zip(('male', 'female', 'child', 'infant', 'bags', 'weight'), totals_found):
+            totals[name] = int(value)
+    else:
+        totals['male'] = male
+        totals['female'] = female
+    totals['total'] = pax_count
     
     return flight_info
 
@@ -154,11 +213,264 @@ def forecast_interface():
     """Manual forecast data entry interface"""
     return render_template('forecast-interface.html')
 
+def parse_manifest_upload(file_content, filename):
+    """
+    Parse an uploaded manifest file (bytes or a binary stream) without touching the database.
+    Returns {'format': 'text', 'manifest': ...}, {'format': 'excel', 'rows': [...]}
+    or, for a .zip of text manifests, {'format': 'archive', 'files': [(name, parsed, error), ...]}
+    """
+    if filename.lower().endswith('.zip'):
+        return {'format': 'archive', 'files': parse_manifest_archive(file_content, filename)}
+    
+    filename = filename.lower()
+    
+    # Handle text manifest files: streamed line by line, only the counts are stored
+    if filename.endswith('.txt'):
+        manifest_data = parse_text_manifest(file_content, counts_only=True)
+        
+        if not manifest_data['flight_number'] or not manifest_data['date']:
+            raise UploadError('Could not parse flight number or date from manifest')
+        # The header date isn't range checked by the parser (e.g. 31FEB26)
+        try:
+            datetime.strptime(manifest_data['date'], '%Y-%m-%d')
+        except ValueError:
+            raise UploadError(f"Invalid manifest date: {manifest_data['date']}")
+        
+        return {'format': 'text', 'manifest': manifest_data}
+    
+    # Handle Excel files
+    elif filename.endswith('.xlsx') or filename.endswith('.xls'):
+        if hasattr(file_content, 'read'):
+            file_content = file_content.read()
+        # Columns: date, flight number, direction, total / business / economy pax
+        manifest_rows = iter_sheet_rows(file_content, min_row=2, width=6,
+                                        converters=(as_date, as_text, as_text, as_int, as_int, as_int))
+        return {'format': 'excel', 'rows': [row[:6] for row in manifest_rows]}
+    
+    raise UploadError('Unsupported file format. Please upload .txt, .xlsx or .zip files')
+
+def parse_manifest_archive(file_content, filename):
+    """
+    Parse the text manifests of a ZIP archive one member at a time, streamed out
+    of the archive (nothing is extracted to disk) and counts only, so memory
+    stays bounded however many members it has. Returns (name, parsed, error)
+    per member, named 'archive.zip/member.txt'.
+    """
+    if isinstance(file_content, (bytes, bytearray)):
+        file_content = io.BytesIO(file_content)
+    try:
+        archive = zipfile.ZipFile(file_content)
+    except zipfile.BadZipFile:
+        raise UploadError('Not a valid ZIP archive')
+    
+    files = []
+    with archive:
+        # Skip folders and the metadata some archivers add (__MACOSX/, .DS_Store)
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+            and not info.filename.rsplit('/', 1)[-1].startswith('.')
+        ]
+        if len(members) > MAX_ARCHIVE_MEMBERS:
+            raise UploadError(f'Archive has {len(members)} files; at most {MAX_ARCHIVE_MEMBERS} per upload')
+        
+        for info in members:
+            name = f"{filename}/{info.filename}"
+            if not info.filename.lower().endswith('.txt'):
+                files.append((name, None, 'Unsupported file format. Archives may contain .txt manifests'))
+                continue
+            try:
+                with archive.open(info) as member:
+                    files.append((name, parse_manifest_upload(member, info.filename), None))
+            except UploadError as e:
+                files.append((name, None, str(e)))
+            except Exception as e:
+                files.append((name, None, f'Error processing file: {str(e)}'))
+    
+    if not files:
+        raise UploadError('No manifest files found in the archive')
+    return files
+
+def store_text_manifest(manifest_data, uploaded_by='admin', existing_rows=None):
+    """
+    Insert or update the DailyManifest of one parsed text manifest. existing_rows
+    ({(flight_date, flight_number): DailyManifest}) saves the lookup query when
+    storing many. No commit; returns (flight_date, upload summary).
+    """
+    # Parse the date
+    flight_date = datetime.strptime(manifest_data['date'], '%Y-%m-%d').date()
+    flight_no = manifest_data['flight_number']
+    
+    # Get totals
+    total_pax = manifest_data['totals']['total']
+    male_count = manifest_data['totals']['male']
+    female_count = manifest_data['totals']['female']
+    
+    # Get capacity from the flight pair configuration
+    business_cap, economy_cap, total_cap = flight_capacity(flight_no)
+    
+    # Calculate load factors
+    lf = (total_pax / total_cap * 100) if total_cap > 0 else 0
+    
+    route_breakdown = manifest_data['route_breakdown']
+    
+    # Determine direction from the flight pair configuration (hub->station is inbound)
+    direction = flight_direction(flight_no, 'inbound')
+    
+    # Check if manifest already exists for this flight/date
+    if existing_rows is None:
+        existing = DailyManifest.query.filter_by(
+            flight_date=flight_date,
+            flight_number=flight_no
+        ).first()
+    else:
+        existing = existing_rows.get((flight_date, flight_no))
+    
+    if existing:
+        # Update existing manifest
+        existing.total_passengers = total_pax
+        existing.business_passengers = 0  # Not parsed from text manifest
+        existing.economy_passengers = total_pax
+        existing.total_capacity = total_cap
+        existing.business_capacity = business_cap
+        existing.economy_capacity = economy_cap
+        existing.load_factor = lf
+        existing.business_load_factor = 0
+        existing.economy_load_factor = (total_pax / economy_cap * 100) if economy_cap > 0 else 0
+        existing.route_breakdown = route_breakdown
+        existing.uploaded_at = datetime.utcnow()
+        existing.uploaded_by = uploaded_by
+        existing.source = 'manifest'
+    else:
+        # Create new manifest record
+        new_manifest = DailyManifest(
+            flight_date=flight_date,
+            flight_number=flight_no,
+            direction=direction,
+            total_passengers=total_pax,
+            business_passengers=0,
+            economy_passengers=total_pax,
+            total_capacity=total_cap,
+            business_capacity=business_cap,
+            economy_capacity=economy_cap,
+            load_factor=lf,
+            business_load_factor=0,
+            economy_load_factor=(total_pax / economy_cap * 100) if economy_cap > 0 else 0,
+            route_breakdown=route_breakdown,
+            uploaded_by=uploaded_by,
+            source='manifest'
+        )
+        db.session.add(new_manifest)
+    
+    return flight_date, {
+        'success': True,
+        'message': f'Successfully processed manifest for {flight_no} on {manifest_data["date"]}',
+        'records_processed': 1,
+        'flight_number': flight_no,
+        'flight_date': manifest_data['date'],
+        'total_passengers': total_pax,
+        'route_breakdown': route_breakdown,
+        'load_factor': round(lf, 1)
+    }
+
+def save_manifest_upload(parsed, uploaded_by='admin'):
+    """Store parsed manifest records (insert or update per flight/date) and return the upload summary"""
+    if parsed['format'] == 'archive':
+        return save_manifest_batch(parsed['files'], uploaded_by)
+    
+    if parsed['format'] == 'text':
+        flight_date, result = store_text_manifest(parsed['manifest'], uploaded_by)
+        
+        sync_flight_view([flight_date])
+        sync_route_counts([flight_date])
+        sync_rollups([flight_date])
+        sync_accuracy([flight_date])
+        db.session.commit()
+        
+        return result
+    
+    records_processed = 0
+    flight_dates = set()
+    
+    for row in parsed['rows']:
+        flight_date, flight_no, direction, total_pax, business_pax, economy_pax = row
+        direction = direction.lower() if direction else None
+        
+        if not flight_date or not flight_no:
+            continue
+        
+        # Get capacity
+        business_cap, economy_cap, total_cap = flight_capacity(flight_no)
+        
+        # Calculate load factors
+        lf = (total_pax / total_cap * 100) if total_cap > 0 else 0
+        lf_c = (business_pax / business_cap * 100) if business_cap > 0 else 0
+        lf_y = (economy_pax / economy_cap * 100) if economy_cap > 0 else 0
+        
+        route_breakdown = {}
+        
+        # Check if manifest already exists
+        existing = DailyManifest.query.filter_by(
+            flight_date=flight_date,
+            flight_number=flight_no
+        ).first()
+        
+        if existing:
+            existing.total_passengers = total_pax
+            existing.business_passengers = business_pax
+            existing.economy_passengers = economy_pax
+            existing.total_capacity = total_cap
+            existing.business_capacity = business_cap
+            existing.economy_capacity = economy_cap
+            existing.load_factor = lf
+            existing.business_load_factor = lf_c
+            existing.economy_load_factor = lf_y
+            existing.route_breakdown = route_breakdown
+            existing.uploaded_at = datetime.utcnow()
+            existing.uploaded_by = uploaded_by
+            existing.source = 'manifest'
+        else:
+            new_manifest = DailyManifest(
+                flight_date=flight_date,
+                flight_number=flight_no,
+                direction=direction or flight_direction(flight_no, 'inbound'),
+                total_passengers=total_pax,
+                business_passengers=business_pax,
+                economy_passengers=economy_pax,
+                total_capacity=total_cap,
+                business_capacity=business_cap,
+                economy_capacity=economy_cap,
+                load_factor=lf,
+                business_load_factor=lf_c,
+                economy_load_factor=lf_y,
+                route_breakdown=route_breakdown,
+                uploaded_by=uploaded_by,
+                source='manifest'
+            )
+            db.session.add(new_manifest)
+        
+        records_processed += 1
+        flight_dates.add(flight_date)
+    
+    sync_flight_view(flight_dates)
+    sync_route_counts(flight_dates)
+    sync_rollups(flight_dates)
+    sync_accuracy(flight_dates)
+    db.session.commit()
+    
+    return {
+        'success': True,
+        'message': f'Successfully processed {records_processed} manifest records',
+        'records_processed': records_processed
+    }
+
 @manifest_bp.route('/manifest/upload', methods=['POST'])
 def upload_manifest():
     """
     Upload daily manifest (actual passenger data)
-    Supports both text (.txt) and Excel (.xlsx) formats
+    Supports text (.txt) and Excel (.xlsx) formats, and ZIP archives of text
+    manifests (stored like a batch upload, one result per member).
+    With ?async=1 returns a job id to poll at /api/jobs/<id>
     """
     if 'file' not in request.files:
         return jsonify({'success': False, 'error': 'No file provided'}), 400
@@ -167,191 +479,128 @@ def upload_manifest():
     if file.filename == '':
         return jsonify({'success': False, 'error': 'No file selected'}), 400
     
+    if not file.filename.lower().endswith(('.txt', '.xlsx', '.xls', '.zip')):
+        return jsonify({
+            'success': False, 
+            'error': 'Unsupported file format. Please upload .txt, .xlsx or .zip files'
+        }), 400
+    
     try:
-        filename = file.filename.lower()
+        uploaded_by = session.get('admin_username', 'admin')
         
-        # Handle text manifest files
-        if filename.endswith('.txt'):
-            file_content = file.read().decode('utf-8', errors='ignore')
-            manifest_data = parse_text_manifest(file_content)
-            
-            if not manifest_data['flight_number'] or not manifest_data['date']:
-                return jsonify({
-                    'success': False, 
-                    'error': 'Could not parse flight number or date from manifest'
-                }), 400
-            
-            # Parse the date
-            flight_date = datetime.strptime(manifest_data['date'], '%Y-%m-%d').date()
-            flight_no = manifest_data['flight_number']
-            
-            # Get totals
-            total_pax = manifest_data['totals']['total']
-            male_count = manifest_data['totals']['male']
-            female_count = manifest_data['totals']['female']
-            
-            # Get capacity (standard aircraft config for ET621/ET620)
-            total_cap = 270  # Boeing 787 typical config
-            business_cap = 24
-            economy_cap = 246
-            
-            # Calculate load factors
-            lf = (total_pax / total_cap * 100) if total_cap > 0 else 0
-            
-            # Convert route breakdown to regular dict
-            route_breakdown = dict(manifest_data['route_breakdown'])
-            
-            # Determine direction based on flight number
-            direction = 'outbound' if '621' in flight_no else 'inbound'
-            
-            # Check if manifest already exists for this flight/date
-            existing = DailyManifest.query.filter_by(
-                flight_date=flight_date,
-                flight_number=flight_no
-            ).first()
-            
-            if existing:
-                # Update existing manifest
-                existing.total_passengers = total_pax
-                existing.business_passengers = 0  # Not parsed from text manifest
-                existing.economy_passengers = total_pax
-                existing.total_capacity = total_cap
-                existing.business_capacity = business_cap
-                existing.economy_capacity = economy_cap
-                existing.load_factor = lf
-                existing.business_load_factor = 0
-                existing.economy_load_factor = (total_pax / economy_cap * 100) if economy_cap > 0 else 0
-                existing.route_breakdown = route_breakdown
-                existing.uploaded_at = datetime.utcnow()
-                existing.uploaded_by = session.get('admin_username', 'admin')
-                existing.source = 'manifest'
+        if wants_async_upload():
+            job = upload_jobs.submit('manifest', file.filename, parse_manifest_upload, (file.read(), file.filename),
+                                     save_manifest_upload, {'uploaded_by': uploaded_by},
+                                     submitted_by=session.get('admin_username'))
+            return jsonify(dict(job.to_dict(), success=True)), 202
+        
+        # Parsed straight from the uploaded stream
+        parsed = parse_manifest_upload(file.stream, file.filename)
+        return jsonify(save_manifest_upload(parsed, uploaded_by))
+    
+    except UploadError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def save_manifest_batch(files, uploaded_by='admin'):
+    """
+    Store a batch of parsed text manifests in one transaction. files is a list of
+    (filename, parsed, error); returns a status per file: 'ok' (inserted or
+    updated), 'duplicate' (same flight/date as an earlier file of the batch,
+    skipped) or 'error' (could not be parsed).
+    """
+    results = []
+    keep = []
+    seen = {}
+    for filename, parsed, error in files:
+        if error:
+            results.append({'filename': filename, 'status': 'error', 'error': error})
+            continue
+        manifest_data = parsed['manifest']
+        key = (datetime.strptime(manifest_data['date'], '%Y-%m-%d').date(), manifest_data['flight_number'])
+        if key in seen:
+            results.append({'filename': filename, 'status': 'duplicate', 'duplicate_of': seen[key],
+                            'flight_number': key[1], 'flight_date': manifest_data['date']})
+            continue
+        seen[key] = filename
+        results.append(None)
+        keep.append((len(results) - 1, filename, manifest_data, key))
+    
+    # One lookup of the rows being replaced instead of a query per file
+    dates = sorted(set(key[0] for key in seen))
+    existing_rows = {}
+    for i in range(0, len(dates), UPSERT_BATCH_SIZE):
+        for row in DailyManifest.query.filter(DailyManifest.flight_date.in_(dates[i:i + UPSERT_BATCH_SIZE])):
+            existing_rows[(row.flight_date, row.flight_number)] = row
+    
+    for index, filename, manifest_data, key in keep:
+        action = 'updated' if key in existing_rows else 'inserted'
+        flight_date, summary = store_text_manifest(manifest_data, uploaded_by, existing_rows)
+        results[index] = {
+            'filename': filename,
+            'status': 'ok',
+            'action': action,
+            'flight_number': summary['flight_number'],
+            'flight_date': summary['flight_date'],
+            'total_passengers': summary['total_passengers'],
+            'load_factor': summary['load_factor']
+        }
+    
+    sync_flight_view(dates)
+    sync_route_counts(dates)
+    sync_rollups(dates)
+    sync_accuracy(dates)
+    db.session.commit()
+    
+    counts = {status: sum(1 for result in results if result['status'] == status) for status in ('ok', 'duplicate', 'error')}
+    return {
+        'success': True,
+        'message': f"Processed {counts['ok']} of {len(results)} manifest files",
+        'records_processed': counts['ok'],
+        'counts': counts,
+        'files': results
+    }
+
+@manifest_bp.route('/manifest/upload-batch', methods=['POST'])
+def upload_manifest_batch():
+    """
+    Upload many text (.txt) manifests, or ZIP archives of them, in one request
+    (multipart field 'files'). Files are parsed in parallel, then stored in a
+    single transaction; the response reports each file (archive member) as
+    ok, duplicate or error.
+    """
+    uploads = request.files.getlist('files') or request.files.getlist('file')
+    uploads = [upload for upload in uploads if upload.filename]
+    if not uploads:
+        return jsonify({'success': False, 'error': 'No files provided'}), 400
+    
+    try:
+        uploaded_by = session.get('admin_username', 'admin')
+        
+        accepted = ('.txt', '.zip')
+        args_list = [(upload.read(), upload.filename) for upload in uploads if upload.filename.lower().endswith(accepted)]
+        # Shipping small batches to the parser processes costs more than parsing them here
+        parallel = sum(len(args[0]) for args in args_list) >= BATCH_PARALLEL_BYTES
+        parsed = iter(upload_jobs.parse_many(parse_manifest_upload, args_list, parallel))
+        
+        files = []
+        for upload in uploads:
+            if not upload.filename.lower().endswith(accepted):
+                files.append((upload.filename, None, 'Unsupported file format. Batch upload takes .txt manifests or .zip archives'))
+                continue
+            result, error = next(parsed)
+            if result and result['format'] == 'archive':
+                files.extend(result['files'])
             else:
-                # Create new manifest record
-                new_manifest = DailyManifest(
-                    flight_date=flight_date,
-                    flight_number=flight_no,
-                    direction=direction,
-                    total_passengers=total_pax,
-                    business_passengers=0,
-                    economy_passengers=total_pax,
-                    total_capacity=total_cap,
-                    business_capacity=business_cap,
-                    economy_capacity=economy_cap,
-                    load_factor=lf,
-                    business_load_factor=0,
-                    economy_load_factor=(total_pax / economy_cap * 100) if economy_cap > 0 else 0,
-                    route_breakdown=route_breakdown,
-                    uploaded_by=session.get('admin_username', 'admin'),
-                    source='manifest'
-                )
-                db.session.add(new_manifest)
-            
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': f'Successfully processed manifest for {flight_no} on {manifest_data["date"]}',
-                'records_processed': 1,
-                'flight_number': flight_no,
-                'flight_date': manifest_data['date'],
-                'total_passengers': total_pax,
-                'route_breakdown': route_breakdown,
-                'load_factor': round(lf, 1)
-            })
-        
-        # Handle Excel files
-        elif filename.endswith('.xlsx') or filename.endswith('.xls'):
-            file_content = file.read()
-            workbook = openpyxl.load_workbook(BytesIO(file_content), data_only=True)
-            sheet = workbook.active
-            
-            # Parse manifest data
-            records_processed = 0
-            
-            for row_idx in range(2, sheet.max_row + 1):
-                date_val = sheet.cell(row_idx, 1).value
-                flight_no = str(sheet.cell(row_idx, 2).value) if sheet.cell(row_idx, 2).value else None
-                direction = str(sheet.cell(row_idx, 3).value).lower() if sheet.cell(row_idx, 3).value else None
-                total_pax = int(sheet.cell(row_idx, 4).value) if sheet.cell(row_idx, 4).value else 0
-                business_pax = int(sheet.cell(row_idx, 5).value) if sheet.cell(row_idx, 5).value else 0
-                economy_pax = int(sheet.cell(row_idx, 6).value) if sheet.cell(row_idx, 6).value else 0
-                
-                if not date_val or not flight_no:
-                    continue
-                
-                # Convert date
-                if isinstance(date_val, datetime):
-                    flight_date = date_val.date()
-                else:
-                    flight_date = datetime.strptime(str(date_val), '%Y-%m-%d').date()
-                
-                # Get capacity
-                total_cap = 270
-                business_cap = 24
-                economy_cap = 246
-                
-                # Calculate load factors
-                lf = (total_pax / total_cap * 100) if total_cap > 0 else 0
-                lf_c = (business_pax / business_cap * 100) if business_cap > 0 else 0
-                lf_y = (economy_pax / economy_cap * 100) if economy_cap > 0 else 0
-                
-                route_breakdown = {}
-                
-                # Check if manifest already exists
-                existing = DailyManifest.query.filter_by(
-                    flight_date=flight_date,
-                    flight_number=flight_no
-                ).first()
-                
-                if existing:
-                    existing.total_passengers = total_pax
-                    existing.business_passengers = business_pax
-                    existing.economy_passengers = economy_pax
-                    existing.total_capacity = total_cap
-                    existing.business_capacity = business_cap
-                    existing.economy_capacity = economy_cap
-                    existing.load_factor = lf
-                    existing.business_load_factor = lf_c
-                    existing.economy_load_factor = lf_y
-                    existing.route_breakdown = route_breakdown
-                    existing.uploaded_at = datetime.utcnow()
-                    existing.uploaded_by = session.get('admin_username', 'admin')
-                    existing.source = 'manifest'
-                else:
-                    new_manifest = DailyManifest(
-                        flight_date=flight_date,
-                        flight_number=flight_no,
-                        direction=direction or ('inbound' if '620' in flight_no else 'outbound'),
-                        total_passengers=total_pax,
-                        business_passengers=business_pax,
-                        economy_passengers=economy_pax,
-                        total_capacity=total_cap,
-                        business_capacity=business_cap,
-                        economy_capacity=economy_cap,
-                        load_factor=lf,
-                        business_load_factor=lf_c,
-                        economy_load_factor=lf_y,
-                        route_breakdown=route_breakdown,
-                        uploaded_by=session.get('admin_username', 'admin'),
-                        source='manifest'
-                    )
-                    db.session.add(new_manifest)
-                
-                records_processed += 1
-            
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': f'Successfully processed {records_processed} manifest records',
-                'records_processed': records_processed
-            })
+                files.append((upload.filename, result, error))
         
-        else:
-            return jsonify({
-                'success': False, 
-                'error': 'Unsupported file format. Please upload .txt or .xlsx files'
-            }), 400
+        return jsonify(save_manifest_batch(files, uploaded_by))
     
     except Exception as e:
         db.session.rollback()
@@ -359,15 +608,24 @@ def upload_manifest():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def manifest_flight_numbers(station):
+    """Spellings of a station's flight numbers in daily_manifests ('621' and 'ET621')"""
+    flights = station_flights(station)
+    return flights + [f"ET{flight_no}" for flight_no in flights]
+
 @manifest_bp.route('/manifest/data')
 def get_manifest_data():
-    """Get manifest data for date range"""
+    """Get manifest data for date range, optionally of one flight or station (station=KWI)"""
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
     flight_number = request.args.get('flight_number')
+    station = request.args.get('station', '').strip().upper()
     
     query = DailyManifest.query
     
+    if station and station != 'ALL':
+        query = query.filter(DailyManifest.flight_number.in_(manifest_flight_numbers(station)))
+    
     if start_date_str:
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
         query = query.filter(DailyManifest.flight_date >= start_date)
@@ -448,6 +706,7 @@ def get_forecast_data():
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
     direction = request.args.get('direction', 'outbound')
+    station = request.args.get('station', '').strip().upper()
     
     if not start_date_str or not end_date_str:
         return jsonify({'success': False, 'error': 'Date range required'}), 400
@@ -469,12 +728,16 @@ def get_forecast_data():
         RouteForecast.direction == direction
     ).all()
     
-    # Get manifests for date range (actuals)
-    manifests = DailyManifest.query.filter(
+    # Dates with a manifest (actuals), and its passengers per airport from the route count table
+    manifest_days = db.session.query(DailyManifest.flight_date).filter(
         DailyManifest.flight_date >= start_date,
         DailyManifest.flight_date <= end_date,
         DailyManifest.direction == direction
-    ).all()
+    )
+    flight_nos = None
+    if station and station != 'ALL':
+        manifest_days = manifest_days.filter(DailyManifest.flight_number.in_(manifest_flight_numbers(station)))
+        flight_nos = station_flights(station)
     
     # Build combined data structure
     data_by_airport = defaultdict(lambda: defaultdict(lambda: {'passengers': 0, 'source': 'forecast', 'confirmed': False}))
@@ -489,19 +752,13 @@ def get_forecast_data():
         }
     
     # Then, override with manifest data (actuals) where available
-    manifest_dates = set()
-    for manifest in manifests:
-        date_str = manifest.flight_date.strftime('%Y-%m-%d')
-        manifest_dates.add(date_str)
-        
-        # Parse route breakdown
-        if manifest.route_breakdown:
-            for airport, pax_count in manifest.route_breakdown.items():
-                data_by_airport[airport][date_str] = {
-                    'passengers': pax_count,
-                    'source': 'manifest',
-                    'confirmed': True
-                }
+    manifest_dates = sorted(flight_date.strftime('%Y-%m-%d') for (flight_date,) in manifest_days.distinct())
+    for flight_date, airport, pax_count in route_actuals(start_date, end_date, direction, flight_nos):
+        data_by_airport[airport][flight_date.strftime('%Y-%m-%d')] = {
+            'passengers': int(pax_count or 0),
+            'source': 'manifest',
+            'confirmed': True
+        }
     
     # Get all airports
     airports = AirportMaster.query.filter_by(active=True).all()
@@ -517,7 +774,9 @@ def get_forecast_data():
         'dates': [d.strftime('%Y-%m-%d') for d in date_list],
         'airports': sorted(airport_codes),
         'data': dict(data_by_airport),
-        'manifest_dates': list(manifest_dates)
+        'manifest_dates': manifest_dates,
+        # False until the next manifest upload (or /api/manifest/route-counts/rebuild) backfills older manifests
+        'route_counts_ready': route_counts_ready()
     }
     
     return jsonify({
@@ -525,6 +784,91 @@ def get_forecast_data():
         'result': result
     })
 
+@manifest_bp.route('/manifest/od-matrix')
+def get_od_matrix():
+    """
+    Origin-destination matrix of connecting passengers via the hub: passengers
+    per route code (origin of inbound, destination of outbound passengers)
+    and period, from the route count tables written at manifest upload.
+    
+    Query params: start_date / end_date (YYYY-MM-DD, required),
+    direction=inbound|outbound|all (default all), period=daily|weekly|monthly|quarterly
+    (default monthly), station=KWI|all, flight=ET621, airports=PZU,DAR,JNB
+    """
+    try:
+        started = time.perf_counter()
+        start_date_str = request.args.get('start_date')
+        end_date_str = request.args.get('end_date')
+        if not start_date_str or not end_date_str:
+            raise ValueError('Date range required')
+        try:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('Invalid date (expected YYYY-MM-DD)')
+        if start_date > end_date:
+            raise ValueError('start_date must not be after end_date')
+        
+        direction = request.args.get('direction', 'all').lower()
+        if direction not in OD_DIRECTIONS:
+            raise ValueError(f'Invalid direction: {direction} (expected inbound, outbound or all)')
+        period = request.args.get('period', 'monthly').lower()
+        if period not in OD_PERIODS:
+            raise ValueError(f'Invalid period: {period} (expected {", ".join(OD_PERIODS)})')
+        if od_period_count(start_date, end_date, period) > MAX_OD_PERIODS:
+            raise ValueError(f'Date range too long: at most {MAX_OD_PERIODS} {period} periods per matrix')
+        
+        station = request.args.get('station', '').strip().upper()
+        flight = request.args.get('flight', 'all')
+        flight_nos = None
+        if station and station != 'ALL':
+            flight_nos = station_flights(station)
+        if flight and flight != 'all':
+            flight_no = normalize_flight_no(flight)
+            flight_nos = [flight_no] if flight_nos is None or flight_no in flight_nos else []
+        airports = [code.strip().upper() for code in request.args.get('airports', '').split(',') if code.strip()]
+        
+        matrix = od_matrix(start_date, end_date, direction, period, flight_nos, airports or None)
+        
+        return jsonify({
+            'success': True,
+            'hub': HUB_CODE,
+            'filters': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'direction': direction,
+                'period': period,
+                'station': station if station and station != 'ALL' else 'all',
+                'flight': flight,
+                'airports': airports
+            },
+            **matrix,
+            # False until the next manifest upload (or /api/manifest/route-counts/rebuild) backfills older manifests
+            'route_counts_ready': route_counts_ready(),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        })
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@manifest_bp.route('/manifest/route-counts/rebuild', methods=['POST'])
+@admin_required
+def rebuild_manifest_route_counts():
+    """Rewrite the daily and monthly route count tables from every stored manifest"""
+    try:
+        rows = rebuild_route_counts()
+        mark_built(ManifestRouteCount.__tablename__, rows)
+        db.session.commit()
+        return jsonify({'success': True, 'route_count_rows': rows})
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @manifest_bp.route('/airports/list')
 def list_airports():
     """Get list of airports for dropdown"""
@@ -568,3 +912,109 @@ def add_airport():
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@manifest_bp.route('/stations/list')
+def list_stations():
+    """Stations of the network with their flight pairs and seat configurations"""
+    stations = Station.query.order_by(Station.code).all()
+    pairs = defaultdict(list)
+    for pair in FlightPair.query.order_by(FlightPair.inbound_flight_no):
+        pairs[pair.station_code].append(pair.to_dict())
+    
+    return jsonify({
+        'success': True,
+        'stations': [dict(station.to_dict(), flight_pairs=pairs[station.code]) for station in stations]
+    })
+
+@manifest_bp.route('/stations/add', methods=['POST'])
+@admin_required
+def add_station():
+    """Add a station to the network"""
+    data = request.get_json() or {}
+    code = data.get('code', '').upper().strip()
+    
+    if not code:
+        return jsonify({'success': False, 'error': 'Station code required'}), 400
+    
+    if Station.query.filter_by(code=code).first():
+        return jsonify({'success': False, 'error': 'Station code already exists'}), 400
+    
+    try:
+        station = Station(
+            code=code,
+            name=data.get('name', '').strip(),
+            country=data.get('country', '').strip(),
+            active=True
+        )
+        db.session.add(station)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'station': station.to_dict()
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@manifest_bp.route('/flight-pairs/save', methods=['POST'])
+@admin_required
+def save_flight_pair():
+    """
+    Add or update a station's flight pair, matched on either flight number.
+    Body: {station_code, inbound_flight, outbound_flight, business_capacity,
+    economy_capacity} (capacities apply to both legs unless inbound_/outbound_
+    prefixed values are given). Already materialized flight load rows of the
+    pair's flights are moved to its station.
+    """
+    data = request.get_json() or {}
+    station_code = data.get('station_code', '').upper().strip()
+    inbound = normalize_flight_no(data.get('inbound_flight'))
+    outbound = normalize_flight_no(data.get('outbound_flight'))
+    
+    if not station_code or not inbound or not outbound:
+        return jsonify({'success': False, 'error': 'station_code, inbound_flight and outbound_flight required'}), 400
+    
+    if not Station.query.filter_by(code=station_code).first():
+        return jsonify({'success': False, 'error': f'Unknown station: {station_code}'}), 400
+    
+    try:
+        matches = FlightPair.query.filter(
+            FlightPair.inbound_flight_no.in_((inbound, outbound)) | FlightPair.outbound_flight_no.in_((inbound, outbound))
+        ).all()
+        if len(matches) > 1:
+            return jsonify({'success': False, 'error': 'Flight numbers belong to different flight pairs'}), 400
+        
+        pair = matches[0] if matches else FlightPair(station_code=station_code)
+        previous_flights = {pair.inbound_flight_no, pair.outbound_flight_no} - {None}
+        
+        pair.station_code = station_code
+        pair.hub_code = data.get('hub_code', pair.hub_code or HUB_CODE).upper().strip()
+        pair.inbound_flight_no = inbound
+        pair.outbound_flight_no = outbound
+        for leg in ('inbound', 'outbound'):
+            for cabin in ('business', 'economy'):
+                value = data.get(f'{leg}_{cabin}_capacity', data.get(f'{cabin}_capacity'))
+                if value is not None:
+                    setattr(pair, f'{leg}_{cabin}_capacity', int(value))
+        pair.active = bool(data.get('active', True))
+        db.session.add(pair)
+        
+        assign_station([inbound, outbound], station_code if pair.active else None)
+        assign_station(list(previous_flights - {inbound, outbound}), None)
+        db.session.commit()
+        forget_flight_directory()
+        
+        return jsonify({
+            'success': True,
+            'flight_pair': pair.to_dict()
+        })
+    
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': f'Invalid capacity: {str(e)}'}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
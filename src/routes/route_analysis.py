@@ -3,79 +3,82 @@ from src.models.user import db
 from src.models.route_analysis import RouteAnalysisData
 import json
 from datetime import datetime
-import openpyxl
-from io import BytesIO
+from src.services.excel_ingest import open_workbook, iter_table, pad_row
+from src.services.upload_jobs import upload_jobs, wants_async_upload, UploadError
 
 route_analysis_bp = Blueprint('route_analysis', __name__)
 
 def process_route_excel_file(file_content, filename):
     """Process Route Analysis Excel file and extract data"""
     try:
-        # Load workbook from bytes with data_only=True to read formula values
-        workbook = openpyxl.load_workbook(BytesIO(file_content), data_only=True)
-        
-        # Use the first sheet (active sheet)
-        sheet = workbook.active
-        sheet_name = sheet.title
-        
-        # Row 2 contains headers
-        headers = []
-        for col_idx in range(1, sheet.max_column + 1):
-            header = sheet.cell(2, col_idx).value
-            headers.append(header if header is not None else f'Column_{col_idx}')
-        
-        # Extract data starting from row 3
-        routes_data = []
-        daily_totals = {}
-        
-        for row_idx in range(3, sheet.max_row + 1):
-            # Get route point from column 1
-            route_point = sheet.cell(row_idx, 1).value
+        # Stream the workbook in read-only mode; data_only reads formula values
+        workbook = open_workbook(file_content)
+        
+        try:
+            # Use the first sheet (active sheet)
+            sheet = workbook.active
+            sheet_name = sheet.title
+            
+            # Row 2 contains headers; rows are padded up to the previous week column (9)
+            header_row, rows = iter_table(sheet, header_row=2, width=9)
+            header_row = pad_row(header_row, 9)
+            headers = [header if header is not None else f'Column_{col_idx}'
+                       for col_idx, header in enumerate(header_row, start=1)]
+            
+            # Extract data starting from row 3
+            routes_data = []
+            daily_totals = {}
             
-            if route_point and isinstance(route_point, str):
-                row_data = {
-                    'route': route_point,
-                    'daily_values': {},
-                    'grand_total': 0,
-                    'previous_week': 0,
-                    'variance': 0
-                }
+            for row in rows:
+                # Get route point from column 1
+                route_point = row[0]
                 
-                # Extract daily values (columns 2-7)
-                for col_idx in range(2, 8):
-                    value = sheet.cell(row_idx, col_idx).value
-                    date_header = headers[col_idx - 1]
+                if route_point and isinstance(route_point, str):
+                    row_data = {
+                        'route': route_point,
+                        'daily_values': {},
+                        'grand_total': 0,
+                        'previous_week': 0,
+                        'variance': 0
+                    }
                     
-                    if value is not None and isinstance(value, (int, float)):
-                        # Convert datetime header to string if needed
-                        if isinstance(date_header, datetime):
-                            date_str = date_header.strftime('%Y-%m-%d')
-                        else:
-                            date_str = str(date_header)
+                    # Extract daily values (columns 2-7)
+                    for col_idx in range(2, 8):
+                        value = row[col_idx - 1]
+                        date_header = headers[col_idx - 1]
                         
-                        row_data['daily_values'][date_str] = int(value)
-                        
-                        # Accumulate daily totals
-                        if date_str not in daily_totals:
-                            daily_totals[date_str] = 0
-                        daily_totals[date_str] += int(value)
-                
-                # Get grand total (column 8)
-                grand_total = sheet.cell(row_idx, 8).value
-                if grand_total and isinstance(grand_total, (int, float)):
-                    row_data['grand_total'] = int(grand_total)
-                
-                # Get previous week (column 9)
-                prev_week = sheet.cell(row_idx, 9).value
-                if prev_week and isinstance(prev_week, (int, float)):
-                    row_data['previous_week'] = int(prev_week)
-                
-                # Calculate variance
-                if row_data['grand_total'] and row_data['previous_week']:
-                    row_data['variance'] = row_data['grand_total'] - row_data['previous_week']
-                    row_data['variance_pct'] = round((row_data['variance'] / row_data['previous_week']) * 100, 2) if row_data['previous_week'] > 0 else 0
-                
-                routes_data.append(row_data)
+                        if value is not None and isinstance(value, (int, float)):
+                            # Convert datetime header to string if needed
+                            if isinstance(date_header, datetime):
+                                date_str = date_header.strftime('%Y-%m-%d')
+                            else:
+                                date_str = str(date_header)
+                            
+                            row_data['daily_values'][date_str] = int(value)
+                            
+                            # Accumulate daily totals
+                            if date_str not in daily_totals:
+                                daily_totals[date_str] = 0
+                            daily_totals[date_str] += int(value)
+                    
+                    # Get grand total (column 8)
+                    grand_total = row[7]
+                    if grand_total and isinstance(grand_total, (int, float)):
+                        row_data['grand_total'] = int(grand_total)
+                    
+                    # Get previous week (column 9)
+                    prev_week = row[8]
+                    if prev_week and isinstance(prev_week, (int, float)):
+                        row_data['previous_week'] = int(prev_week)
+                    
+                    # Calculate variance
+                    if row_data['grand_total'] and row_data['previous_week']:
+                        row_data['variance'] = row_data['grand_total'] - row_data['previous_week']
+                        row_data['variance_pct'] = round((row_data['variance'] / row_data['previous_week']) * 100, 2) if row_data['previous_week'] > 0 else 0
+                    
+                    routes_data.append(row_data)
+        finally:
+            workbook.close()
         
         # Calculate summary metrics
         total_passengers = sum(r['grand_total'] for r in routes_data)
@@ -130,9 +133,34 @@ def get_current_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def save_route_upload(processed_data, filename):
+    """Store processed route data as the active dataset and return the upload summary"""
+    if not processed_data or not processed_data.get('routes'):
+        raise UploadError('No route data found in Excel file')
+    
+    # Deactivate all previous data
+    RouteAnalysisData.query.update({'is_active': False})
+    
+    # Create new route analysis data entry using set_data method
+    route_data = RouteAnalysisData(
+        filename=filename,
+        is_active=True
+    )
+    route_data.set_data(processed_data)
+    
+    db.session.add(route_data)
+    db.session.commit()
+    
+    return {
+        'message': 'File uploaded and processed successfully',
+        'filename': filename,
+        'data_id': route_data.id,
+        'summary': processed_data.get('summary', {})
+    }
+
 @route_analysis_bp.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle Route Analysis Excel file upload (admin only)"""
+    """Handle Route Analysis Excel file upload (admin only). With ?async=1 returns a job id to poll at /api/jobs/<id>"""
     if not session.get('admin_logged_in'):
         return jsonify({'error': 'Admin authentication required'}), 401
     
@@ -150,31 +178,20 @@ def upload_file():
         # Read file content
         file_content = file.read()
         
+        if wants_async_upload():
+            job = upload_jobs.submit('route_analysis', file.filename, process_route_excel_file,
+                                     (file_content, file.filename), save_route_upload, {'filename': file.filename},
+                                     submitted_by=session.get('admin_username'))
+            return jsonify(job.to_dict()), 202
+        
         # Process Excel file
         processed_data = process_route_excel_file(file_content, file.filename)
         
-        if not processed_data or not processed_data.get('routes'):
-            return jsonify({'error': 'No route data found in Excel file'}), 400
+        return jsonify(save_route_upload(processed_data, file.filename))
         
-        # Deactivate all previous data
-        RouteAnalysisData.query.update({'is_active': False})
-        
-        # Create new route analysis data entry using set_data method
-        route_data = RouteAnalysisData(
-            filename=file.filename,
-            is_active=True
-        )
-        route_data.set_data(processed_data)
-        
-        db.session.add(route_data)
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'File uploaded and processed successfully',
-            'filename': file.filename,
-            'data_id': route_data.id,
-            'summary': processed_data.get('summary', {})
-        })
+    except UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
         
     except Exception as e:
         db.session.rollback()
@@ -1,62 +1,70 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db
-from src.models.sales import SalesData, AdminUser
+from src.models.sales import SalesData, SalesTransaction, SalesRollupCell, AdminUser
+from src.routes.charts_redesigned import extract_sales_transactions
+from src.services.sales_cache import sales_cache, chart_response_cache, get_active_dataset
+from src.services.sales_schema import resolve_sales_schema, get_sheet_schema
+from src.services.sales_aggregation import ROLLUP_FIELDS, rollup_cells
+from src.services.excel_ingest import open_workbook, iter_table
+from src.services.upload_jobs import upload_jobs, wants_async_upload, UploadError
 import os
 import json
 from datetime import datetime
 import base64
-import openpyxl
-from io import BytesIO
 
 sales_bp = Blueprint('sales', __name__)
 
 def process_excel_file(file_content, filename):
     """Process Excel file and extract data"""
     try:
-        # Load workbook from bytes
-        workbook = openpyxl.load_workbook(BytesIO(file_content), data_only=True)
+        # Stream the workbook in read-only mode
+        workbook = open_workbook(file_content)
         
-        processed_data = {}
-        
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            
-            # Get headers from first row and clean them (strip whitespace)
-            headers = []
-            for cell in sheet[1]:
-                header = cell.value if cell.value is not None else ''
-                # Clean header - strip whitespace
-                if isinstance(header, str):
-                    header = header.strip()
-                headers.append(header)
-            
-            # Skip sheets with no meaningful headers
-            if not any(headers):
-                continue
+        try:
+            processed_data = {}
             
-            # Get data rows
-            data_rows = []
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if any(cell is not None for cell in row):  # Skip empty rows
-                    row_dict = {}
-                    for i, value in enumerate(row):
-                        if i < len(headers) and headers[i]:
-                            # Convert datetime objects to strings
-                            if hasattr(value, 'strftime'):
-                                value = value.strftime('%Y-%m-%d %H:%M:%S')
-                            # Clean the header name for the key
-                            clean_header = headers[i].strip() if isinstance(headers[i], str) else headers[i]
-                            row_dict[clean_header] = value
-                    if row_dict:  # Only add non-empty rows
-                        data_rows.append(row_dict)
-            
-            # Only add sheets that have data
-            if data_rows:
-                processed_data[sheet_name] = {
-                    'headers': headers,
-                    'data': data_rows,
-                    'row_count': len(data_rows)
-                }
+            for sheet_name in workbook.sheetnames:
+                header_row, rows = iter_table(workbook[sheet_name])
+                
+                # Get headers from first row and clean them (strip whitespace)
+                headers = []
+                for value in header_row:
+                    header = value if value is not None else ''
+                    # Clean header - strip whitespace
+                    if isinstance(header, str):
+                        header = header.strip()
+                    headers.append(header)
+                
+                # Skip sheets with no meaningful headers
+                if not any(headers):
+                    continue
+                
+                # Get data rows
+                data_rows = []
+                for row in rows:
+                    if any(cell is not None for cell in row):  # Skip empty rows
+                        row_dict = {}
+                        for i, value in enumerate(row):
+                            if i < len(headers) and headers[i]:
+                                # Convert datetime objects to strings
+                                if hasattr(value, 'strftime'):
+                                    value = value.strftime('%Y-%m-%d %H:%M:%S')
+                                # Clean the header name for the key
+                                clean_header = headers[i].strip() if isinstance(headers[i], str) else headers[i]
+                                row_dict[clean_header] = value
+                        if row_dict:  # Only add non-empty rows
+                            data_rows.append(row_dict)
+                
+                # Only add sheets that have data
+                if data_rows:
+                    processed_data[sheet_name] = {
+                        'headers': headers,
+                        'schema': resolve_sales_schema(headers),
+                        'data': data_rows,
+                        'row_count': len(data_rows)
+                    }
+        finally:
+            workbook.close()
         
         # If we have a sheet with actual data, prioritize it
         # Look for sheets with meaningful data (more than 10 rows typically)
@@ -77,7 +85,7 @@ def process_excel_file(file_content, filename):
             processed_data = reordered
         
         return processed_data
-        
+    
     except Exception as e:
         print(f"Error processing Excel file: {e}")
         raise e
@@ -86,24 +94,78 @@ def process_excel_file(file_content, filename):
 def get_current_data():
     """Get information about the current active dataset"""
     try:
-        active_data = SalesData.query.filter_by(is_active=True).first()
-        if active_data:
-            data = active_data.get_data()
-            sheets = list(data.keys()) if data else []
+        dataset = get_active_dataset()
+        if dataset:
             return jsonify({
-                'filename': active_data.filename,
-                'upload_date': active_data.upload_date.isoformat(),
-                'sheets': sheets,
-                'total_rows': sum(sheet_data.get('row_count', 0) for sheet_data in data.values()) if data else 0
+                'filename': dataset.filename,
+                'upload_date': dataset.upload_date.isoformat(),
+                'sheets': dataset.sheets,
+                'total_rows': dataset.total_rows
             })
         else:
             return jsonify({'error': 'No data available'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def save_sales_upload(processed_data, filename):
+    """Store a processed workbook as the active dataset and return the upload summary"""
+    if not processed_data:
+        raise UploadError('No data found in Excel file')
+    
+    # Deactivate all previous data
+    SalesData.query.update({'is_active': False})
+    
+    # Create new sales data entry
+    sales_data = SalesData(
+        filename=filename,
+        data_json=json.dumps(processed_data),
+        is_active=True
+    )
+    
+    db.session.add(sales_data)
+    db.session.flush()
+    
+    # Store typed rows so charts can filter and group in SQL
+    transactions = extract_sales_transactions(processed_data)
+    for transaction in transactions:
+        transaction['dataset_id'] = sales_data.id
+    if transactions:
+        db.session.execute(SalesTransaction.__table__.insert(), transactions)
+    
+    # Materialize the rollup cube the chart endpoints answer from
+    cells = [dict(zip(ROLLUP_FIELDS, cell), dataset_id=sales_data.id) for cell in rollup_cells(
+        (t['sale_date'], t['hour'], t['day_name'], t['agent'], t['fop'], t['income']) for t in transactions
+    )]
+    if cells:
+        db.session.execute(SalesRollupCell.__table__.insert(), cells)
+    
+    db.session.commit()
+    
+    # Previously active dataset is no longer served from this worker's caches
+    sales_cache.invalidate()
+    chart_response_cache.invalidate()
+    
+    # Calculate summary statistics
+    total_rows = sum(sheet_data.get('row_count', 0) for sheet_data in processed_data.values())
+    sheets = list(processed_data.keys())
+    
+    return {
+        'message': 'File uploaded and processed successfully',
+        'filename': filename,
+        'data_id': sales_data.id,
+        'sheets': sheets,
+        'total_rows': total_rows,
+        'summary': {
+            'sheets_processed': len(sheets),
+            'total_data_rows': total_rows,
+            'transactions_indexed': len(transactions),
+            'rollup_cells': len(cells)
+        }
+    }
+
 @sales_bp.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle Excel file upload (admin only)"""
+    """Handle Excel file upload (admin only). With ?async=1 returns a job id to poll at /api/jobs/<id>"""
     if not session.get('admin_logged_in'):
         return jsonify({'error': 'Admin authentication required'}), 401
     
@@ -121,41 +183,21 @@ def upload_file():
         # Read file content
         file_content = file.read()
         
+        if wants_async_upload():
+            job = upload_jobs.submit('sales', file.filename, process_excel_file, (file_content, file.filename),
+                                     save_sales_upload, {'filename': file.filename},
+                                     submitted_by=session.get('admin_username'))
+            return jsonify(job.to_dict()), 202
+        
         # Process Excel file
         processed_data = process_excel_file(file_content, file.filename)
         
-        if not processed_data:
-            return jsonify({'error': 'No data found in Excel file'}), 400
-        
-        # Deactivate all previous data
-        SalesData.query.update({'is_active': False})
-        
-        # Create new sales data entry
-        sales_data = SalesData(
-            filename=file.filename,
-            data_json=json.dumps(processed_data),
-            is_active=True
-        )
-        
-        db.session.add(sales_data)
-        db.session.commit()
-        
-        # Calculate summary statistics
-        total_rows = sum(sheet_data.get('row_count', 0) for sheet_data in processed_data.values())
-        sheets = list(processed_data.keys())
-        
-        return jsonify({
-            'message': 'File uploaded and processed successfully',
-            'filename': file.filename,
-            'data_id': sales_data.id,
-            'sheets': sheets,
-            'total_rows': total_rows,
-            'summary': {
-                'sheets_processed': len(sheets),
-                'total_data_rows': total_rows
-            }
-        })
-        
+        return jsonify(save_sales_upload(processed_data, file.filename))
+    
+    except UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         db.session.rollback()
         print(f"Upload error: {e}")
@@ -165,22 +207,20 @@ def upload_file():
 def generate_default_charts():
     """Generate default charts from the active dataset"""
     try:
-        active_data = SalesData.query.filter_by(is_active=True).first()
-        if not active_data:
+        dataset = get_active_dataset()
+        if not dataset:
             return jsonify({'error': 'No active dataset found'}), 404
         
-        # Get the actual data
-        data = active_data.get_data()
-        if not data:
+        if not dataset.data:
             return jsonify({'error': 'No data available'}), 404
         
         # Return success message for now - charts will be generated by the charts endpoint
         return jsonify({
             'message': 'Data is ready for chart generation',
-            'sheets': list(data.keys()),
-            'total_rows': sum(sheet_data.get('row_count', 0) for sheet_data in data.values())
+            'sheets': dataset.sheets,
+            'total_rows': dataset.total_rows
         })
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -188,26 +228,36 @@ def generate_default_charts():
 def debug_data():
     """Debug endpoint to check data structure"""
     try:
-        active_data = SalesData.query.filter_by(is_active=True).first()
-        if not active_data:
+        dataset = get_active_dataset()
+        if not dataset:
             return jsonify({'error': 'No active dataset found'}), 404
         
-        data = active_data.get_data()
-        
         # Return structure info
         debug_info = {}
-        for sheet_name, sheet_data in data.items():
+        for sheet_name, sheet_data in dataset.data.items():
             debug_info[sheet_name] = {
                 'headers': sheet_data.get('headers', []),
+                'schema': get_sheet_schema(sheet_data),
                 'row_count': sheet_data.get('row_count', 0),
                 'sample_row': sheet_data.get('data', [{}])[0] if sheet_data.get('data') else {}
             }
         
         return jsonify({
-            'filename': active_data.filename,
-            'upload_date': active_data.upload_date.isoformat(),
-            'debug_info': debug_info
+            'filename': dataset.filename,
+            'upload_date': dataset.upload_date.isoformat(),
+            'debug_info': debug_info,
+            'cache': sales_cache.stats()
         })
-        
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/debug/cache')
+def debug_cache():
+    """Hit/miss counters of this worker's decoded dataset and chart response caches"""
+    try:
+        stats = sales_cache.stats()
+        stats['chart_responses'] = chart_response_cache.stats()
+        return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,24 @@
+from datetime import datetime
+from src.models.user import db
+from src.models.derived_table import DerivedTable
+
+def table_built(name):
+    """True once the derived table has been rebuilt from every stored record"""
+    return db.session.get(DerivedTable, name) is not None
+
+def mark_built(name, rows=None):
+    """Record a completed rebuild of a derived table. No commit"""
+    db.session.merge(DerivedTable(name=name, rows=rows, built_at=datetime.utcnow()))
+
+def sync_table(name, rebuild, refresh, dates):
+    """
+    Keep a derived table in step with a write to its sources: refresh(dates)
+    once the table is complete, otherwise rebuild() it from everything stored
+    (data saved before the table existed, or before it was tracked here).
+    Runs in the caller's transaction (no commit). Returns the rows written.
+    """
+    if table_built(name):
+        return refresh(dates)
+    rows = rebuild()
+    mark_built(name, rows)
+    return rows
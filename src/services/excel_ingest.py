@@ -0,0 +1,133 @@
+from datetime import datetime
+from io import BytesIO
+import threading
+import openpyxl
+
+# Per-thread RowProgress installed by upload jobs, see track_row_progress
+_progress = threading.local()
+
+class RowProgress:
+    """
+    Counts the rows streamed by open_workbook / iter_rows and calls
+    callback(rows_read, rows_expected) every `interval` rows. rows_expected
+    comes from the stored sheet dimensions, so it is only an estimate.
+    """
+    
+    def __init__(self, callback, interval=2000):
+        self.callback = callback
+        self.interval = interval
+        self.rows_read = 0
+        self.rows_expected = 0
+    
+    def expect(self, workbook):
+        for sheet in workbook.worksheets:
+            try:
+                self.rows_expected += sheet.max_row or 0
+            except Exception:
+                pass
+    
+    def advance(self):
+        self.rows_read += 1
+        if self.rows_read % self.interval == 0:
+            self.callback(self.rows_read, self.rows_expected)
+
+def track_row_progress(progress):
+    """Report the rows this thread streams to a RowProgress (None stops reporting)"""
+    _progress.current = progress
+
+def current_row_progress():
+    return getattr(_progress, 'current', None)
+
+def open_workbook(file_content):
+    """
+    Open an uploaded workbook in openpyxl's streaming read-only mode.
+    Cell values are read lazily, sheet by sheet, so memory stays bounded by
+    what the caller keeps rather than by the size of the workbook.
+    Read-only workbooks keep the archive open: call close() when done.
+    """
+    workbook = openpyxl.load_workbook(BytesIO(file_content), read_only=True, data_only=True)
+    progress = current_row_progress()
+    if progress is not None:
+        progress.expect(workbook)
+    return workbook
+
+def iter_rows(sheet, min_row=1, width=None, converters=None):
+    """
+    Yield the rows of a sheet as tuples of cell values, starting at min_row (1-based).
+    
+    width pads short rows with None (read-only rows stop at the last stored cell)
+    so callers can index columns directly. converters is an optional sequence of
+    callables (or None) applied column-wise, turning each row into a typed tuple.
+    """
+    # Don't trust the stored sheet dimensions: some writers get them wrong and
+    # read-only mode would silently truncate rows to them
+    sheet.reset_dimensions()
+    progress = current_row_progress()
+    for row in sheet.iter_rows(min_row=min_row, values_only=True):
+        if progress is not None:
+            progress.advance()
+        if width is not None:
+            row = pad_row(row, width)
+        if converters is not None:
+            row = convert_row(row, converters)
+        yield row
+
+def pad_row(row, width):
+    """Pad a row tuple with None up to width cells"""
+    if len(row) < width:
+        return row + (None,) * (width - len(row))
+    return row
+
+def convert_row(row, converters):
+    """Apply per-column converters (None leaves a column as is) to a row tuple"""
+    return tuple(
+        converter(value) if converter is not None else value
+        for converter, value in zip(converters, row)
+    ) + row[len(converters):]
+
+def iter_table(sheet, header_row=1, width=None, converters=None):
+    """
+    Split a sheet into its header row and an iterator over the rows below it.
+    Data rows are padded to the header width (or width, if larger), like
+    full-mode openpyxl pads every row to the sheet's last column.
+    """
+    rows = iter_rows(sheet, min_row=header_row)
+    header = next(rows, ())
+    width = max(width or 0, len(header))
+    
+    def data_rows():
+        for row in rows:
+            row = pad_row(row, width)
+            if converters is not None:
+                row = convert_row(row, converters)
+            yield row
+    
+    return header, data_rows()
+
+def iter_sheet_rows(file_content, sheet_name=None, min_row=1, width=None, converters=None):
+    """
+    Yield the rows of one sheet of an uploaded workbook (the active sheet by default),
+    closing the workbook when the iteration finishes
+    """
+    workbook = open_workbook(file_content)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        yield from iter_rows(sheet, min_row, width, converters)
+    finally:
+        workbook.close()
+
+def as_int(value):
+    """Integer cell value, 0 for empty cells"""
+    return int(value) if value else 0
+
+def as_text(value):
+    """String cell value, None for empty cells"""
+    return str(value) if value else None
+
+def as_date(value):
+    """Date of a datetime or YYYY-MM-DD cell, None for empty cells"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
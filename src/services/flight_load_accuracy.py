@@ -0,0 +1,143 @@
+from sqlalchemy import func
+from src.models.user import db
+from src.models.flight_load import FlightLoadRecord, FlightLoadAccuracy
+from src.models.manifest import DailyManifest
+from src.services.network import normalize_flight_no, station_of
+from src.services.sales_schema import DAYS_ORDER
+from src.services.derived_tables import table_built, sync_table
+
+def record_accuracy(dates):
+    """
+    Pair the manifest actuals of the given travel dates with their forecasts.
+    A flight-day's first pairing captures the forecast in force at that time;
+    later manifest corrections only update the actual. Manifest days without a
+    forecast are paired once one is uploaded. Runs in the caller's transaction
+    (no commit). Returns the number of accuracy rows written.
+    """
+    dates = set(day for day in dates if day)
+    if not dates:
+        return 0
+    first, last = min(dates), max(dates)
+    
+    actuals = {}
+    manifests = db.session.query(
+        DailyManifest.flight_date, DailyManifest.flight_number, DailyManifest.total_passengers
+    ).filter(DailyManifest.flight_date.between(first, last))
+    for flight_date, flight_number, total_passengers in manifests:
+        if flight_date in dates:
+            actuals[(flight_date, normalize_flight_no(flight_number))] = total_passengers or 0
+    if not actuals:
+        return 0
+    
+    existing = {
+        (row.travel_date, row.flight_no): row
+        for row in FlightLoadAccuracy.query.filter(FlightLoadAccuracy.travel_date.between(first, last))
+    }
+    forecasts = {
+        (travel_date, flight_no): pax or 0
+        for travel_date, flight_no, pax in db.session.query(
+            FlightLoadRecord.travel_date, FlightLoadRecord.flight_no, FlightLoadRecord.pax
+        ).filter(
+            FlightLoadRecord.data_source == 'forecast',
+            FlightLoadRecord.travel_date.between(first, last)
+        )
+    }
+    
+    written = 0
+    for key, actual_pax in actuals.items():
+        row = existing.get(key)
+        if row is None:
+            if key not in forecasts:
+                continue
+            row = FlightLoadAccuracy(
+                station=station_of(key[1]),
+                travel_date=key[0],
+                flight_no=key[1],
+                weekday=key[0].weekday(),
+                forecast_pax=forecasts[key]
+            )
+            db.session.add(row)
+        elif row.actual_pax == actual_pax:
+            continue
+        row.set_actual(actual_pax)
+        written += 1
+    
+    return written
+
+def backfill_accuracy():
+    """Pair every stored manifest with its forecast (data uploaded before accuracy tracking). No commit"""
+    dates = set(day for (day,) in db.session.query(DailyManifest.flight_date).distinct())
+    return record_accuracy(dates)
+
+def sync_accuracy(dates):
+    """
+    record_accuracy for the travel dates of an upload; pairs every stored
+    manifest instead while the table isn't complete (see sync_table). Rows
+    already paired keep their captured forecast either way. No commit
+    """
+    return sync_table(FlightLoadAccuracy.__tablename__, backfill_accuracy, record_accuracy, dates)
+
+def accuracy_ready():
+    """True once every stored manifest has been paired with its forecast (backfilled at least once)"""
+    return table_built(FlightLoadAccuracy.__tablename__)
+
+def summarize_errors(totals):
+    """Metrics of summed error terms: MAPE and WAPE in %, MAE and bias in passengers per flight"""
+    flights, measured, abs_pct_errors, abs_errors, errors, actual_pax, forecast_pax = totals
+    return {
+        'flights': flights,
+        'mape': round(abs_pct_errors / measured, 2) if measured else None,
+        'wape': round(abs_errors / actual_pax * 100, 2) if actual_pax else None,
+        'mae': round(abs_errors / flights, 2) if flights else None,
+        'bias': round(errors / flights, 2) if flights else None,
+        'bias_pct': round(errors / actual_pax * 100, 2) if actual_pax else None,
+        'forecast_pax': forecast_pax,
+        'actual_pax': actual_pax
+    }
+
+def accuracy_metrics(start_date=None, end_date=None, flight_no=None, station=None):
+    """
+    Forecast accuracy over an inclusive travel date range, optionally of one
+    station or flight: overall, per weekday and per flight. One GROUP BY (flight_no, weekday) query over the stored
+    error terms; the breakdowns are merged from its few rows.
+    """
+    query = db.session.query(
+        FlightLoadAccuracy.flight_no,
+        FlightLoadAccuracy.weekday,
+        func.count(FlightLoadAccuracy.id),
+        func.count(FlightLoadAccuracy.abs_pct_error),
+        func.coalesce(func.sum(FlightLoadAccuracy.abs_pct_error), 0.0),
+        func.coalesce(func.sum(func.abs(FlightLoadAccuracy.error)), 0),
+        func.coalesce(func.sum(FlightLoadAccuracy.error), 0),
+        func.coalesce(func.sum(FlightLoadAccuracy.actual_pax), 0),
+        func.coalesce(func.sum(FlightLoadAccuracy.forecast_pax), 0)
+    )
+    if start_date:
+        query = query.filter(FlightLoadAccuracy.travel_date >= start_date)
+    if end_date:
+        query = query.filter(FlightLoadAccuracy.travel_date <= end_date)
+    if flight_no:
+        query = query.filter(FlightLoadAccuracy.flight_no == flight_no)
+    if station:
+        query = query.filter(FlightLoadAccuracy.station == station)
+    
+    overall = [0] * 7
+    by_weekday = {}
+    by_flight = {}
+    for row in query.group_by(FlightLoadAccuracy.flight_no, FlightLoadAccuracy.weekday):
+        flight, weekday, sums = row[0], row[1], row[2:]
+        for totals in (overall, by_weekday.setdefault(weekday, [0] * 7), by_flight.setdefault(flight, [0] * 7)):
+            for i, value in enumerate(sums):
+                totals[i] += value
+    
+    return {
+        'overall': summarize_errors(overall),
+        'by_weekday': [
+            dict(summarize_errors(by_weekday[weekday]), weekday=DAYS_ORDER[weekday])
+            for weekday in sorted(by_weekday)
+        ],
+        'by_flight': [
+            dict(summarize_errors(by_flight[flight]), flight=f"ET{flight}")
+            for flight in sorted(by_flight)
+        ]
+    }
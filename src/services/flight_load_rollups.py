@@ -0,0 +1,97 @@
+from datetime import date, datetime, timedelta
+from src.models.user import db
+from src.models.flight_load import FlightLoadRecord, FlightLoadRollup
+from src.models.manifest import DailyManifest
+from src.services.flight_load_view import merged_flight_days
+from src.services.network import station_of
+from src.services.derived_tables import table_built, sync_table
+
+ROLLUP_PERIODS = ('weekly', 'monthly')
+
+# Measures summed into a rollup
+ROLLUP_MEASURES = ('c_cap', 'y_cap', 'tot_cap', 'pax_c', 'pax_y', 'pax')
+
+def period_start(day, period_type):
+    """Monday of the ISO week or first day of the month containing day"""
+    if period_type == 'weekly':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+def period_end(start, period_type):
+    """Last day of the period starting at start"""
+    if period_type == 'weekly':
+        return start + timedelta(days=6)
+    next_month = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return next_month - timedelta(days=1)
+
+def refresh_rollups(dates):
+    """
+    Recompute the weekly and monthly rollups of every period containing one of
+    dates, from the forecast and manifest tables. Runs in the caller's
+    transaction (no commit). Returns the number of rollup rows written.
+    """
+    dates = set(day for day in dates if day)
+    if not dates:
+        return 0
+    
+    periods = set((period_type, period_start(day, period_type)) for day in dates for period_type in ROLLUP_PERIODS)
+    first = min(start for _, start in periods)
+    last = max(period_end(start, period_type) for period_type, start in periods)
+    
+    totals = {}
+    for (day, flight_no), row in merged_flight_days(first, last).items():
+        for period_type in ROLLUP_PERIODS:
+            key = (period_type, period_start(day, period_type))
+            if key not in periods:
+                continue
+            total = totals.setdefault((flight_no,) + key, [0] * (len(ROLLUP_MEASURES) + 2))
+            total[0] += 1
+            total[1] += 1 if row['data_source'] == 'manifest' else 0
+            for i, measure in enumerate(ROLLUP_MEASURES):
+                total[i + 2] += row[measure] or 0
+    
+    # Replace the affected periods, so periods that lost all their flights disappear too
+    table = FlightLoadRollup.__table__
+    for period_type in ROLLUP_PERIODS:
+        starts = [start for kind, start in periods if kind == period_type]
+        db.session.execute(table.delete().where(
+            table.c.period_type == period_type,
+            table.c.period_start.in_(starts)
+        ))
+    
+    updated_at = datetime.utcnow()
+    rows = []
+    for (flight_no, period_type, start), total in totals.items():
+        row = {
+            'station': station_of(flight_no),
+            'flight_no': flight_no,
+            'period_type': period_type,
+            'period_start': start,
+            'flights': total[0],
+            'actual_flights': total[1],
+            'updated_at': updated_at
+        }
+        row.update(zip(ROLLUP_MEASURES, total[2:]))
+        rows.append(row)
+    if rows:
+        db.session.execute(table.insert(), rows)
+    
+    return len(rows)
+
+def rebuild_rollups():
+    """Recompute every rollup from scratch (e.g. for data uploaded before rollups existed). No commit"""
+    db.session.execute(FlightLoadRollup.__table__.delete())
+    dates = set(day for (day,) in db.session.query(FlightLoadRecord.travel_date).distinct())
+    dates.update(day for (day,) in db.session.query(DailyManifest.flight_date).distinct())
+    return refresh_rollups(dates)
+
+def sync_rollups(dates):
+    """
+    refresh_rollups for the travel dates of an upload; rebuilds every rollup
+    instead while the table isn't complete (see sync_table). No commit
+    """
+    return sync_table(FlightLoadRollup.__tablename__, rebuild_rollups, refresh_rollups, dates)
+
+def rollups_ready():
+    """True once every stored flight-day has been rolled up (rebuilt at least once)"""
+    return table_built(FlightLoadRollup.__tablename__)
@@ -0,0 +1,216 @@
+import numpy as np
+from src.models.user import db
+from src.models.flight_load import FlightLoadView
+from src.services.flight_load_store import filter_flight_loads
+from src.services.network import normalize_flight_no
+from src.services.sales_schema import DAYS_ORDER
+
+# Typical (business, economy) seat configurations; scenarios can also give c_cap / y_cap directly
+AIRCRAFT_CONFIGS = {
+    '787-8': (24, 246),
+    '787-9': (30, 285),
+    'A350-900': (30, 313),
+    '737-800': (16, 138),
+    '737-MAX8': (16, 144)
+}
+
+MAX_SCENARIOS = 100
+
+# Seat factor histogram: ten 10-point buckets, 100% falls in the last one
+SEAT_FACTOR_BINS = [f'{low}-{low + 10}%' for low in range(0, 100, 10)]
+
+# Cells (scenarios x flight-days) per batched pass, bounds the temporary matrices
+BATCH_CELLS = 2000000
+
+class ScenarioError(ValueError):
+    """A scenario that can't be simulated, reported as a 400"""
+    pass
+
+def load_history(start_date=None, end_date=None, flight_no=None, station=None):
+    """Best-known flight-day loads as NumPy columns (one query, no ORM objects)"""
+    query = db.session.query(
+        FlightLoadView.travel_date, FlightLoadView.flight_no,
+        FlightLoadView.c_cap, FlightLoadView.y_cap,
+        FlightLoadView.pax_c, FlightLoadView.pax_y
+    )
+    rows = filter_flight_loads(query, start_date, end_date, flight_no, station=station).all()
+    
+    days = np.array([row[0].toordinal() for row in rows], dtype=np.int64)
+    history = {
+        'days': days,
+        'weekday': (days - 1) % 7,  # date.toordinal(): day 1 (0001-01-01) is a Monday
+        'flight_no': np.array([row[1] for row in rows], dtype=object),
+    }
+    for i, name in enumerate(('c_cap', 'y_cap', 'pax_c', 'pax_y'), start=2):
+        history[name] = np.array([row[i] or 0 for row in rows], dtype=np.float64)
+    return history
+
+def parse_weekday(value):
+    """0-6 (Monday = 0) from an index or a day name such as 'Tuesday' / 'tue'"""
+    if isinstance(value, int) and 0 <= value <= 6:
+        return value
+    name = str(value).strip().lower()
+    for index, day in enumerate(DAYS_ORDER):
+        if name and day.lower().startswith(name[:3]):
+            return index
+    raise ScenarioError(f'Invalid weekday: {value}')
+
+def parse_scenario(index, scenario):
+    """Validated scenario: capacity per cabin and its flight / weekday / date selection"""
+    if not isinstance(scenario, dict):
+        raise ScenarioError(f'Scenario {index + 1} must be an object')
+    name = scenario.get('name') or f'Scenario {index + 1}'
+    
+    aircraft = scenario.get('aircraft')
+    if aircraft:
+        if aircraft not in AIRCRAFT_CONFIGS:
+            raise ScenarioError(f'{name}: unknown aircraft {aircraft} (known: {", ".join(AIRCRAFT_CONFIGS)})')
+        c_cap, y_cap = AIRCRAFT_CONFIGS[aircraft]
+    else:
+        c_cap, y_cap = None, None
+    try:
+        c_cap = int(scenario.get('c_cap', c_cap))
+        y_cap = int(scenario.get('y_cap', y_cap))
+    except (TypeError, ValueError):
+        raise ScenarioError(f'{name}: give an aircraft or c_cap and y_cap')
+    if c_cap < 0 or y_cap < 0 or c_cap + y_cap == 0:
+        raise ScenarioError(f'{name}: capacity must be positive')
+    
+    def selection(key):
+        value = scenario.get(key) or []
+        if not isinstance(value, list):
+            raise ScenarioError(f'{name}: {key} must be a list')
+        return value
+    
+    def date_bound(key):
+        value = scenario.get(key)
+        if not value:
+            return None
+        try:
+            return np.datetime64(value, 'D').astype('O').toordinal()
+        except ValueError:
+            raise ScenarioError(f'{name}: invalid {key} {value} (expected YYYY-MM-DD)')
+    
+    return {
+        'name': name,
+        'aircraft': aircraft,
+        'c_cap': c_cap,
+        'y_cap': y_cap,
+        'flights': [normalize_flight_no(flight) for flight in selection('flights')],
+        'weekdays': [parse_weekday(day) for day in selection('weekdays')],
+        'start': date_bound('start_date'),
+        'end': date_bound('end_date')
+    }
+
+def scenario_mask(history, scenario):
+    """Flight-days a scenario applies to"""
+    mask = np.ones(len(history['days']), dtype=bool)
+    if scenario['flights']:
+        mask &= np.isin(history['flight_no'], scenario['flights'])
+    if scenario['weekdays']:
+        mask &= np.isin(history['weekday'], scenario['weekdays'])
+    if scenario['start'] is not None:
+        mask &= history['days'] >= scenario['start']
+    if scenario['end'] is not None:
+        mask &= history['days'] <= scenario['end']
+    return mask
+
+def ratio(numerator, denominator):
+    """Element-wise numerator / denominator * 100, 0 where the denominator is 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator * 100, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape), where=denominator > 0)
+
+def simulate_batch(history, scenarios):
+    """
+    Evaluate scenarios in one vectorized pass over an (scenarios x flight-days)
+    grid. Carried passengers are the observed ones capped by the scenario's
+    seats; the rest are spill. Returns one metrics dict per scenario.
+    """
+    masks = np.stack([scenario_mask(history, scenario) for scenario in scenarios])  # S x N
+    weights = masks.astype(np.float64)
+    sim_c = np.array([scenario['c_cap'] for scenario in scenarios], dtype=np.float64)[:, None]
+    sim_y = np.array([scenario['y_cap'] for scenario in scenarios], dtype=np.float64)[:, None]
+    pax_c, pax_y = history['pax_c'][None, :], history['pax_y'][None, :]
+    cap_c, cap_y = history['c_cap'][None, :], history['y_cap'][None, :]
+    
+    carried_c = np.minimum(pax_c, sim_c)
+    carried_y = np.minimum(pax_y, sim_y)
+    spill_c = pax_c - carried_c
+    spill_y = pax_y - carried_y
+    
+    # Per-scenario totals over the selected flight-days (matrix-vector products)
+    flights = weights.sum(axis=1)
+    base_pax_c = weights @ history['pax_c']
+    base_pax_y = weights @ history['pax_y']
+    base_seats_c = weights @ history['c_cap']
+    base_seats_y = weights @ history['y_cap']
+    sim_pax_c = (weights * carried_c).sum(axis=1)
+    sim_pax_y = (weights * carried_y).sum(axis=1)
+    sim_spill_c = (weights * spill_c).sum(axis=1)
+    sim_spill_y = (weights * spill_y).sum(axis=1)
+    spilled_flights = (masks & ((spill_c + spill_y) > 0)).sum(axis=1)
+    # Flights already full in their actual config: observed pax understate demand there
+    constrained = (masks & ((pax_c + pax_y) >= (cap_c + cap_y)) & ((cap_c + cap_y) > 0)).sum(axis=1)
+    
+    # Seat factor distribution of the simulated flights
+    seat_factor = ratio(carried_c + carried_y, sim_c + sim_y)
+    buckets = np.minimum((seat_factor // 10).astype(np.int64), len(SEAT_FACTOR_BINS) - 1)
+    offsets = np.arange(len(scenarios))[:, None] * len(SEAT_FACTOR_BINS)
+    histogram = np.bincount((buckets + offsets)[masks], minlength=len(scenarios) * len(SEAT_FACTOR_BINS))
+    histogram = histogram.reshape(len(scenarios), len(SEAT_FACTOR_BINS))
+    mean_seat_factor = np.divide((seat_factor * weights).sum(axis=1), flights, out=np.zeros(len(scenarios)), where=flights > 0)
+    
+    base_lf = ratio(base_pax_c + base_pax_y, base_seats_c + base_seats_y)
+    base_lf_c = ratio(base_pax_c, base_seats_c)
+    base_lf_y = ratio(base_pax_y, base_seats_y)
+    sim_seats_c = flights * sim_c[:, 0]
+    sim_seats_y = flights * sim_y[:, 0]
+    sim_lf = ratio(sim_pax_c + sim_pax_y, sim_seats_c + sim_seats_y)
+    sim_lf_c = ratio(sim_pax_c, sim_seats_c)
+    sim_lf_y = ratio(sim_pax_y, sim_seats_y)
+    
+    results = []
+    for s, scenario in enumerate(scenarios):
+        results.append({
+            'name': scenario['name'],
+            'aircraft': scenario['aircraft'],
+            'capacity': {'c_cap': scenario['c_cap'], 'y_cap': scenario['y_cap'], 'tot_cap': scenario['c_cap'] + scenario['y_cap']},
+            'flights': int(flights[s]),
+            'baseline': {
+                'pax': int(base_pax_c[s] + base_pax_y[s]),
+                'seats': int(base_seats_c[s] + base_seats_y[s]),
+                'lf': round(float(base_lf[s]), 2),
+                'lf_c': round(float(base_lf_c[s]), 2),
+                'lf_y': round(float(base_lf_y[s]), 2),
+                'constrained_flights': int(constrained[s])
+            },
+            'simulated': {
+                'pax_carried': int(sim_pax_c[s] + sim_pax_y[s]),
+                'seats': int(sim_seats_c[s] + sim_seats_y[s]),
+                'lf': round(float(sim_lf[s]), 2),
+                'lf_c': round(float(sim_lf_c[s]), 2),
+                'lf_y': round(float(sim_lf_y[s]), 2),
+                'spill': int(sim_spill_c[s] + sim_spill_y[s]),
+                'spill_c': int(sim_spill_c[s]),
+                'spill_y': int(sim_spill_y[s]),
+                'spilled_flights': int(spilled_flights[s]),
+                'mean_seat_factor': round(float(mean_seat_factor[s]), 2)
+            },
+            'seat_factor_distribution': dict(zip(SEAT_FACTOR_BINS, histogram[s].tolist()))
+        })
+    return results
+
+def simulate_scenarios(history, scenarios):
+    """Parse and evaluate scenarios, in batches that keep the grid under BATCH_CELLS cells"""
+    if not scenarios:
+        raise ScenarioError('At least one scenario required')
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ScenarioError(f'At most {MAX_SCENARIOS} scenarios per request')
+    parsed = [parse_scenario(index, scenario) for index, scenario in enumerate(scenarios)]
+    
+    batch_size = max(1, BATCH_CELLS // max(1, len(history['days'])))
+    results = []
+    for i in range(0, len(parsed), batch_size):
+        results.extend(simulate_batch(history, parsed[i:i + batch_size]))
+    return results
@@ -0,0 +1,127 @@
+from datetime import datetime, time
+from sqlalchemy import func, and_
+from src.models.user import db
+from src.models.flight_load import FlightLoadRecord, FlightLoadSnapshot, FlightLoadSnapshotCell
+from src.services.flight_load_store import FORECAST_FIELDS, UPSERT_BATCH_SIZE
+
+def record_snapshot(changed, cells_uploaded, filename=None, uploaded_by=None, baseline=False, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Store an upload as a new snapshot whose cells are the changed forecast rows
+    (dicts with travel_date, flight_no and FORECAST_FIELDS). No commit.
+    """
+    snapshot = FlightLoadSnapshot(
+        filename=filename,
+        uploaded_by=uploaded_by,
+        uploaded_at=datetime.utcnow(),
+        cells_changed=len(changed),
+        cells_uploaded=cells_uploaded,
+        baseline=baseline
+    )
+    db.session.add(snapshot)
+    db.session.flush()
+    
+    cells = []
+    for row in changed:
+        cell = {'snapshot_id': snapshot.id, 'travel_date': row['travel_date'], 'flight_no': row['flight_no']}
+        for field in FORECAST_FIELDS:
+            cell[field] = row.get(field)
+        cells.append(cell)
+    for i in range(0, len(cells), batch_size):
+        db.session.execute(FlightLoadSnapshotCell.__table__.insert(), cells[i:i + batch_size])
+    
+    return snapshot
+
+def ensure_baseline_snapshot():
+    """
+    Before the first versioned upload, store the forecasts already in
+    flight_load_records as a baseline snapshot, so later deltas have a base. No commit.
+    """
+    if db.session.query(FlightLoadSnapshot.id).first() is not None:
+        return None
+    
+    names = ('travel_date', 'flight_no') + FORECAST_FIELDS
+    rows = [
+        dict(zip(names, values))
+        for values in db.session.query(*[getattr(FlightLoadRecord, name) for name in names])
+        .filter(FlightLoadRecord.data_source == 'forecast')
+    ]
+    if not rows:
+        return None
+    return record_snapshot(rows, len(rows), filename='(stored before versioning)', baseline=True)
+
+def resolve_snapshot(snapshot_id=None, as_of=None):
+    """
+    Snapshot with the given id, else the last one uploaded on or before the
+    as_of date (end of that day), else the latest. None if there is none.
+    """
+    if snapshot_id is not None:
+        return db.session.get(FlightLoadSnapshot, snapshot_id)
+    query = FlightLoadSnapshot.query
+    if as_of is not None:
+        query = query.filter(FlightLoadSnapshot.uploaded_at <= datetime.combine(as_of, time.max))
+    return query.order_by(FlightLoadSnapshot.id.desc()).first()
+
+def cell_as_of(travel_date, flight_no, snapshot_id):
+    """Forecast of one (date, flight) as of a snapshot: one probe of the (cell, version) index"""
+    return FlightLoadSnapshotCell.query.filter(
+        FlightLoadSnapshotCell.travel_date == travel_date,
+        FlightLoadSnapshotCell.flight_no == flight_no,
+        FlightLoadSnapshotCell.snapshot_id <= snapshot_id
+    ).order_by(FlightLoadSnapshotCell.snapshot_id.desc()).first()
+
+def forecast_as_of(snapshot_id, start_date=None, end_date=None, flight_no=None, flight_nos=None):
+    """
+    Forecast cells as of a snapshot, by date and flight: for each cell the
+    newest version with snapshot_id <= the requested one. flight_nos limits
+    the cells to a set of flights (e.g. one station's).
+    """
+    latest = db.session.query(
+        FlightLoadSnapshotCell.travel_date,
+        FlightLoadSnapshotCell.flight_no,
+        func.max(FlightLoadSnapshotCell.snapshot_id).label('snapshot_id')
+    ).filter(FlightLoadSnapshotCell.snapshot_id <= snapshot_id)
+    if start_date:
+        latest = latest.filter(FlightLoadSnapshotCell.travel_date >= start_date)
+    if end_date:
+        latest = latest.filter(FlightLoadSnapshotCell.travel_date <= end_date)
+    if flight_no:
+        latest = latest.filter(FlightLoadSnapshotCell.flight_no == flight_no)
+    if flight_nos is not None:
+        latest = latest.filter(FlightLoadSnapshotCell.flight_no.in_(flight_nos))
+    latest = latest.group_by(FlightLoadSnapshotCell.travel_date, FlightLoadSnapshotCell.flight_no).subquery()
+    
+    return FlightLoadSnapshotCell.query.join(latest, and_(
+        FlightLoadSnapshotCell.travel_date == latest.c.travel_date,
+        FlightLoadSnapshotCell.flight_no == latest.c.flight_no,
+        FlightLoadSnapshotCell.snapshot_id == latest.c.snapshot_id
+    )).order_by(FlightLoadSnapshotCell.travel_date, FlightLoadSnapshotCell.flight_no).all()
+
+def snapshot_changes(snapshot):
+    """Cells a snapshot changed, each with the pax it replaced (None for new cells)"""
+    cells = FlightLoadSnapshotCell.query.filter(FlightLoadSnapshotCell.snapshot_id == snapshot.id).order_by(
+        FlightLoadSnapshotCell.travel_date, FlightLoadSnapshotCell.flight_no
+    ).all()
+    if not cells:
+        return []
+    
+    previous = {
+        (cell.travel_date, cell.flight_no): cell
+        for cell in forecast_as_of(snapshot.id - 1, cells[0].travel_date, cells[-1].travel_date)
+    }
+    changes = []
+    for cell in cells:
+        before = previous.get((cell.travel_date, cell.flight_no))
+        change = cell.to_dict()
+        change['previous_pax'] = before.pax if before else None
+        change['pax_change'] = (cell.pax or 0) - (before.pax or 0) if before else None
+        changes.append(change)
+    return changes
+
+def cell_history(travel_date, flight_no):
+    """Every version of one (date, flight) forecast, oldest first, with its upload time"""
+    return db.session.query(FlightLoadSnapshotCell, FlightLoadSnapshot.uploaded_at).join(
+        FlightLoadSnapshot, FlightLoadSnapshot.id == FlightLoadSnapshotCell.snapshot_id
+    ).filter(
+        FlightLoadSnapshotCell.travel_date == travel_date,
+        FlightLoadSnapshotCell.flight_no == flight_no
+    ).order_by(FlightLoadSnapshotCell.snapshot_id).all()
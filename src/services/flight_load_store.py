@@ -0,0 +1,155 @@
+from datetime import datetime
+from sqlalchemy import func
+from src.models.user import db
+from src.models.flight_load import FlightLoadRecord, FlightLoadView
+
+# Data columns a forecast upload writes (see FlightLoadRecord.update_from_dict)
+FORECAST_FIELDS = ('day', 'c_cap', 'y_cap', 'tot_cap', 'pax_c', 'pax_y', 'pax', 'lf_c', 'lf_y', 'lf')
+
+# Rows per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 500
+
+def dialect_insert(table):
+    """INSERT construct of the bound database's dialect (both support ON CONFLICT DO UPDATE)"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+def forecast_row(record, upload_date):
+    """Column values of a parsed forecast record, as written by the upsert"""
+    row = {
+        'travel_date': datetime.strptime(record['travel_date'], '%Y-%m-%d').date(),
+        'flight_no': record['flight_no'],
+        'data_source': 'forecast',
+        'upload_date': upload_date
+    }
+    for field in FORECAST_FIELDS:
+        row[field] = record.get(field)
+    return row
+
+def upsert_forecast_records(records, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Insert or update parsed forecast records in bulk, keyed by (travel_date, flight_no).
+    
+    Existing rows in the uploaded date range are fetched with one query to
+    classify each record: new rows are inserted, changed forecast rows updated,
+    and unchanged rows left alone. Rows that came from a manifest are never
+    overwritten, which the ON CONFLICT ... WHERE clause also enforces in the
+    database. Does not commit. Returns the row counts, the rows written
+    and their travel dates.
+    """
+    upload_date = datetime.utcnow()
+    
+    # One row per key; a later record for the same flight and date wins
+    rows = {}
+    invalid = 0
+    for record in records:
+        try:
+            row = forecast_row(record, upload_date)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Error saving record: {e}")
+            invalid += 1
+            continue
+        rows[(row['travel_date'], row['flight_no'])] = row
+    
+    inserted = updated = skipped_manifest = unchanged = 0
+    pending = []
+    
+    if rows:
+        dates = [key[0] for key in rows]
+        columns = [getattr(FlightLoadRecord, field) for field in FORECAST_FIELDS]
+        existing = {
+            (stored.travel_date, stored.flight_no): stored
+            for stored in db.session.query(
+                FlightLoadRecord.travel_date, FlightLoadRecord.flight_no, FlightLoadRecord.data_source, *columns
+            ).filter(FlightLoadRecord.travel_date.between(min(dates), max(dates)))
+        }
+        
+        for key, row in rows.items():
+            stored = existing.get(key)
+            if stored is None:
+                inserted += 1
+            elif stored.data_source == 'manifest':
+                skipped_manifest += 1
+                continue
+            elif all(getattr(stored, field) == row[field] for field in FORECAST_FIELDS):
+                unchanged += 1
+                continue
+            else:
+                updated += 1
+            pending.append(row)
+    
+    if pending:
+        table = FlightLoadRecord.__table__
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.travel_date, table.c.flight_no],
+            set_={name: statement.excluded[name] for name in FORECAST_FIELDS + ('data_source', 'upload_date')},
+            where=table.c.data_source != 'manifest'
+        )
+        for i in range(0, len(pending), batch_size):
+            db.session.execute(statement, pending[i:i + batch_size])
+    
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'skipped': skipped_manifest + unchanged + invalid,
+        'skipped_manifest': skipped_manifest,
+        'unchanged': unchanged,
+        'invalid': invalid,
+        'dates': set(row['travel_date'] for row in pending),
+        'changed': pending
+    }
+
+def filter_flight_loads(query, start_date=None, end_date=None, flight_no=None, model=FlightLoadView, station=None):
+    """
+    Restrict a query on model (the merged view by default) to an inclusive
+    travel date range, one flight and one station (models with a station column)
+    """
+    if station:
+        query = query.filter(model.station == station)
+    if start_date:
+        query = query.filter(model.travel_date >= start_date)
+    if end_date:
+        query = query.filter(model.travel_date <= end_date)
+    if flight_no:
+        query = query.filter(model.flight_no == flight_no)
+    return query
+
+def flight_totals(start_date=None, end_date=None, station=None):
+    """
+    Best-known passenger, capacity and flight counts per flight number, computed by
+    the database in one GROUP BY query: {flight_no: {'total_pax', 'total_capacity', 'flights_count'}}
+    """
+    query = db.session.query(
+        FlightLoadView.flight_no,
+        func.coalesce(func.sum(FlightLoadView.pax), 0),
+        func.coalesce(func.sum(FlightLoadView.tot_cap), 0),
+        func.count(FlightLoadView.id)
+    )
+    query = filter_flight_loads(query, start_date, end_date, station=station).group_by(FlightLoadView.flight_no)
+    
+    return {
+        flight_no: {'total_pax': int(pax), 'total_capacity': int(capacity), 'flights_count': count}
+        for flight_no, pax, capacity, count in query
+    }
+
+def flight_load_stats(start_date=None, end_date=None, flight_no=None, station=None):
+    """
+    Flight-day count, best-known passengers (actual where a manifest exists,
+    forecast otherwise) and mean load factor, in one aggregate query on the view
+    """
+    query = db.session.query(
+        func.count(FlightLoadView.id),
+        func.coalesce(func.sum(FlightLoadView.pax), 0),
+        func.avg(func.coalesce(FlightLoadView.lf, 0.0))
+    )
+    count, total_passengers, avg_load_factor = filter_flight_loads(query, start_date, end_date, flight_no, station=station).one()
+    
+    return {
+        'record_count': count,
+        'total_passengers': int(total_passengers),
+        'avg_load_factor': float(avg_load_factor) if avg_load_factor is not None else 0
+    }
@@ -0,0 +1,108 @@
+from datetime import datetime
+from src.models.user import db
+from src.models.flight_load import FlightLoadRecord, FlightLoadView
+from src.models.manifest import DailyManifest
+from src.services.flight_load_store import FORECAST_FIELDS, UPSERT_BATCH_SIZE
+from src.services.network import normalize_flight_no, station_of
+from src.services.derived_tables import table_built, sync_table
+
+# DailyManifest column behind each best-known field when the manifest wins
+MANIFEST_FIELDS = {
+    'c_cap': 'business_capacity',
+    'y_cap': 'economy_capacity',
+    'tot_cap': 'total_capacity',
+    'pax_c': 'business_passengers',
+    'pax_y': 'economy_passengers',
+    'pax': 'total_passengers',
+    'lf_c': 'business_load_factor',
+    'lf_y': 'economy_load_factor',
+    'lf': 'load_factor'
+}
+
+def merged_flight_days(start_date, end_date):
+    """
+    Best-known load of every flight-day in [start_date, end_date], as
+    {(travel_date, flight_no): row} with FlightLoadView's columns.
+    A manifest (actual) replaces the forecast numbers of the same flight-day;
+    the forecast passengers are kept in forecast_pax.
+    """
+    days = {}
+    
+    names = ('travel_date', 'flight_no', 'data_source') + FORECAST_FIELDS
+    records = db.session.query(*[getattr(FlightLoadRecord, name) for name in names]).filter(
+        FlightLoadRecord.travel_date.between(start_date, end_date)
+    )
+    for values in records:
+        row = dict(zip(names, values))
+        # Rows stored with data_source='manifest' hold actuals (older data)
+        actual = row['data_source'] == 'manifest'
+        row['data_source'] = 'manifest' if actual else 'forecast'
+        row['forecast_pax'] = None if actual else row['pax']
+        row['actual_pax'] = row['pax'] if actual else None
+        row['station'] = station_of(row['flight_no'])
+        days[(row['travel_date'], row['flight_no'])] = row
+    
+    columns = [getattr(DailyManifest, column) for column in MANIFEST_FIELDS.values()]
+    manifests = db.session.query(DailyManifest.flight_date, DailyManifest.flight_number, *columns).filter(
+        DailyManifest.flight_date.between(start_date, end_date)
+    )
+    for values in manifests:
+        travel_date, flight_no = values[0], normalize_flight_no(values[1])
+        forecast = days.get((travel_date, flight_no))
+        row = {
+            'station': station_of(flight_no),
+            'travel_date': travel_date,
+            'flight_no': flight_no,
+            'data_source': 'manifest',
+            'day': forecast['day'] if forecast and forecast['day'] else travel_date.strftime('%a'),
+            'forecast_pax': forecast['forecast_pax'] if forecast else None
+        }
+        row.update(zip(MANIFEST_FIELDS, values[2:]))
+        row['actual_pax'] = row['pax']
+        days[(travel_date, flight_no)] = row
+    
+    return days
+
+def refresh_flight_view(dates, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Rematerialize the flight_load_view rows of the given travel dates from the
+    forecast and manifest tables. Runs in the caller's transaction (no commit).
+    Returns the number of rows written.
+    """
+    dates = set(day for day in dates if day)
+    if not dates:
+        return 0
+    
+    updated_at = datetime.utcnow()
+    rows = []
+    for key, row in merged_flight_days(min(dates), max(dates)).items():
+        if key[0] in dates:
+            row['updated_at'] = updated_at
+            rows.append(row)
+    
+    table = FlightLoadView.__table__
+    ordered = sorted(dates)
+    for i in range(0, len(ordered), batch_size):
+        db.session.execute(table.delete().where(table.c.travel_date.in_(ordered[i:i + batch_size])))
+    for i in range(0, len(rows), batch_size):
+        db.session.execute(table.insert(), rows[i:i + batch_size])
+    
+    return len(rows)
+
+def rebuild_flight_view():
+    """Rematerialize the whole view (e.g. for data uploaded before it existed). No commit"""
+    db.session.execute(FlightLoadView.__table__.delete())
+    dates = set(day for (day,) in db.session.query(FlightLoadRecord.travel_date).distinct())
+    dates.update(day for (day,) in db.session.query(DailyManifest.flight_date).distinct())
+    return refresh_flight_view(dates)
+
+def sync_flight_view(dates):
+    """
+    refresh_flight_view for the travel dates of an upload; rebuilds the whole
+    view instead while it isn't complete (see sync_table). No commit
+    """
+    return sync_table(FlightLoadView.__tablename__, rebuild_flight_view, refresh_flight_view, dates)
+
+def flight_view_ready():
+    """True once the view holds every stored flight-day (rebuilt at least once)"""
+    return table_built(FlightLoadView.__tablename__)
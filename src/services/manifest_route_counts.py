@@ -0,0 +1,206 @@
+from datetime import timedelta
+from collections import defaultdict
+from sqlalchemy import func
+from src.models.user import db
+from src.models.manifest import DailyManifest, ManifestRouteCount, ManifestRouteMonth
+from src.services.flight_load_store import UPSERT_BATCH_SIZE
+from src.services.flight_load_rollups import period_start, period_end
+from src.services.sales_aggregation import period_label
+from src.services.network import normalize_flight_no
+from src.services.derived_tables import table_built, sync_table
+
+# Buckets of an origin-destination matrix; monthly and quarterly read whole months from manifest_route_months
+OD_PERIODS = ('daily', 'weekly', 'monthly', 'quarterly')
+
+# Directions a matrix can cover ('all' sums both)
+OD_DIRECTIONS = {'inbound': ('inbound',), 'outbound': ('outbound',), 'all': ('inbound', 'outbound')}
+
+# Columns of one matrix (about ten years of days)
+MAX_OD_PERIODS = 3660
+
+def refresh_route_counts(dates, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Rewrite the manifest_route_counts rows of the given flight dates from the
+    route breakdowns of their manifests, and the monthly totals of their
+    months. Runs in the caller's transaction (no commit). Returns the number
+    of daily rows written.
+    """
+    dates = sorted(set(day for day in dates if day))
+    if not dates:
+        return 0
+    
+    table = ManifestRouteCount.__table__
+    rows = []
+    for i in range(0, len(dates), batch_size):
+        chunk = dates[i:i + batch_size]
+        db.session.execute(table.delete().where(table.c.flight_date.in_(chunk)))
+        
+        # Both spellings of a flight ('621' and 'ET621') can hold a manifest; one row per flight-day airport
+        counts = {}
+        manifests = db.session.query(
+            DailyManifest.flight_date, DailyManifest.flight_number, DailyManifest.direction, DailyManifest.route_breakdown
+        ).filter(DailyManifest.flight_date.in_(chunk))
+        for flight_date, flight_number, direction, route_breakdown in manifests:
+            for airport_code, passengers in (route_breakdown or {}).items():
+                counts[(flight_date, normalize_flight_no(flight_number), str(airport_code))] = (direction, int(passengers or 0))
+        rows.extend(
+            {'flight_date': flight_date, 'flight_no': flight_no, 'airport_code': airport_code,
+             'direction': direction, 'passengers': passengers}
+            for (flight_date, flight_no, airport_code), (direction, passengers) in counts.items()
+        )
+    
+    for i in range(0, len(rows), batch_size):
+        db.session.execute(table.insert(), rows[i:i + batch_size])
+    
+    refresh_route_months(dates, batch_size)
+    return len(rows)
+
+def refresh_route_months(dates, batch_size=UPSERT_BATCH_SIZE):
+    """Recompute the manifest_route_months rows of the months containing dates from the daily counts. No commit"""
+    months = sorted(set(period_start(day, 'monthly') for day in dates if day))
+    if not months:
+        return 0
+    
+    totals = defaultdict(int)
+    counts = db.session.query(
+        ManifestRouteCount.flight_date, ManifestRouteCount.flight_no, ManifestRouteCount.direction,
+        ManifestRouteCount.airport_code, ManifestRouteCount.passengers
+    ).filter(ManifestRouteCount.flight_date.between(months[0], period_end(months[-1], 'monthly')))
+    wanted = set(months)
+    for flight_date, flight_no, direction, airport_code, passengers in counts:
+        month = period_start(flight_date, 'monthly')
+        if month in wanted:
+            totals[(month, flight_no, direction, airport_code)] += passengers
+    
+    table = ManifestRouteMonth.__table__
+    for i in range(0, len(months), batch_size):
+        db.session.execute(table.delete().where(table.c.month_start.in_(months[i:i + batch_size])))
+    rows = [
+        {'month_start': month, 'flight_no': flight_no, 'direction': direction,
+         'airport_code': airport_code, 'passengers': passengers}
+        for (month, flight_no, direction, airport_code), passengers in totals.items()
+    ]
+    for i in range(0, len(rows), batch_size):
+        db.session.execute(table.insert(), rows[i:i + batch_size])
+    return len(rows)
+
+def sync_route_counts(dates):
+    """
+    refresh_route_counts for the flight dates of an upload; rebuilds the daily
+    and monthly tables from every manifest instead while they aren't complete
+    (see sync_table). No commit
+    """
+    return sync_table(ManifestRouteCount.__tablename__, rebuild_route_counts, refresh_route_counts, dates)
+
+def rebuild_route_counts():
+    """Rewrite the daily and monthly tables (e.g. for manifests uploaded before they existed). No commit"""
+    db.session.execute(ManifestRouteCount.__table__.delete())
+    db.session.execute(ManifestRouteMonth.__table__.delete())
+    return refresh_route_counts(day for (day,) in db.session.query(DailyManifest.flight_date).distinct())
+
+def route_counts_ready():
+    """True once the daily and monthly tables hold every stored manifest (rebuilt at least once)"""
+    return table_built(ManifestRouteCount.__tablename__)
+
+def route_actuals(start_date, end_date, direction, flight_nos=None):
+    """
+    (flight_date, airport_code, passengers) summed over the flights of each day,
+    from one range scan of the covering index. flight_nos limits the flights
+    (e.g. one station's)
+    """
+    query = db.session.query(
+        ManifestRouteCount.flight_date,
+        ManifestRouteCount.airport_code,
+        func.sum(ManifestRouteCount.passengers)
+    ).filter(
+        ManifestRouteCount.direction == direction,
+        ManifestRouteCount.flight_date >= start_date,
+        ManifestRouteCount.flight_date <= end_date
+    )
+    if flight_nos is not None:
+        query = query.filter(ManifestRouteCount.flight_no.in_(flight_nos))
+    return query.group_by(ManifestRouteCount.flight_date, ManifestRouteCount.airport_code).all()
+
+def route_cells(model, day_column, start_date, end_date, directions, flight_nos=None, airports=None):
+    """(day, airport_code, passengers) of one table over a date range, summed in SQL along its covering index"""
+    query = db.session.query(day_column, model.airport_code, func.sum(model.passengers)).filter(
+        model.direction.in_(directions),
+        day_column >= start_date,
+        day_column <= end_date
+    )
+    if flight_nos is not None:
+        query = query.filter(model.flight_no.in_(flight_nos))
+    if airports:
+        query = query.filter(model.airport_code.in_(airports))
+    return query.group_by(day_column, model.airport_code).all()
+
+def od_period_count(start_date, end_date, period):
+    """Number of periods overlapping [start_date, end_date], without building their labels"""
+    if period == 'daily':
+        return (end_date - start_date).days + 1
+    if period == 'weekly':
+        return (period_start(end_date, 'weekly') - period_start(start_date, 'weekly')).days // 7 + 1
+    if period == 'quarterly':
+        return (end_date.year * 4 + (end_date.month - 1) // 3) - (start_date.year * 4 + (start_date.month - 1) // 3) + 1
+    return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+
+def od_period_labels(start_date, end_date, period):
+    """Labels of every period overlapping [start_date, end_date], in order"""
+    labels = []
+    day = start_date
+    while day <= end_date:
+        label = period_label(day, period)
+        if not labels or labels[-1] != label:
+            labels.append(label)
+        if period == 'daily':
+            day += timedelta(days=1)
+        else:
+            step = 'weekly' if period == 'weekly' else 'monthly'
+            day = period_end(period_start(day, step), step) + timedelta(days=1)
+    return labels
+
+def od_matrix(start_date, end_date, direction='all', period='monthly', flight_nos=None, airports=None):
+    """
+    Connecting passengers per route code (origin of inbound, destination of
+    outbound passengers) and period. Whole months inside the range come from
+    manifest_route_months, the partial months at its edges (and daily or
+    weekly buckets) from the daily route counts.
+    """
+    directions = OD_DIRECTIONS[direction]
+    
+    # Whole months of the range: from the first month starting inside it to the last one ending inside it
+    first_full = start_date if start_date.day == 1 else period_end(start_date.replace(day=1), 'monthly') + timedelta(days=1)
+    last_full = end_date if end_date == period_end(end_date.replace(day=1), 'monthly') else end_date.replace(day=1) - timedelta(days=1)
+    
+    cells = defaultdict(int)
+    daily_ranges = [(start_date, end_date)]
+    if period in ('monthly', 'quarterly') and first_full <= last_full:
+        for month, airport_code, passengers in route_cells(ManifestRouteMonth, ManifestRouteMonth.month_start, first_full,
+                                                           last_full, directions, flight_nos, airports):
+            cells[(airport_code, period_label(month, period))] += passengers
+        daily_ranges = [(start_date, first_full - timedelta(days=1)), (last_full + timedelta(days=1), end_date)]
+    
+    for range_start, range_end in daily_ranges:
+        if range_start > range_end:
+            continue
+        for day, airport_code, passengers in route_cells(ManifestRouteCount, ManifestRouteCount.flight_date, range_start,
+                                                         range_end, directions, flight_nos, airports):
+            cells[(airport_code, period_label(day, period))] += passengers
+    
+    periods = od_period_labels(start_date, end_date, period)
+    column = {label: index for index, label in enumerate(periods)}
+    rows = defaultdict(lambda: [0] * len(periods))
+    for (airport_code, label), passengers in cells.items():
+        rows[airport_code][column[label]] += int(passengers or 0)
+    
+    # Busiest routes first
+    routes = sorted(rows, key=lambda code: (-sum(rows[code]), code))
+    matrix = [rows[code] for code in routes]
+    return {
+        'periods': periods,
+        'routes': routes,
+        'matrix': matrix,
+        'route_totals': [sum(row) for row in matrix],
+        'period_totals': [sum(row[index] for row in matrix) for index in range(len(periods))],
+        'total_passengers': sum(sum(row) for row in matrix)
+    }
@@ -0,0 +1,91 @@
+from flask import g, has_app_context
+from src.models.user import db
+from src.models.network import Station, FlightPair
+from src.models.flight_load import FlightLoadView, FlightLoadRollup, FlightLoadAccuracy
+
+# Hub every flight pair operates from
+HUB_CODE = 'ADD'
+
+# The network the dashboard started with, seeded into an empty database
+DEFAULT_STATION = {'code': 'KWI', 'name': 'Kuwait', 'country': 'Kuwait'}
+DEFAULT_FLIGHT_PAIR = {'station_code': 'KWI', 'hub_code': HUB_CODE, 'inbound_flight_no': '620', 'outbound_flight_no': '621'}
+
+# Seat configuration for flights that are not in any flight pair (Boeing 787 typical config)
+DEFAULT_BUSINESS_CAPACITY = 24
+DEFAULT_ECONOMY_CAPACITY = 246
+
+# Derived flight load tables that carry a station column
+STATION_TABLES = (FlightLoadView, FlightLoadRollup, FlightLoadAccuracy)
+
+def normalize_flight_no(flight_number):
+    """Flight number as FlightLoadRecord stores it: 'ET621' / ' 621 ' -> '621'"""
+    flight_number = str(flight_number or '').strip().upper()
+    return flight_number[2:].strip() if flight_number.startswith('ET') else flight_number
+
+def ensure_default_network():
+    """Seed the original station and flight pair when no station is configured yet"""
+    if Station.query.first() is not None:
+        return
+    db.session.add(Station(**DEFAULT_STATION))
+    db.session.add(FlightPair(**DEFAULT_FLIGHT_PAIR))
+    db.session.commit()
+
+def flight_directory():
+    """
+    {flight_no: {'station', 'direction', 'c_cap', 'y_cap', 'tot_cap'}} for every
+    leg of the active flight pairs. Read once per app context (a request or an upload job).
+    """
+    if has_app_context() and '_flight_directory' in g:
+        return g._flight_directory
+    
+    directory = {}
+    for pair in FlightPair.query.filter_by(active=True):
+        for flight_no, direction, c_cap, y_cap in pair.legs():
+            directory[flight_no] = {
+                'station': pair.station_code,
+                'direction': direction,
+                'c_cap': c_cap,
+                'y_cap': y_cap,
+                'tot_cap': c_cap + y_cap
+            }
+    
+    if has_app_context():
+        g._flight_directory = directory
+    return directory
+
+def forget_flight_directory():
+    """Drop the directory read by this app context, after the network was edited"""
+    if has_app_context():
+        g.pop('_flight_directory', None)
+
+def station_of(flight_no):
+    """Station a flight serves, None for flights outside the configured network"""
+    info = flight_directory().get(normalize_flight_no(flight_no))
+    return info['station'] if info else None
+
+def flight_direction(flight_no, default=None):
+    """'inbound' (hub to station) or 'outbound' (station to hub)"""
+    info = flight_directory().get(normalize_flight_no(flight_no))
+    return info['direction'] if info else default
+
+def flight_capacity(flight_no):
+    """(business, economy, total) seats of a flight, the default configuration if it isn't configured"""
+    info = flight_directory().get(normalize_flight_no(flight_no))
+    if info:
+        return info['c_cap'], info['y_cap'], info['tot_cap']
+    return DEFAULT_BUSINESS_CAPACITY, DEFAULT_ECONOMY_CAPACITY, DEFAULT_BUSINESS_CAPACITY + DEFAULT_ECONOMY_CAPACITY
+
+def station_flights(station=None, direction=None):
+    """Flight numbers of one station (all stations when station is None or 'all'), optionally one direction"""
+    return sorted(
+        flight_no for flight_no, info in flight_directory().items()
+        if (not station or station == 'all' or info['station'] == station)
+        and (direction is None or info['direction'] == direction)
+    )
+
+def assign_station(flight_nos, station):
+    """Restamp the station of already materialized flight load rows, after a flight pair moved. No commit"""
+    for model in STATION_TABLES:
+        db.session.query(model).filter(model.flight_no.in_(flight_nos)).update(
+            {model.station: station}, synchronize_session=False
+        )
@@ -0,0 +1,151 @@
+from collections import defaultdict
+from src.services.sales_schema import DAYS_ORDER
+
+# by_report trend granularities, finest first
+TIME_MODES = ('daily', 'weekly', 'monthly', 'quarterly')
+
+# Groupings the engine can build in a single pass
+GROUPINGS = TIME_MODES + ('agent', 'weekday', 'hour', 'fop')
+
+# Chart id -> grouping (by_report depends on the requested time mode)
+CHART_GROUPINGS = {
+    'by_report': None,
+    'by_agent': 'agent',
+    'by_days': 'weekday',
+    'by_hours': 'hour',
+    'by_fop': 'fop'
+}
+
+REVENUE = 0
+TICKETS = 1
+
+# Fields of a rollup cube cell, see rollup_cells
+ROLLUP_FIELDS = ('sale_date', 'hour', 'day_name', 'agent', 'fop', 'revenue', 'tickets', 'first_row')
+
+def chart_grouping(chart_id, time_mode='daily'):
+    """Return the grouping that backs a chart id"""
+    if chart_id == 'by_report':
+        return time_mode if time_mode in TIME_MODES else 'daily'
+    return CHART_GROUPINGS.get(chart_id)
+
+def period_label(sale_date, time_mode='daily'):
+    """
+    Trend bucket of a date: 2025-03-14 (daily), 2025-W11 (ISO week),
+    2025-03 (monthly) or 2025-Q1 (quarterly). Labels sort chronologically.
+    """
+    if time_mode == 'weekly':
+        iso_year, iso_week, _ = sale_date.isocalendar()
+        return f"{iso_year:04d}-W{iso_week:02d}"
+    if time_mode == 'monthly':
+        return f"{sale_date.year:04d}-{sale_date.month:02d}"
+    if time_mode == 'quarterly':
+        return f"{sale_date.year:04d}-Q{(sale_date.month - 1) // 3 + 1}"
+    return sale_date.strftime('%Y-%m-%d')
+
+def rollup_cells(records):
+    """
+    Collapse normalized sales records into a rollup cube: one cell per
+    (sale_date, hour, day_name, agent, fop) with the revenue sum, ticket count
+    and the position of the cell's first record (keeps first-seen order for ties).
+    
+    Returns tuples laid out as ROLLUP_FIELDS, in first-seen order.
+    """
+    cells = {}
+    for position, (sale_date, hour, day_name, agent, fop, income) in enumerate(records):
+        key = (sale_date, hour, day_name, agent, fop)
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [income, 1, position]
+        else:
+            cell[0] += income
+            cell[1] += 1
+    return [key + (cell[0], cell[1], cell[2]) for key, cell in cells.items()]
+
+def aggregate_sales(records, groupings=GROUPINGS, start_date=None, end_date=None):
+    """
+    Build every requested grouping in one pass over normalized sales records.
+    
+    records: iterable of (sale_date, hour, day_name, agent, fop, income) tuples
+    start_date / end_date: optional datetime.date bounds (inclusive); records
+    without a date are dropped when either bound is given.
+    
+    Returns {grouping: {key: [revenue, tickets]}} with keys in first-seen order.
+    """
+    groupings = set(groupings)
+    periods = [time_mode for time_mode in TIME_MODES if time_mode in groupings]
+    want_agent = 'agent' in groupings
+    want_weekday = 'weekday' in groupings
+    want_hour = 'hour' in groupings
+    want_fop = 'fop' in groupings
+    filter_dates = start_date is not None or end_date is not None
+    
+    def new_grouping():
+        return defaultdict(lambda: [0.0, 0.0])
+    
+    trends = {time_mode: new_grouping() for time_mode in periods}
+    agents = new_grouping()
+    weekdays = new_grouping()
+    hours = new_grouping()
+    fops = new_grouping()
+    
+    for sale_date, hour, day_name, agent, fop, income in records:
+        if filter_dates:
+            if sale_date is None:
+                continue
+            if start_date is not None and sale_date < start_date:
+                continue
+            if end_date is not None and sale_date > end_date:
+                continue
+        
+        if sale_date is not None:
+            for time_mode in periods:
+                totals = trends[time_mode][period_label(sale_date, time_mode)]
+                totals[REVENUE] += income
+                totals[TICKETS] += 1
+        
+        if want_agent:
+            totals = agents[agent if agent is not None else 'Unknown']
+            totals[REVENUE] += income
+            totals[TICKETS] += 1
+        
+        if want_weekday and day_name:
+            totals = weekdays[day_name]
+            totals[REVENUE] += income
+            totals[TICKETS] += 1
+        
+        if want_hour and hour is not None:
+            totals = hours[f"{hour:02d}:00"]
+            totals[REVENUE] += income
+            totals[TICKETS] += 1
+        
+        if want_fop:
+            totals = fops[fop if fop is not None else 'Unknown']
+            totals[REVENUE] += income
+            totals[TICKETS] += 1
+    
+    built = dict(trends)
+    built.update({
+        'agent': agents,
+        'weekday': weekdays,
+        'hour': hours,
+        'fop': fops
+    })
+    return {grouping: dict(built[grouping]) for grouping in groupings if grouping in built}
+
+def format_grouping(grouping, totals, data_mode='revenue'):
+    """
+    Turn one grouping from aggregate_sales into chart data for a data mode,
+    ordered the same way process_chart_data orders it
+    """
+    index = REVENUE if data_mode == 'revenue' else TICKETS
+    values = {key: pair[index] for key, pair in totals.items()}
+    
+    if grouping in TIME_MODES or grouping == 'hour':
+        return dict(sorted(values.items(), key=lambda x: x[0]))
+    if grouping == 'agent':
+        return dict(sorted(values.items(), key=lambda x: x[1], reverse=True)[:10])
+    if grouping == 'weekday':
+        return {day: values.get(day, 0) for day in DAYS_ORDER}
+    if grouping == 'fop':
+        return dict(sorted(values.items(), key=lambda x: x[1], reverse=True))
+    return values
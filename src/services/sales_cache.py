@@ -0,0 +1,168 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app
+from src.models.sales import SalesData
+from src.services.sales_schema import get_sheet_schema, normalize_sales_record
+
+# Decoded Python objects take several times the space of their JSON text;
+# this factor turns len(data_json) into a rough in-memory size.
+DECODED_SIZE_FACTOR = 5
+# Rough size of one normalized (date, hour, day, agent, fop, income) tuple
+RECORD_SIZE = 150
+DEFAULT_MAX_MB = 256
+DEFAULT_RESPONSE_MAX_MB = 32
+
+class CachedSalesDataset:
+    """
+    A decoded sales workbook with the best data sheet and its column
+    schema already resolved, plus the sheet's rows pre-normalized into
+    (sale_date, hour, day_name, agent, fop, income) records.
+    Shared by every request in the worker, so treat it as read-only.
+    """
+    
+    def __init__(self, dataset_id, upload_date, filename, data, json_size):
+        self.dataset_id = dataset_id
+        self.upload_date = upload_date
+        self.filename = filename
+        self.data = data or {}
+        self.size = json_size * DECODED_SIZE_FACTOR
+        
+        self.sheets = list(self.data.keys())
+        self.total_rows = sum(sheet_data.get('row_count', 0) for sheet_data in self.data.values())
+        
+        # Sheet with the most rows is the one charts are built from
+        self.best_sheet = None
+        max_rows = 0
+        for sheet_name, sheet_data in self.data.items():
+            if sheet_data.get('row_count', 0) > max_rows:
+                max_rows = sheet_data.get('row_count', 0)
+                self.best_sheet = sheet_name
+        self.rows = self.data[self.best_sheet]['data'] if self.best_sheet else []
+        self.schema = get_sheet_schema(self.data[self.best_sheet]) if self.best_sheet else None
+        self.records = [normalize_sales_record(row, self.schema) for row in self.rows]
+        self.size += len(self.records) * RECORD_SIZE
+
+class SalesDatasetCache:
+    """
+    Process-level LRU cache of decoded sales datasets keyed by (id, upload_date).
+    Other per-version structures (e.g. NumPy frames) share the cache and its
+    memory cap under keys that end with (id, upload_date); entries only need
+    a size attribute.
+    Each gunicorn worker keeps its own copy, so a new upload is picked up by
+    every worker on its next request because the key changes.
+    """
+    
+    def __init__(self, config_key='SALES_CACHE_MAX_MB', default_max_mb=DEFAULT_MAX_MB):
+        self.config_key = config_key
+        self.default_max_mb = default_max_mb
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+    
+    def max_bytes(self):
+        """Memory cap, read from the app config (SALES_CACHE_MAX_MB by default)"""
+        return int(current_app.config.get(self.config_key, self.default_max_mb)) * 1024 * 1024
+    
+    def get(self, key, loader):
+        """Return the cached dataset for key, calling loader() on a miss"""
+        entry = self.lookup(key)
+        if entry is not None:
+            return entry
+        
+        # Decode outside the lock so concurrent requests are not blocked
+        return self.store(key, loader())
+    
+    def lookup(self, key):
+        """Return the cached entry for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+    
+    def store(self, key, entry):
+        """Add an entry, evicting the least recently used ones past the memory cap"""
+        max_bytes = self.max_bytes()
+        
+        with self._lock:
+            if entry.size > max_bytes:
+                self.oversized += 1
+                return entry
+            if key not in self._entries:
+                self._entries[key] = entry
+                self.current_bytes += entry.size
+            while self.current_bytes > max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.evictions += 1
+            return self._entries.get(key, entry)
+    
+    def contains(self, key):
+        """Check for a cached entry without touching the counters or LRU order"""
+        with self._lock:
+            return key in self._entries
+    
+    def invalidate(self):
+        """Drop every cached dataset (called when a new dataset is activated)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'keys': [[part.isoformat() if hasattr(part, 'isoformat') else part for part in key]
+                         for key in self._entries.keys()],
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'oversized': self.oversized
+            }
+
+class CachedResponse:
+    """A serialized JSON response body with its strong ETag"""
+    
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        self.size = len(body) + 200
+
+sales_cache = SalesDatasetCache()
+
+# Rendered chart / chart-data responses, keyed on the request parameters
+# plus (id, upload_date) of the active dataset
+chart_response_cache = SalesDatasetCache('CHART_CACHE_MAX_MB', DEFAULT_RESPONSE_MAX_MB)
+
+def get_cached_dataset(sales_data):
+    """Return the decoded dataset for a SalesData row, decoding at most once per version"""
+    def load():
+        json_text = sales_data.data_json
+        return CachedSalesDataset(
+            sales_data.id,
+            sales_data.upload_date,
+            sales_data.filename,
+            json.loads(json_text),
+            len(json_text)
+        )
+    return sales_cache.get((sales_data.id, sales_data.upload_date), load)
+
+def get_active_dataset():
+    """Return the cached active dataset, or None if nothing has been uploaded"""
+    active_data = SalesData.query.filter_by(is_active=True).first()
+    if not active_data:
+        return None
+    return get_cached_dataset(active_data)
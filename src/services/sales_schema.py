@@ -0,0 +1,149 @@
+from datetime import datetime
+
+# Possible column names for each field (based on actual Excel structure)
+# Actual columns: Tickets, DATE, Ticket Number, Amount, Issuing agent, FOP, Time, INCOME, Day, TIME 24HRS
+DATE_COLUMNS = ['DATE', 'Date', 'date', 'Issue Date']
+INCOME_COLUMNS = ['INCOME', 'Income', 'income', 'Amount', 'amount', 'Revenue', 'revenue']
+AGENT_COLUMNS = ['Issuing agent', 'Issuing Agent', 'Agent', 'agent', 'AGENT', 'Agent Name']
+TIME_COLUMNS = ['Time', 'TIME', 'time']
+TIME_24_COLUMNS = ['TIME 24HRS', 'Time 24hrs', 'TIME24HRS', 'time_24hrs', 'TIME24', 'Time24']
+DAY_COLUMNS = ['Day', 'DAY', 'day', 'DayOfWeek', 'Weekday']
+FOP_COLUMNS = ['FOP', 'Fop', 'fop', 'Form of Payment', 'Payment']
+TICKET_NUMBER_COLUMNS = ['Ticket Number', 'TICKET NUMBER', 'Ticket No', 'ticket_number', 'Ticket']
+
+DAYS_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Logical field -> accepted header names, in order of preference
+SALES_FIELD_ALIASES = {
+    'date': DATE_COLUMNS,
+    'income': INCOME_COLUMNS,
+    'agent': AGENT_COLUMNS,
+    'time': TIME_COLUMNS,
+    'time_24': TIME_24_COLUMNS,
+    'day': DAY_COLUMNS,
+    'fop': FOP_COLUMNS,
+    'ticket_number': TICKET_NUMBER_COLUMNS
+}
+
+def resolve_sales_schema(headers):
+    """
+    Map each logical sales field to the actual header of a sheet.
+    Fields with no matching header map to None, so row.get(schema[field])
+    returns None for them just like a missing column.
+    """
+    available = set(header for header in headers if header)
+    schema = {}
+    for field, possible_names in SALES_FIELD_ALIASES.items():
+        schema[field] = None
+        for name in possible_names:
+            if name in available:
+                schema[field] = name
+                break
+            # Try with stripped whitespace
+            stripped_name = name.strip() if isinstance(name, str) else name
+            if stripped_name in available:
+                schema[field] = stripped_name
+                break
+    return schema
+
+def get_sheet_schema(sheet_data):
+    """Return the schema stored with a sheet, resolving it for datasets uploaded before it was stored"""
+    schema = sheet_data.get('schema')
+    if schema is None:
+        schema = resolve_sales_schema(sheet_data.get('headers', []))
+    return schema
+
+def safe_float(value):
+    """Safely convert value to float"""
+    if value is None:
+        return 0.0
+    try:
+        if isinstance(value, str):
+            value = value.replace(',', '').replace('$', '').strip()
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+def get_date_string(date_val):
+    """Return the YYYY-MM-DD part of a stored date value"""
+    if isinstance(date_val, str):
+        return date_val.split(' ')[0]
+    return str(date_val).split(' ')[0]
+
+def get_hour(row, schema):
+    """Extract the hour (0-23) of a sale, or None if it can't be determined"""
+    hour_int = None
+    
+    # Try column G 'Time' first (integer format like 1422, 23, 1513)
+    time_val = row.get(schema['time'])
+    if time_val is not None:
+        try:
+            time_int = int(time_val)
+            # Extract hour: 1422 -> 14, 23 -> 0, 148 -> 1, 1513 -> 15
+            if time_int >= 100:
+                hour_int = time_int // 100
+            else:
+                hour_int = 0  # Values like 23, 33 are in the first hour (00:xx)
+        except (ValueError, TypeError):
+            pass
+    
+    # Fallback to TIME 24HRS column if Time column failed
+    if hour_int is None:
+        time_24 = row.get(schema['time_24'])
+        if time_24:
+            try:
+                # Handle datetime strings like '1900-01-01 14:22:00'
+                time_str = str(time_24)
+                if ' ' in time_str:
+                    time_str = time_str.split(' ')[1]
+                if ':' in time_str:
+                    hour_int = int(time_str.split(':')[0])
+            except (ValueError, AttributeError, IndexError):
+                pass
+    
+    if hour_int is not None and 0 <= hour_int <= 23:
+        return hour_int
+    return None
+
+def normalize_sales_row(row, schema):
+    """Resolve a raw sheet row into the typed fields stored in SalesTransaction"""
+    sale_date = None
+    date_val = row.get(schema['date'])
+    if date_val:
+        try:
+            sale_date = datetime.strptime(get_date_string(date_val), '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    
+    day_name = row.get(schema['day'])
+    if not day_name and sale_date:
+        day_name = sale_date.strftime('%A')
+    
+    agent = row.get(schema['agent'])
+    fop = row.get(schema['fop'])
+    ticket_number = row.get(schema['ticket_number'])
+    
+    return {
+        'sale_date': sale_date,
+        'hour': get_hour(row, schema),
+        'day_name': str(day_name) if day_name else None,
+        'agent': str(agent) if agent is not None else None,
+        'fop': str(fop) if fop is not None else None,
+        'income': safe_float(row.get(schema['income'])),
+        'ticket_number': str(ticket_number) if ticket_number is not None else None
+    }
+
+def normalize_sales_record(row, schema):
+    """
+    Compact form of normalize_sales_row used by the in-memory aggregation engine:
+    (sale_date, hour, day_name, agent, fop, income)
+    """
+    normalized = normalize_sales_row(row, schema)
+    return (
+        normalized['sale_date'],
+        normalized['hour'],
+        normalized['day_name'],
+        normalized['agent'],
+        normalized['fop'],
+        normalized['income']
+    )
@@ -0,0 +1,279 @@
+import os
+import threading
+import traceback
+import multiprocessing
+from uuid import uuid4
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, request
+from src.models.user import db
+from src.models.upload_job import UploadJob
+from src.services.excel_ingest import RowProgress, track_row_progress
+
+# Share of the progress bar given to parsing; saving is a single transaction
+PARSE_START = 5.0
+PARSE_END = 80.0
+
+class UploadError(Exception):
+    """An upload that was read but can't be saved, reported as a 400 (or a failed job)"""
+    pass
+
+def wants_async_upload():
+    """Uploads run in the background when the client asks with ?async=1 (or an async form field)"""
+    return str(request.values.get('async', '')).lower() in ('1', 'true', 'yes')
+
+def parse_percent(rows_read, rows_expected):
+    """Progress while parsing, PARSE_START..PARSE_END, from rows read vs the workbook's stored dimensions"""
+    if not rows_expected:
+        return PARSE_START
+    return PARSE_START + (PARSE_END - PARSE_START) * min(1.0, rows_read / rows_expected)
+
+# Pool worker side: row counts go back to the parent through the queue handed to the initializer
+_worker_queue = None
+
+def _init_parse_worker(queue):
+    global _worker_queue
+    _worker_queue = queue
+
+def _run_parse(job_id, parse, args):
+    """
+    Pool worker entry point: run a parser, streaming row counts back to the parent.
+    Returns (parsed, rows_read, rows_expected); the final counts travel with the
+    result so they can't arrive after the job has moved on to saving.
+    """
+    def report(rows_read, rows_expected):
+        _worker_queue.put((job_id, rows_read, rows_expected))
+    
+    progress = RowProgress(report)
+    track_row_progress(progress)
+    try:
+        return parse(*args), progress.rows_read, progress.rows_expected
+    finally:
+        track_row_progress(None)
+
+def _parse_one(parse, args):
+    """
+    Pool worker entry point for batches: (parsed, None) or (None, error message).
+    Errors travel back as text so one bad file doesn't fail the whole map.
+    """
+    try:
+        return parse(*args), None
+    except UploadError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f'Error processing file: {str(e)}'
+
+class UploadJobRunner:
+    """
+    Local job subsystem for uploads. Parsing (the CPU-bound part: reading the
+    workbook) runs in a process pool so it neither holds the GIL nor a request
+    worker; saving runs on a job thread inside an app context, in one
+    transaction like the synchronous endpoints. Progress lives in the
+    upload_jobs table. UPLOAD_JOB_PROCESSES = 0 parses on the job thread.
+    """
+    
+    def __init__(self, config_key='UPLOAD_JOB_PROCESSES', default_processes=2):
+        self.config_key = config_key
+        self.default_processes = default_processes
+        self._lock = threading.Lock()
+        self._threads = None
+        self._pool = None
+        self._queue = None
+        self._app = None
+    
+    def processes(self):
+        try:
+            return int(current_app.config.get(self.config_key, self.default_processes))
+        except (RuntimeError, TypeError, ValueError):
+            return self.default_processes
+    
+    def submit(self, kind, filename, parse, parse_args, save, save_kwargs=None, submitted_by=None):
+        """
+        Record a queued job and run parse(*parse_args) then save(parsed, **save_kwargs)
+        in the background. save returns the response body of the synchronous upload.
+        """
+        job = UploadJob(
+            id=uuid4().hex,
+            kind=kind,
+            filename=filename,
+            state='queued',
+            submitted_by=submitted_by,
+            worker_pid=os.getpid(),
+            worker_token=process_token(os.getpid())
+        )
+        db.session.add(job)
+        db.session.commit()
+        
+        processes = self.processes()
+        with self._lock:
+            self._app = current_app._get_current_object()
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=max(1, processes), thread_name_prefix='upload-job')
+        self._threads.submit(self._run, job.id, parse, parse_args, save, save_kwargs or {}, processes)
+        return job
+    
+    def parse_many(self, parse, args_list, parallel=True):
+        """
+        Run parse(*args) for every args tuple, spread over the process pool
+        (inline when parallel is False, with UPLOAD_JOB_PROCESSES = 0 or for a
+        single file). Returns (parsed, error) pairs in the order of args_list.
+        """
+        processes = self.processes()
+        if not parallel or processes <= 0 or len(args_list) < 2:
+            return [_parse_one(parse, args) for args in args_list]
+        
+        with self._lock:
+            self._app = current_app._get_current_object()
+        pool = self._get_pool(processes)
+        chunksize = max(1, len(args_list) // (processes * 4))
+        try:
+            return list(pool.map(_parse_one, [parse] * len(args_list), args_list, chunksize=chunksize))
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+    
+    def _run(self, job_id, parse, parse_args, save, save_kwargs, processes):
+        with self._app.app_context():
+            try:
+                update_job(job_id, state='running', stage='parsing', percent=PARSE_START, started_at=datetime.utcnow())
+                if processes > 0:
+                    parsed, rows_read, rows_expected = self._parse_in_pool(job_id, parse, parse_args, processes)
+                else:
+                    parsed, rows_read, rows_expected = self._parse_inline(job_id, parse, parse_args)
+                
+                update_job(job_id, stage='saving', percent=PARSE_END, rows_processed=rows_read,
+                           rows_expected=rows_expected or None)
+                result = save(parsed, **save_kwargs)
+                
+                update_job(job_id, state='succeeded', stage=None, percent=100.0,
+                           result=result, finished_at=datetime.utcnow())
+            
+            except UploadError as e:
+                db.session.rollback()
+                update_job(job_id, state='failed', stage=None, error=str(e), finished_at=datetime.utcnow())
+            
+            except Exception as e:
+                db.session.rollback()
+                print(f"Upload job {job_id} failed: {e}")
+                traceback.print_exc()
+                update_job(job_id, state='failed', stage=None, error=f'Error processing file: {str(e)}',
+                           finished_at=datetime.utcnow())
+            
+            finally:
+                db.session.remove()
+    
+    def _parse_inline(self, job_id, parse, parse_args):
+        def report(rows_read, rows_expected):
+            update_job(job_id, rows_processed=rows_read, rows_expected=rows_expected or None,
+                       percent=parse_percent(rows_read, rows_expected))
+        
+        progress = RowProgress(report)
+        track_row_progress(progress)
+        try:
+            return parse(*parse_args), progress.rows_read, progress.rows_expected
+        finally:
+            track_row_progress(None)
+    
+    def _parse_in_pool(self, job_id, parse, parse_args, processes):
+        pool = self._get_pool(processes)
+        try:
+            return pool.submit(_run_parse, job_id, parse, parse_args).result()
+        except BrokenProcessPool:
+            # A parser process died (e.g. killed for memory); start a fresh pool next time
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+    
+    def _get_pool(self, processes):
+        with self._lock:
+            if self._pool is None:
+                # forkserver children don't inherit the job threads or database connections
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+                self._queue = context.Queue()
+                self._pool = ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                                                 initializer=_init_parse_worker, initargs=(self._queue,))
+                listener = threading.Thread(target=self._listen, args=(self._queue,),
+                                            name='upload-job-progress', daemon=True)
+                listener.start()
+            return self._pool
+    
+    def _listen(self, queue):
+        """Copy row counts reported by the pool workers into the job table"""
+        while True:
+            try:
+                job_id, rows_read, rows_expected = queue.get()
+            except (EOFError, OSError):
+                return
+            with self._app.app_context():
+                try:
+                    update_job(job_id, rows_processed=rows_read, rows_expected=rows_expected or None,
+                               percent=parse_percent(rows_read, rows_expected), only_if_stage='parsing')
+                except Exception as e:
+                    print(f"Error recording upload job progress: {e}")
+                finally:
+                    db.session.remove()
+
+def update_job(job_id, result=None, only_if_stage=None, **fields):
+    """Apply fields to a job row and commit right away, so polling clients see them"""
+    job = db.session.get(UploadJob, job_id)
+    if job is None:
+        return None
+    if only_if_stage is not None and job.stage != only_if_stage:
+        return job
+    for name, value in fields.items():
+        setattr(job, name, value)
+    if result is not None:
+        job.set_result(result)
+    db.session.commit()
+    return job
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def process_token(pid):
+    """
+    Identity of a running process beyond its pid: the boot id and the process
+    start time (clock ticks since boot) from /proc. None where /proc isn't available.
+    """
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            boot_id = f.read().strip()
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+        # Fields after the parenthesised command name; starttime is field 22 overall
+        start_ticks = stat[stat.rindex(')') + 2:].split()[19]
+    except (OSError, ValueError, IndexError):
+        return None
+    return f'{boot_id}:{start_ticks}'
+
+def worker_alive(job):
+    """Whether the process that took the job still runs (and is the same process, not a reused pid)"""
+    if not pid_alive(job.worker_pid):
+        return False
+    if job.worker_token is None:
+        return True
+    return process_token(job.worker_pid) in (job.worker_token, None)
+
+def check_orphaned(job):
+    """Fail a queued/running job whose worker process is gone (restarted or killed mid-upload)"""
+    if job.finished or not job.worker_pid or worker_alive(job):
+        return job
+    job.state = 'failed'
+    job.stage = None
+    job.error = 'Upload worker exited before the job finished; please upload the file again'
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+upload_jobs = UploadJobRunner()
@@ -0,0 +1,118 @@
+"""
+Shared fixtures: an app on an in-memory database with the flight load and
+manifest blueprints, legacy rows stored before the derived tables existed,
+and text manifests to upload.
+"""
+
+import io
+import os
+import sys
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.models.flight_load import FlightLoadRecord
+from src.models.manifest import DailyManifest
+from src.routes.flight_load import flight_load_bp
+from src.routes.manifest import manifest_bp
+from src.services.network import ensure_default_network
+
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+# Legacy data: forecasts for the first 40 days of 2025, manifests for the first 10
+LEGACY_START = date(2025, 1, 1)
+LEGACY_DAYS = 40
+LEGACY_MANIFEST_DAYS = 10
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_JOB_PROCESSES'] = 0
+    app.config['TESTING'] = True
+    app.register_blueprint(flight_load_bp, url_prefix='/api/flight-load')
+    app.register_blueprint(manifest_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        ensure_default_network()
+    return app
+
+def seed_legacy_rows():
+    """Forecast and manifest rows written straight to the source tables, as before the derived tables existed"""
+    for offset in range(LEGACY_DAYS):
+        travel_date = LEGACY_START + timedelta(days=offset)
+        for flight_no, pax in (('620', 150 + offset), ('621', 180 - offset)):
+            db.session.add(FlightLoadRecord(
+                travel_date=travel_date, flight_no=flight_no, data_source='forecast',
+                day=travel_date.strftime('%a'), c_cap=24, y_cap=246, tot_cap=270,
+                pax_c=10, pax_y=pax - 10, pax=pax, lf_c=41.67, lf_y=round((pax - 10) / 2.46, 2), lf=round(pax / 2.7, 2)
+            ))
+    for offset in range(LEGACY_MANIFEST_DAYS):
+        flight_date = LEGACY_START + timedelta(days=offset)
+        for flight_number, direction, routes in (('ET620', 'inbound', {'PZU': 40, 'NBO': 25, 'ADD': 90}),
+                                                 ('ET621', 'outbound', {'DAR': 30, 'JNB': 20, 'ADD': 110})):
+            total = sum(routes.values()) + offset
+            db.session.add(DailyManifest(
+                flight_date=flight_date, flight_number=flight_number, direction=direction,
+                total_passengers=total, business_passengers=8, economy_passengers=total - 8,
+                total_capacity=270, business_capacity=24, economy_capacity=246,
+                load_factor=round(total / 2.7, 1), business_load_factor=33.3,
+                economy_load_factor=round((total - 8) / 2.46, 1), route_breakdown=routes
+            ))
+    db.session.commit()
+
+def text_manifest(flight_date, flight, routes):
+    """Text manifest of one flight: routes maps connecting airport codes (None = local) to passengers"""
+    origin, destination = ('ADD', 'KWI') if flight == '620' else ('KWI', 'ADD')
+    lines = [
+        f"   FLIGHT: ET  {flight}   DATE: {flight_date.day:02d}{MONTHS[flight_date.month - 1]}{flight_date.year % 100:02d}",
+        f" PT.OF EMBARKATION: {origin}   PT.OF DEST: {destination}"
+    ]
+    number = 0
+    for route, count in routes.items():
+        for _ in range(count):
+            number += 1
+            connection = f"ET00348/{route}/...." if route else "..../...."
+            lines.append(f"{number:03d} DOE/JOHN{chr(65 + number % 26)}/M./31A/..0/....../....../0712157554673/......./.../{connection}")
+    return '\n'.join(lines).encode()
+
+def table_rows(model, exclude=('id', 'updated_at')):
+    """Every row of a table as a sorted list of column tuples, without surrogate keys and timestamps"""
+    columns = [column for column in model.__table__.columns if column.name not in exclude]
+    return sorted(tuple(row) for row in db.session.query(*columns).all())
+
+class DerivedTableTestCase(unittest.TestCase):
+    """Legacy rows in the source tables, then one upload through the public endpoint"""
+    
+    def setUp(self):
+        self.app = make_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        seed_legacy_rows()
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+    
+    def upload_manifest(self, flight_date, flight='621', routes=None):
+        content = text_manifest(flight_date, flight, routes or {'DAR': 12, 'PZU': 7, None: 50})
+        response = self.client.post('/api/manifest/upload', data={'file': (io.BytesIO(content), f'{flight}.txt')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+    
+    def assert_matches_rebuild(self, model, rebuild, exclude=('id', 'updated_at')):
+        """The derived table equals a full recompute from the source tables"""
+        stored = table_rows(model, exclude)
+        rebuild()
+        db.session.flush()
+        recomputed = table_rows(model, exclude)
+        db.session.rollback()
+        self.assertTrue(recomputed)
+        self.assertEqual(stored, recomputed)
@@ -0,0 +1,40 @@
+import unittest
+from datetime import date
+from tests.support import DerivedTableTestCase, LEGACY_MANIFEST_DAYS, LEGACY_START, table_rows
+from src.models.user import db
+from src.models.flight_load import FlightLoadAccuracy
+from src.services.flight_load_accuracy import backfill_accuracy, accuracy_ready
+
+# Pairing timestamps differ between an upload and a recompute
+EXCLUDE = ('id', 'forecast_captured_at', 'actual_updated_at')
+
+def recompute_accuracy():
+    """Pair every stored manifest from scratch"""
+    db.session.execute(FlightLoadAccuracy.__table__.delete())
+    backfill_accuracy()
+
+class FlightLoadAccuracyTest(DerivedTableTestCase):
+    
+    def test_reads_do_not_pair(self):
+        response = self.client.get('/api/flight-load/accuracy')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['overall']['flights'], 0)
+        self.assertEqual(table_rows(FlightLoadAccuracy, EXCLUDE), [])
+        self.assertFalse(accuracy_ready())
+    
+    def test_first_upload_backfills_legacy_rows(self):
+        self.upload_manifest(date(2025, 1, 20))
+        
+        self.assertTrue(accuracy_ready())
+        self.assert_matches_rebuild(FlightLoadAccuracy, recompute_accuracy, EXCLUDE)
+        data = self.client.get('/api/flight-load/accuracy').get_json()
+        self.assertEqual(data['overall']['flights'], 2 * LEGACY_MANIFEST_DAYS + 1)
+    
+    def test_later_uploads_refresh_incrementally(self):
+        self.upload_manifest(date(2025, 1, 20))
+        self.upload_manifest(LEGACY_START, flight='620', routes={'NBO': 5, None: 80})
+        
+        self.assert_matches_rebuild(FlightLoadAccuracy, recompute_accuracy, EXCLUDE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from datetime import date
+from tests.support import DerivedTableTestCase, LEGACY_START, table_rows
+from src.models.flight_load import FlightLoadRollup
+from src.services.flight_load_rollups import rebuild_rollups, rollups_ready
+
+class FlightLoadRollupsTest(DerivedTableTestCase):
+    
+    def test_reads_do_not_roll_up(self):
+        response = self.client.get('/api/flight-load/rollups')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 0)
+        self.assertEqual(table_rows(FlightLoadRollup), [])
+        self.assertFalse(rollups_ready())
+    
+    def test_first_upload_backfills_legacy_rows(self):
+        self.upload_manifest(date(2025, 3, 1))
+        
+        self.assertTrue(rollups_ready())
+        self.assert_matches_rebuild(FlightLoadRollup, rebuild_rollups)
+        data = self.client.get('/api/flight-load/rollups?period=monthly&flight=ET620').get_json()
+        self.assertEqual([rollup['period_start'] for rollup in data['rollups']], ['2025-01-01', '2025-02-01'])
+    
+    def test_later_uploads_refresh_incrementally(self):
+        self.upload_manifest(date(2025, 3, 1))
+        self.upload_manifest(LEGACY_START, flight='620', routes={'NBO': 5, None: 80})
+        
+        self.assert_matches_rebuild(FlightLoadRollup, rebuild_rollups)
+
+if __name__ == '__main__':
+    unittest.main()
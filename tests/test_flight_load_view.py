@@ -0,0 +1,30 @@
+import unittest
+from datetime import date
+from tests.support import DerivedTableTestCase, LEGACY_DAYS, LEGACY_START, table_rows
+from src.models.flight_load import FlightLoadView
+from src.services.flight_load_view import rebuild_flight_view, flight_view_ready
+
+class FlightLoadViewTest(DerivedTableTestCase):
+    
+    def test_reads_do_not_materialize(self):
+        response = self.client.get('/api/flight-load/data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(table_rows(FlightLoadView), [])
+        self.assertFalse(flight_view_ready())
+    
+    def test_first_upload_backfills_legacy_rows(self):
+        self.upload_manifest(date(2025, 3, 1))
+        
+        self.assertTrue(flight_view_ready())
+        self.assert_matches_rebuild(FlightLoadView, rebuild_flight_view)
+        data = self.client.get('/api/flight-load/data').get_json()
+        self.assertEqual(data['record_count'], 2 * LEGACY_DAYS + 1)
+    
+    def test_later_uploads_refresh_incrementally(self):
+        self.upload_manifest(date(2025, 3, 1))
+        self.upload_manifest(LEGACY_START, flight='620', routes={'NBO': 5, None: 80})
+        
+        self.assert_matches_rebuild(FlightLoadView, rebuild_flight_view)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from datetime import date
+from tests.support import DerivedTableTestCase, LEGACY_MANIFEST_DAYS, LEGACY_START, table_rows
+from src.models.manifest import ManifestRouteCount, ManifestRouteMonth
+from src.services.manifest_route_counts import rebuild_route_counts, route_counts_ready
+
+OD_MATRIX = '/api/manifest/od-matrix?start_date=2025-01-01&end_date=2025-03-31&period=monthly&direction=outbound'
+
+class ManifestRouteCountsTest(DerivedTableTestCase):
+    
+    def test_reads_do_not_backfill(self):
+        data = self.client.get(OD_MATRIX).get_json()
+        self.assertFalse(data['route_counts_ready'])
+        self.assertEqual(table_rows(ManifestRouteCount), [])
+        self.assertEqual(table_rows(ManifestRouteMonth), [])
+    
+    def test_first_upload_backfills_legacy_rows(self):
+        self.upload_manifest(date(2025, 3, 1))
+        
+        self.assertTrue(route_counts_ready())
+        self.assert_matches_rebuild(ManifestRouteCount, rebuild_route_counts)
+        self.assert_matches_rebuild(ManifestRouteMonth, rebuild_route_counts)
+        data = self.client.get(OD_MATRIX).get_json()
+        self.assertTrue(data['route_counts_ready'])
+        self.assertEqual(data['period_totals'], [LEGACY_MANIFEST_DAYS * (30 + 20 + 110), 0, 12 + 7 + 50])
+    
+    def test_later_uploads_refresh_incrementally(self):
+        self.upload_manifest(date(2025, 3, 1))
+        self.upload_manifest(LEGACY_START, flight='620', routes={'NBO': 5, None: 80})
+        
+        self.assert_matches_rebuild(ManifestRouteCount, rebuild_route_counts)
+        self.assert_matches_rebuild(ManifestRouteMonth, rebuild_route_counts)
+
+if __name__ == '__main__':
+    unittest.main()